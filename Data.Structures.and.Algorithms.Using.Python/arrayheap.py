@@ -29,6 +29,60 @@ class MaxHeap:
         self._siftDown(0)
         return value
 
+    def addAll(self, values):
+        """ Adds all values, rebuilding the heap bottom-up if the batch is
+        at least as large as the heap. """
+        values = list(values)
+        assert self._count + len(values) <= self.capacity(), \
+                "Cannot add to a full heap"
+        start = self._count
+        for value in values:
+            self._elements[self._count] = value
+            self._count += 1
+        if self._count - start >= start:
+            self._heapify()
+        else:
+            for ndx in range(start, self._count):
+                self._siftUp(ndx)
+
+    def popMany(self, k):
+        """ Extracts and returns a list of the k largest values (fewer if
+        the heap is smaller), largest first. """
+        return [self.extract() for i in range(min(k, self._count))]
+
+    def pushPop(self, value):
+        """ Adds value, then extracts and returns the largest value. """
+        if self._count == 0 or value >= self._elements[0]:
+            return value
+        largest = self._elements[0]
+        self._elements[0] = value
+        self._siftDown(0)
+        return largest
+
+    def replace(self, value):
+        """ Extracts the largest value, then adds value; returns the
+        extracted value. """
+        assert self._count > 0, "Cannot extract from an empty heap."
+        largest = self._elements[0]
+        self._elements[0] = value
+        self._siftDown(0)
+        return largest
+
+    @classmethod
+    def merge(cls, *heaps):
+        """ Returns a new heap holding the values of all given heaps, with
+        their total capacity; the given heaps are left unchanged. """
+        capacity = sum(heap.capacity() for heap in heaps)
+        result = cls(max(capacity, 1))
+        result.addAll(heap._elements[i]
+                      for heap in heaps for i in range(heap._count))
+        return result
+
+    def _heapify(self):
+        """ Bottom-up construction of the heap in O(n) time. """
+        for ndx in range(self._count // 2 - 1, -1, -1):
+            self._siftDown(ndx)
+
     def _siftUp(self, ndx):
         if ndx > 0:
             parent = (ndx - 1) // 2
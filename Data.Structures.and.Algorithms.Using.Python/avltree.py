@@ -268,6 +268,64 @@ class AVLMap:
         else:
             return self._bstMinimum(subtree.left)
 
+    @classmethod
+    def fromSorted(cls, items):
+        """Create a new map in O(n) time from (key, value) pairs given in
+        strictly increasing key order."""
+        theMap = cls()
+        theMap._avlBuild(list(items))
+        return theMap
+
+    def bulkUpdate(self, items):
+        """Merge (key, value) pairs given in strictly increasing key order
+        into the map, replacing the values of existing keys, and rebuild the
+        tree in O(n + m) time."""
+        merged = []
+        old = self._avlItems(self._root, [])
+        i = 0
+        for (key, value) in items:
+            while i < len(old) and old[i][0] < key:
+                merged.append(old[i])
+                i += 1
+            if i < len(old) and old[i][0] == key:
+                i += 1
+            merged.append((key, value))
+        merged.extend(old[i:])
+        self._avlBuild(merged)
+
+    def _avlItems(self, subtree, result):
+        """Helper method appending the entries of subtree in key order."""
+        if subtree is not None:
+            self._avlItems(subtree.left, result)
+            result.append((subtree.key, subtree.value))
+            self._avlItems(subtree.right, result)
+        return result
+
+    def _avlBuild(self, items):
+        """Replace the contents of the tree with the sorted list items."""
+        for i in range(1, len(items)):
+            assert items[i - 1][0] < items[i][0], \
+                   "Keys must be in strictly increasing order."
+        (self._root, _) = self._avlBuildSubtree(items, 0, len(items))
+        self._size = len(items)
+
+    def _avlBuildSubtree(self, items, first, last):
+        """Recursive method building a balanced subtree from items[first:
+        last]. Returns a tuple containing the root of the subtree and its
+        height."""
+        if first >= last:
+            return (None, 0)
+        mid = (first + last) // 2
+        subtree = _AVLMapNode(items[mid][0], items[mid][1])
+        (subtree.left, leftHeight) = self._avlBuildSubtree(items, first, mid)
+        (subtree.right, rightHeight) = self._avlBuildSubtree(items, mid + 1,
+                last)
+        if leftHeight > rightHeight:
+            subtree.bfactor = LEFT_HIGH
+        elif leftHeight < rightHeight:
+            subtree.bfactor = RIGHT_HIGH
+        return (subtree, 1 + max(leftHeight, rightHeight))
+
     def breathFirstTrav(self):
         """Breath-first traversal of an AVL tree."""
         from llistqueue import Queue
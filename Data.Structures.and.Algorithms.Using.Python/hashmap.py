@@ -1,6 +1,7 @@
 """ Implementation of the Map ADT using closed hashing and a probe
 with double hashing """
 
+from timeit import default_timer
 from array_m import Array
 
 class _MapEntry:
@@ -52,6 +53,9 @@ class HashMap:
         self._table = Array(7)
         self._count = 0
         self._maxCount = len(self._table) - len(self._table) // 3
+        self._resizeCount = 0
+        self._timing = False
+        self._resizeTime = 0.0
 
     def __len__(self):
         """ Returns the number of entries in the map."""
@@ -140,6 +144,9 @@ class HashMap:
     def _rehash(self):
         """ Rebuild the hash table """
 
+        self._resizeCount += 1
+        if self._timing:
+            start = default_timer()
         # Create a new large table
         origTable = self._table
         newSize = len(self._table) * 2 + 1
@@ -155,6 +162,52 @@ class HashMap:
                 self._table[slot] = entry
                 self._count += 1
 
+        if self._timing:
+            self._resizeTime += default_timer() - start
+
+    def timeResizes(self, enabled=True):
+        """ Starts (or stops) timing the rehashes for the "resize_time"
+        statistic. """
+        self._timing = enabled
+
+    def stats(self):
+        """ Returns a dictionary describing the health of the hash table. The
+        table is scanned on demand, so the statistics cost nothing until this
+        method is called. The "histogram" entry maps each probe length (the
+        number of probe steps needed to reach an entry) to its entry count;
+        "tombstones" counts the slots holding the EMPTY marker. The
+        "resize_time" entry is None unless timeResizes() was called. """
+
+        histogram = {}
+        tombstones = 0
+        for slot in range(len(self._table)):
+            entry = self._table[slot]
+            if entry is HashMap.UNUSED:
+                continue
+            elif entry == HashMap.EMPTY:
+                tombstones += 1
+            else:
+                length = self._probeLength(entry.key, slot)
+                histogram[length] = histogram.get(length, 0) + 1
+        return {"size": self._count,
+                "capacity": len(self._table),
+                "load_factor": float(self._count) / len(self._table),
+                "histogram": histogram,
+                "tombstones": tombstones,
+                "resizes": self._resizeCount,
+                "resize_time": self._resizeTime if self._timing else None}
+
+    def _probeLength(self, key, target):
+        """ Returns the number of probe steps from the home slot of the key to
+        the slot target. """
+        slot = self._hash1(key)
+        step = self._hash2(key)
+        length = 0
+        while slot != target:
+            slot = (slot + step) % len(self._table)
+            length += 1
+        return length
+
     # slot = (h(key) + i*hp(key)) % M
     def _hash1(self, key):
         """ The main hash function for mapping keys to table entries. """
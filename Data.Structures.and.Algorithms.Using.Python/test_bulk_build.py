@@ -0,0 +1,83 @@
+"""Tests of fromSorted and bulkUpdate of the AVL and 2-3 tree maps."""
+
+import random
+import unittest
+from avltree import AVLMap, LEFT_HIGH, EQUAL_HIGH, RIGHT_HIGH
+from tree23map import Tree23Map
+
+def avlHeight(test, subtree):
+    """Check the balance factors of subtree and return its height."""
+    if subtree is None:
+        return 0
+    left = avlHeight(test, subtree.left)
+    right = avlHeight(test, subtree.right)
+    test.assertTrue(abs(left - right) <= 1)
+    expected = {1: LEFT_HIGH, 0: EQUAL_HIGH, -1: RIGHT_HIGH}[left - right]
+    test.assertEqual(subtree.bfactor, expected)
+    return 1 + max(left, right)
+
+def t23Depths(test, subtree, depth, depths):
+    """Check the shape of subtree, adding the depths of its leaves."""
+    if subtree.isLeaf():
+        depths.add(depth)
+        return
+    test.assertTrue(subtree.middle is not None)
+    test.assertEqual(subtree.right is not None, subtree.isFull())
+    for child in (subtree.left, subtree.middle, subtree.right):
+        if child is not None:
+            t23Depths(test, child, depth + 1, depths)
+
+class TestBulkBuild(unittest.TestCase):
+
+    def check(self, theMap, ref):
+        if isinstance(theMap, AVLMap):
+            avlHeight(self, theMap._root)
+        elif theMap._root is not None:
+            depths = set()
+            t23Depths(self, theMap._root, 0, depths)
+            self.assertEqual(len(depths), 1)
+        self.assertEqual(len(theMap), len(ref))
+        self.assertEqual(list(theMap), sorted(ref))
+        for key in ref:
+            self.assertEqual(theMap[key], ref[key])
+
+    def testFromSorted(self):
+        for cls in (AVLMap, Tree23Map):
+            for n in range(40) + [100, 1000]:
+                ref = dict((k, str(k)) for k in range(0, 2 * n, 2))
+                theMap = cls.fromSorted(sorted(ref.items()))
+                self.check(theMap, ref)
+                for k in random.sample(range(-1, 2 * n + 1), min(n, 20)):
+                    theMap[k] = ref[k] = k  # the tree stays usable
+                self.check(theMap, ref)
+            self.assertRaises(AssertionError, cls.fromSorted,
+                              [(2, "a"), (1, "b")])
+            self.assertRaises(AssertionError, cls.fromSorted,
+                              [(1, "a"), (1, "b")])
+
+    def testBulkUpdate(self):
+        for cls in (AVLMap, Tree23Map):
+            theMap = cls()
+            ref = {}
+            for j in range(30):
+                batch = sorted(random.sample(range(1000), random.randrange(
+                    1, 60)))
+                theMap.bulkUpdate([(k, j) for k in batch])
+                for k in batch:
+                    ref[k] = j
+                self.check(theMap, ref)
+                k = random.randrange(1000)
+                theMap[k] = ref[k] = -j
+                self.check(theMap, ref)
+
+    def testRemoveAfterBuild(self):
+        for cls in (AVLMap, Tree23Map):
+            ref = dict((k, k) for k in range(300))
+            theMap = cls.fromSorted(sorted(ref.items()))
+            for k in random.sample(range(300), 200):
+                theMap.remove(k)
+                del ref[k]
+            self.check(theMap, ref)
+
+if __name__ == "__main__":
+    unittest.main()
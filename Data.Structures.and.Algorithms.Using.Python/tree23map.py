@@ -436,6 +436,90 @@ class Tree23Map:
         node.value2 = None
         return (pKey, pValue, newNode)
 
+    @classmethod
+    def fromSorted(cls, items):
+        """Create a new map in O(n) time from (key, value) pairs given in
+        strictly increasing key order."""
+        theMap = cls()
+        theMap._t23Build(list(items))
+        return theMap
+
+    def bulkUpdate(self, items):
+        """Merge (key, value) pairs given in strictly increasing key order
+        into the map, replacing the values of existing keys, and rebuild the
+        tree in O(n + m) time."""
+        merged = []
+        old = self._t23Items(self._root, [])
+        i = 0
+        for (key, value) in items:
+            while i < len(old) and old[i][0] < key:
+                merged.append(old[i])
+                i += 1
+            if i < len(old) and old[i][0] == key:
+                i += 1
+            merged.append((key, value))
+        merged.extend(old[i:])
+        self._t23Build(merged)
+
+    def _t23Items(self, subtree, result):
+        """Helper method appending the entries of subtree in key order."""
+        if subtree is not None:
+            self._t23Items(subtree.left, result)
+            result.append((subtree.key1, subtree.value1))
+            self._t23Items(subtree.middle, result)
+            if subtree.isFull():
+                result.append((subtree.key2, subtree.value2))
+                self._t23Items(subtree.right, result)
+        return result
+
+    def _t23Build(self, items):
+        """Replace the contents of the tree with the sorted list items."""
+        for i in range(1, len(items)):
+            assert items[i - 1][0] < items[i][0], \
+                   "Keys must be in strictly increasing order."
+        # A tree of height h (leaves have height 0) holds between 2**(h+1)-1
+        # and 3**(h+1)-1 keys; choose the least height that fits.
+        height = 0
+        while len(items) > 3 ** (height + 1) - 1:
+            height += 1
+        if len(items) == 0:
+            self._root = None
+        else:
+            self._root = self._t23BuildSubtree(items, 0, len(items), height)
+        self._size = len(items)
+
+    def _t23BuildSubtree(self, items, first, last, height):
+        """Recursive method building a subtree of the given height from
+        items[first:last], whose count must fit that height."""
+        count = last - first
+        if height == 0:
+            node = _T23Node(items[first][0], items[first][1])
+            if count == 2:
+                node.key2 = items[first + 1][0]
+                node.value2 = items[first + 1][1]
+            return node
+        # Use two children if their keys fit, otherwise three; the children
+        # get (nearly) equal shares of the keys that are not promoted.
+        branches = 2 if count - 1 <= 2 * (3 ** height - 1) else 3
+        bounds = [first]
+        for b in range(1, branches):
+            bounds.append(first + b * (count - branches + 1) // branches
+                          + b - 1)
+        children = []
+        for b in range(branches):
+            end = bounds[b + 1] if b + 1 < branches else last
+            children.append(self._t23BuildSubtree(items, bounds[b] + (b > 0),
+                    end, height - 1))
+        sep = bounds[1]
+        node = _T23Node(items[sep][0], items[sep][1])
+        node.left = children[0]
+        node.middle = children[1]
+        if branches == 3:
+            node.key2 = items[bounds[2]][0]
+            node.value2 = items[bounds[2]][1]
+            node.right = children[2]
+        return node
+
     def remove(self, key):
         """Romove the entry associated with the given key from the Map."""
         self.__delitem__(key)
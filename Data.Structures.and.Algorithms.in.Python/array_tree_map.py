@@ -0,0 +1,443 @@
+from array import array
+from map import MapBase
+
+_NIL = 0        # index of the sentinel leaf
+_BLACK, _RED, _FREE = 0, 1, 2
+
+class ArrayRedBlackTreeMap(MapBase):
+    """Sorted map implementation using a red-black tree stored in arrays.
+
+    A node is an integer index into parallel arrays: keys and values are
+    Python lists, links are typed arrays and colors a bytearray, so an entry
+    costs a few dozen bytes and no objects besides its key and value. Index
+    0 is the black sentinel leaf of the CLRS algorithms, and slots of
+    deleted nodes are chained into a free list (through the left array) for
+    reuse.
+    """
+
+    # ----  nested Position class  ----
+    class Position:
+        """An abstraction representing the location of a single item.
+
+        A Position is invalidated when its item is deleted.
+        """
+
+        def __init__(self, container, j):
+            """Constructor should not be invoked by user."""
+            self._container = container
+            self._index = j
+
+        def key(self):
+            """Return key of map's key-value pair."""
+            return self._container._keys[self._index]
+
+        def value(self):
+            """Return value of map's key-value pair."""
+            return self._container._values[self._index]
+
+        def __eq__(self, other):
+            """Return True if other does represent the same location."""
+            return type(other) is type(self) \
+                   and other._container is self._container \
+                   and other._index == self._index
+
+        def __ne__(self, other):
+            """Return True if other does not represent the same location."""
+            return not (self == other)
+
+    # ----  non-public utilities  ----
+    def _validate(self, pos):
+        """Return node index of pos, or raise appropriate error if
+        invalid."""
+        if not isinstance(pos, self.Position):
+            raise TypeError("pos must be proper Position type")
+        if pos._container is not self:
+            raise ValueError("pos does not belong to this container")
+        if pos._index == _NIL or self._color[pos._index] == _FREE:
+            raise ValueError("pos is no longer valid")
+        return pos._index
+
+    def _make_position(self, j):
+        """Return Position instance for given node (or None if sentinel)."""
+        return self.Position(self, j) if j != _NIL else None
+
+    def _allocate(self, k, v):
+        """Return index of a new red node holding item (k, v)."""
+        if self._free != _NIL:
+            j = self._free
+            self._free = self._left[j]
+            self._keys[j] = k
+            self._values[j] = v
+            self._left[j] = self._right[j] = self._parent[j] = _NIL
+            self._color[j] = _RED
+        else:
+            j = len(self._keys)
+            self._keys.append(k)
+            self._values.append(v)
+            self._left.append(_NIL)
+            self._right.append(_NIL)
+            self._parent.append(_NIL)
+            self._color.append(_RED)
+        return j
+
+    def _release(self, j):
+        """Put slot j on the free list."""
+        self._keys[j] = self._values[j] = None  # let items be collected
+        self._color[j] = _FREE
+        self._left[j] = self._free
+        self._free = j
+
+    def _search(self, k):
+        """Return index of node with key k, or of last node searched (or
+        _NIL if empty)."""
+        keys, left, right = self._keys, self._left, self._right
+        j, last = self._root, _NIL
+        while j != _NIL:
+            last = j
+            if k < keys[j]:
+                j = left[j]
+            elif keys[j] < k:
+                j = right[j]
+            else:
+                return j
+        return last
+
+    def _minimum(self, j):
+        while self._left[j] != _NIL:
+            j = self._left[j]
+        return j
+
+    def _maximum(self, j):
+        while self._right[j] != _NIL:
+            j = self._right[j]
+        return j
+
+    def _successor(self, j):
+        """Return index of node following node j (or _NIL)."""
+        if self._right[j] != _NIL:
+            return self._minimum(self._right[j])
+        parent = self._parent
+        above = parent[j]
+        while above != _NIL and j == self._right[above]:
+            j, above = above, parent[above]
+        return above
+
+    def _predecessor(self, j):
+        """Return index of node preceding node j (or _NIL)."""
+        if self._left[j] != _NIL:
+            return self._maximum(self._left[j])
+        parent = self._parent
+        above = parent[j]
+        while above != _NIL and j == self._left[above]:
+            j, above = above, parent[above]
+        return above
+
+    def _ge(self, k, strict=False):
+        """Return index of node with least key >= k (> k if strict)."""
+        keys, j, found = self._keys, self._root, _NIL
+        while j != _NIL:
+            if keys[j] < k or (strict and keys[j] == k):
+                j = self._right[j]
+            else:
+                found, j = j, self._left[j]
+        return found
+
+    def _le(self, k, strict=False):
+        """Return index of node with greatest key <= k (< k if strict)."""
+        keys, j, found = self._keys, self._root, _NIL
+        while j != _NIL:
+            if k < keys[j] or (strict and keys[j] == k):
+                j = self._left[j]
+            else:
+                found, j = j, self._right[j]
+        return found
+
+    def _item(self, j):
+        return (self._keys[j], self._values[j]) if j != _NIL else None
+
+    def _rotate_left(self, x):
+        left, right, parent = self._left, self._right, self._parent
+        y = right[x]
+        right[x] = left[y]
+        if left[y] != _NIL:
+            parent[left[y]] = x
+        parent[y] = parent[x]
+        if parent[x] == _NIL:
+            self._root = y
+        elif x == left[parent[x]]:
+            left[parent[x]] = y
+        else:
+            right[parent[x]] = y
+        left[y] = x
+        parent[x] = y
+
+    def _rotate_right(self, x):
+        left, right, parent = self._left, self._right, self._parent
+        y = left[x]
+        left[x] = right[y]
+        if right[y] != _NIL:
+            parent[right[y]] = x
+        parent[y] = parent[x]
+        if parent[x] == _NIL:
+            self._root = y
+        elif x == right[parent[x]]:
+            right[parent[x]] = y
+        else:
+            left[parent[x]] = y
+        right[y] = x
+        parent[x] = y
+
+    def _insert_fixup(self, z):
+        left, right, parent, color = (self._left, self._right, self._parent,
+                                      self._color)
+        while color[parent[z]] == _RED:
+            p = parent[z]
+            g = parent[p]
+            if p == left[g]:
+                uncle = right[g]
+                if color[uncle] == _RED:    # recolor and continue above
+                    color[p] = color[uncle] = _BLACK
+                    color[g] = _RED
+                    z = g
+                else:
+                    if z == right[p]:
+                        z = p
+                        self._rotate_left(z)
+                        p = parent[z]
+                    color[p] = _BLACK
+                    color[g] = _RED
+                    self._rotate_right(g)
+            else:
+                uncle = left[g]
+                if color[uncle] == _RED:
+                    color[p] = color[uncle] = _BLACK
+                    color[g] = _RED
+                    z = g
+                else:
+                    if z == left[p]:
+                        z = p
+                        self._rotate_right(z)
+                        p = parent[z]
+                    color[p] = _BLACK
+                    color[g] = _RED
+                    self._rotate_left(g)
+        color[self._root] = _BLACK
+
+    def _transplant(self, u, v):
+        """Replace subtree rooted at u by subtree rooted at v."""
+        parent = self._parent
+        if parent[u] == _NIL:
+            self._root = v
+        elif u == self._left[parent[u]]:
+            self._left[parent[u]] = v
+        else:
+            self._right[parent[u]] = v
+        parent[v] = parent[u]   # may write to the sentinel, as in CLRS
+
+    def _delete_node(self, z):
+        left, right, parent, color = (self._left, self._right, self._parent,
+                                      self._color)
+        y = z
+        y_color = color[y]
+        if left[z] == _NIL:
+            x = right[z]
+            self._transplant(z, x)
+        elif right[z] == _NIL:
+            x = left[z]
+            self._transplant(z, x)
+        else:
+            y = self._minimum(right[z])
+            y_color = color[y]
+            x = right[y]
+            if parent[y] == z:
+                parent[x] = y
+            else:
+                self._transplant(y, x)
+                right[y] = right[z]
+                parent[right[y]] = y
+            self._transplant(z, y)
+            left[y] = left[z]
+            parent[left[y]] = y
+            color[y] = color[z]
+        if y_color == _BLACK:
+            self._delete_fixup(x)
+        self._release(z)
+        self._size -= 1
+
+    def _delete_fixup(self, x):
+        left, right, parent, color = (self._left, self._right, self._parent,
+                                      self._color)
+        while x != self._root and color[x] == _BLACK:
+            p = parent[x]
+            if x == left[p]:
+                w = right[p]
+                if color[w] == _RED:
+                    color[w] = _BLACK
+                    color[p] = _RED
+                    self._rotate_left(p)
+                    w = right[p]
+                if color[left[w]] == _BLACK and color[right[w]] == _BLACK:
+                    color[w] = _RED
+                    x = p
+                else:
+                    if color[right[w]] == _BLACK:
+                        color[left[w]] = _BLACK
+                        color[w] = _RED
+                        self._rotate_right(w)
+                        w = right[p]
+                    color[w] = color[p]
+                    color[p] = _BLACK
+                    color[right[w]] = _BLACK
+                    self._rotate_left(p)
+                    x = self._root
+            else:
+                w = left[p]
+                if color[w] == _RED:
+                    color[w] = _BLACK
+                    color[p] = _RED
+                    self._rotate_right(p)
+                    w = left[p]
+                if color[right[w]] == _BLACK and color[left[w]] == _BLACK:
+                    color[w] = _RED
+                    x = p
+                else:
+                    if color[left[w]] == _BLACK:
+                        color[right[w]] = _BLACK
+                        color[w] = _RED
+                        self._rotate_left(w)
+                        w = left[p]
+                    color[w] = color[p]
+                    color[p] = _BLACK
+                    color[left[w]] = _BLACK
+                    self._rotate_right(p)
+                    x = self._root
+        color[x] = _BLACK
+
+    # ----  public behaviors  ----
+    def __init__(self):
+        """Create an empty map."""
+        self._keys = [None]         # slot 0 is the sentinel
+        self._values = [None]
+        self._left = array("i", [_NIL])
+        self._right = array("i", [_NIL])
+        self._parent = array("i", [_NIL])
+        self._color = bytearray([_BLACK])
+        self._root = _NIL
+        self._free = _NIL
+        self._size = 0
+
+    def __len__(self):
+        """Return number of items in the map."""
+        return self._size
+
+    def first(self):
+        """Return the first Position in the map (or None if empty)."""
+        return self._make_position(self._minimum(self._root))
+
+    def last(self):
+        """Return the last Position in the map (or None if empty)."""
+        return self._make_position(self._maximum(self._root))
+
+    def before(self, pos):
+        """Return the Position just before pos in natural order.
+
+        Return None if pos is the first position.
+        """
+        return self._make_position(self._predecessor(self._validate(pos)))
+
+    def after(self, pos):
+        """Return the Position just after pos in natural order.
+
+        Return None if pos is the last position.
+        """
+        return self._make_position(self._successor(self._validate(pos)))
+
+    def find_position(self, k):
+        """Return position with key k, or else neighbor (or None if
+        empty)."""
+        return self._make_position(self._search(k))
+
+    def find_min(self):
+        """Return (k, v) pair with minimum key (or None if empty)."""
+        return self._item(self._minimum(self._root))
+
+    def find_max(self):
+        """Return (k, v) pair with maximum key (or None if empty)."""
+        return self._item(self._maximum(self._root))
+
+    def find_ge(self, k):
+        """Return (k, v) pair with least key >= k."""
+        return self._item(self._ge(k))
+
+    def find_gt(self, k):
+        """Return (k, v) pair with least key > k."""
+        return self._item(self._ge(k, True))
+
+    def find_lt(self, k):
+        """Return (k, v) pair with largest key < k."""
+        return self._item(self._le(k, True))
+
+    def find_le(self, k):
+        """Return (k, v) pair with largest key <= k."""
+        return self._item(self._le(k))
+
+    def find_range(self, start, stop):
+        """Iterate all (k, v) pairs such that start <= key < stop.
+
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        """
+        j = self._minimum(self._root) if start is None else self._ge(start)
+        while j != _NIL and (stop is None or self._keys[j] < stop):
+            yield (self._keys[j], self._values[j])
+            j = self._successor(j)
+
+    def __getitem__(self, k):
+        """Return value associated with key k (raise KeyError if not
+        found)."""
+        j = self._search(k)
+        if j == _NIL or self._keys[j] != k:
+            raise KeyError("Key Error: " + repr(k))
+        return self._values[j]
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting existing value if present."""
+        p = self._search(k)
+        if p != _NIL and self._keys[p] == k:
+            self._values[p] = v
+            return
+        z = self._allocate(k, v)
+        self._parent[z] = p
+        if p == _NIL:
+            self._root = z
+        elif k < self._keys[p]:
+            self._left[p] = z
+        else:
+            self._right[p] = z
+        self._size += 1
+        self._insert_fixup(z)
+
+    def __delitem__(self, k):
+        """Remove item associated with key k (raise KeyError if not found)."""
+        j = self._search(k)
+        if j == _NIL or self._keys[j] != k:
+            raise KeyError("Key Error: " + repr(k))
+        self._delete_node(j)
+
+    def delete(self, pos):
+        """Remove the item at given Position."""
+        self._delete_node(self._validate(pos))
+
+    def __iter__(self):
+        """Generate an iteration of all keys in the map in order."""
+        j = self._minimum(self._root)
+        while j != _NIL:
+            yield self._keys[j]
+            j = self._successor(j)
+
+    def __reversed__(self):
+        """Generate an iteration of all keys in the map in reverse order."""
+        j = self._maximum(self._root)
+        while j != _NIL:
+            yield self._keys[j]
+            j = self._predecessor(j)
@@ -0,0 +1,400 @@
+from bisect import bisect_left, bisect_right
+from map import MapBase
+
+class BTreeMap(MapBase):
+    """Sorted map implementation using a B+ tree.
+
+    All items live in leaves, which hold up to order keys (and values) in
+    parallel lists and are linked to their neighbors, so that iteration and
+    range searches walk contiguous lists. Internal nodes hold up to order
+    separator keys; every key in children[i] is less than keys[i], which is
+    at most every key in children[i+1].
+    """
+
+    # ----  nested node classes  ----
+    class _Leaf:
+        """Leaf node storing items in parallel key and value lists."""
+        __slots__ = "_keys", "_values", "_prev", "_next"
+
+        def __init__(self, keys=None, values=None):
+            self._keys = keys if keys is not None else []
+            self._values = values if values is not None else []
+            self._prev = None
+            self._next = None
+
+    class _Internal:
+        """Internal node storing separator keys and child nodes."""
+        __slots__ = "_keys", "_children"
+
+        def __init__(self, keys, children):
+            self._keys = keys
+            self._children = children
+
+    # ----  nested Position class  ----
+    class Position:
+        """An abstraction representing the location of a single item.
+
+        A Position is invalidated by any later change to the map's keys.
+        """
+
+        def __init__(self, container, leaf, index):
+            """Constructor should not be invoked by user."""
+            self._container = container
+            self._leaf = leaf
+            self._index = index
+
+        def key(self):
+            """Return key of map's key-value pair."""
+            return self._leaf._keys[self._index]
+
+        def value(self):
+            """Return value of map's key-value pair."""
+            return self._leaf._values[self._index]
+
+        def __eq__(self, other):
+            """Return True if other does represent the same location."""
+            return type(other) is type(self) and other._leaf is self._leaf \
+                   and other._index == self._index
+
+        def __ne__(self, other):
+            """Return True if other does not represent the same location."""
+            return not (self == other)
+
+    # ----  non-public utilities  ----
+    def _validate(self, pos):
+        """Return (leaf, index) of pos, or raise appropriate error if
+        invalid."""
+        if not isinstance(pos, self.Position):
+            raise TypeError("pos must be proper Position type")
+        if pos._container is not self:
+            raise ValueError("pos does not belong to this container")
+        if pos._index >= len(pos._leaf._keys):
+            raise ValueError("pos is no longer valid")
+        return pos._leaf, pos._index
+
+    def _make_position(self, leaf, index):
+        """Return Position instance for given location (or None if no
+        item)."""
+        return self.Position(self, leaf, index) if leaf is not None else None
+
+    def _find_leaf(self, k, path=None):
+        """Return leaf whose range includes key k.
+
+        If path is a list, (node, child index) pairs of the internal nodes
+        visited are appended to it.
+        """
+        node = self._root
+        while isinstance(node, self._Internal):
+            j = bisect_right(node._keys, k)
+            if path is not None:
+                path.append((node, j))
+            node = node._children[j]
+        return node
+
+    def _first_leaf(self):
+        node = self._root
+        while isinstance(node, self._Internal):
+            node = node._children[0]
+        return node
+
+    def _last_leaf(self):
+        node = self._root
+        while isinstance(node, self._Internal):
+            node = node._children[-1]
+        return node
+
+    def _locate_ge(self, k, strict=False):
+        """Return (leaf, index) of least key >= k (> k if strict), or (None,
+        None)."""
+        leaf = self._find_leaf(k)
+        j = (bisect_right if strict else bisect_left)(leaf._keys, k)
+        if j == len(leaf._keys):
+            leaf, j = leaf._next, 0
+        return (leaf, j) if leaf is not None else (None, None)
+
+    def _locate_lt(self, k, strict=True):
+        """Return (leaf, index) of greatest key < k (<= k if not strict), or
+        (None, None)."""
+        leaf = self._find_leaf(k)
+        j = (bisect_left if strict else bisect_right)(leaf._keys, k) - 1
+        if j < 0:
+            leaf = leaf._prev
+            if leaf is None:
+                return (None, None)
+            j = len(leaf._keys) - 1
+        return (leaf, j)
+
+    def _item(self, leaf, j):
+        """Return (k, v) pair at given location (or None if no item)."""
+        if leaf is None:
+            return None
+        return (leaf._keys[j], leaf._values[j])
+
+    def _split(self, node):
+        """Split overfull node in two; return (separator, new right node)."""
+        mid = len(node._keys) // 2
+        if isinstance(node, self._Leaf):
+            right = self._Leaf(node._keys[mid:], node._values[mid:])
+            del node._keys[mid:]
+            del node._values[mid:]
+            right._next = node._next
+            if right._next is not None:
+                right._next._prev = right
+            right._prev = node
+            node._next = right
+            return right._keys[0], right
+        separator = node._keys[mid]
+        right = self._Internal(node._keys[mid+1:], node._children[mid+1:])
+        del node._keys[mid:]
+        del node._children[mid+1:]
+        return separator, right
+
+    def _rebalance_insert(self, node, path):
+        """Split overfull node and its ancestors along path."""
+        while len(node._keys) > self._order:
+            separator, right = self._split(node)
+            if not path:
+                self._root = self._Internal([separator], [node, right])
+                return
+            parent, j = path.pop()
+            parent._keys.insert(j, separator)
+            parent._children.insert(j + 1, right)
+            node = parent
+
+    def _rebalance_delete(self, node, path):
+        """Repair underfull node and its ancestors along path."""
+        minimum = self._order // 2
+        while path and len(node._keys) < minimum:
+            parent, j = path.pop()
+            if j > 0 and len(parent._children[j-1]._keys) > minimum:
+                self._borrow_left(parent, j)
+            elif (j + 1 < len(parent._children)
+                    and len(parent._children[j+1]._keys) > minimum):
+                self._borrow_right(parent, j)
+            else:
+                self._merge(parent, j - 1 if j > 0 else j)
+            node = parent
+        if isinstance(self._root, self._Internal) \
+                and len(self._root._children) == 1:
+            self._root = self._root._children[0]    # tree shrinks
+
+    def _borrow_left(self, parent, j):
+        """Move last item of child j-1 of parent into child j."""
+        left, node = parent._children[j-1], parent._children[j]
+        if isinstance(node, self._Leaf):
+            node._keys.insert(0, left._keys.pop())
+            node._values.insert(0, left._values.pop())
+            parent._keys[j-1] = node._keys[0]
+        else:
+            node._keys.insert(0, parent._keys[j-1])
+            node._children.insert(0, left._children.pop())
+            parent._keys[j-1] = left._keys.pop()
+
+    def _borrow_right(self, parent, j):
+        """Move first item of child j+1 of parent into child j."""
+        node, right = parent._children[j], parent._children[j+1]
+        if isinstance(node, self._Leaf):
+            node._keys.append(right._keys.pop(0))
+            node._values.append(right._values.pop(0))
+            parent._keys[j] = right._keys[0]
+        else:
+            node._keys.append(parent._keys[j])
+            node._children.append(right._children.pop(0))
+            parent._keys[j] = right._keys.pop(0)
+
+    def _merge(self, parent, j):
+        """Merge child j+1 of parent into child j."""
+        left, right = parent._children[j], parent._children[j+1]
+        if isinstance(left, self._Leaf):
+            left._keys.extend(right._keys)
+            left._values.extend(right._values)
+            left._next = right._next
+            if left._next is not None:
+                left._next._prev = left
+        else:
+            left._keys.append(parent._keys[j])
+            left._keys.extend(right._keys)
+            left._children.extend(right._children)
+        del parent._keys[j]
+        del parent._children[j+1]
+
+    # ----  public behaviors  ----
+    def __init__(self, order=64):
+        """Create an empty map whose nodes hold at most order keys."""
+        if order < 3:
+            raise ValueError("order must be at least 3")
+        self._order = order
+        self._root = self._Leaf()
+        self._n = 0
+
+    def __len__(self):
+        """Return number of items in the map."""
+        return self._n
+
+    def height(self):
+        """Return number of levels of internal nodes above the leaves."""
+        h = 0
+        node = self._root
+        while isinstance(node, self._Internal):
+            node = node._children[0]
+            h += 1
+        return h
+
+    def first(self):
+        """Return the first Position in the map (or None if empty)."""
+        return self._make_position(self._first_leaf(), 0) if self._n else None
+
+    def last(self):
+        """Return the last Position in the map (or None if empty)."""
+        if self._n == 0:
+            return None
+        leaf = self._last_leaf()
+        return self._make_position(leaf, len(leaf._keys) - 1)
+
+    def before(self, pos):
+        """Return the Position just before pos in natural order.
+
+        Return None if pos is the first position.
+        """
+        leaf, j = self._validate(pos)
+        if j > 0:
+            return self._make_position(leaf, j - 1)
+        leaf = leaf._prev
+        return self._make_position(leaf, len(leaf._keys) - 1) \
+               if leaf is not None else None
+
+    def after(self, pos):
+        """Return the Position just after pos in natural order.
+
+        Return None if pos is the last position.
+        """
+        leaf, j = self._validate(pos)
+        if j + 1 < len(leaf._keys):
+            return self._make_position(leaf, j + 1)
+        return self._make_position(leaf._next, 0)
+
+    def find_position(self, k):
+        """Return position with key k, or else neighbor (or None if
+        empty)."""
+        if self._n == 0:
+            return None
+        leaf = self._find_leaf(k)
+        j = min(bisect_left(leaf._keys, k), len(leaf._keys) - 1)
+        return self._make_position(leaf, j)
+
+    def find_min(self):
+        """Return (k, v) pair with minimum key (or None if empty)."""
+        return self._item(self._first_leaf(), 0) if self._n else None
+
+    def find_max(self):
+        """Return (k, v) pair with maximum key (or None if empty)."""
+        if self._n == 0:
+            return None
+        leaf = self._last_leaf()
+        return self._item(leaf, len(leaf._keys) - 1)
+
+    def find_ge(self, k):
+        """Return (k, v) pair with least key >= k.
+
+        Return None if there doesn't exist such a key.
+        """
+        return self._item(*self._locate_ge(k))
+
+    def find_gt(self, k):
+        """Return (k, v) pair with least key > k.
+
+        Return None if there doesn't exist such a key.
+        """
+        return self._item(*self._locate_ge(k, True))
+
+    def find_lt(self, k):
+        """Return (k, v) pair with largest key < k.
+
+        Return None if there doesn't exist such a key.
+        """
+        return self._item(*self._locate_lt(k))
+
+    def find_le(self, k):
+        """Return (k, v) pair with largest key <= k.
+
+        Return None if there doesn't exist such a key.
+        """
+        return self._item(*self._locate_lt(k, False))
+
+    def find_range(self, start, stop):  # O(s+h), s is the number of items
+        """Iterate all (k, v) pairs such that start <= key < stop.
+
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        """
+        if self._n == 0:    # the root leaf is empty
+            return
+        if start is None:
+            leaf, j = self._first_leaf(), 0
+        else:
+            leaf, j = self._locate_ge(start)
+        while leaf is not None:
+            keys, values = leaf._keys, leaf._values
+            end = len(keys)
+            if stop is not None and not keys[-1] < stop:
+                end = bisect_left(keys, stop, j)
+            for i in range(j, end):
+                yield (keys[i], values[i])
+            if end < len(keys):
+                return
+            leaf, j = leaf._next, 0
+
+    def __getitem__(self, k):
+        """Return value associated with key k (raise KeyError if not
+        found)."""
+        leaf = self._find_leaf(k)
+        j = bisect_left(leaf._keys, k)
+        if j == len(leaf._keys) or leaf._keys[j] != k:
+            raise KeyError("Key Error: " + repr(k))
+        return leaf._values[j]
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting existing value if present."""
+        path = []
+        leaf = self._find_leaf(k, path)
+        j = bisect_left(leaf._keys, k)
+        if j < len(leaf._keys) and leaf._keys[j] == k:
+            leaf._values[j] = v     # reassign value
+            return
+        leaf._keys.insert(j, k)
+        leaf._values.insert(j, v)
+        self._n += 1
+        self._rebalance_insert(leaf, path)
+
+    def __delitem__(self, k):
+        """Remove item associated with key k (raise KeyError if not found)."""
+        path = []
+        leaf = self._find_leaf(k, path)
+        j = bisect_left(leaf._keys, k)
+        if j == len(leaf._keys) or leaf._keys[j] != k:
+            raise KeyError("Key Error: " + repr(k))
+        del leaf._keys[j]
+        del leaf._values[j]
+        self._n -= 1
+        self._rebalance_delete(leaf, path)
+
+    def delete(self, pos):
+        """Remove the item at given Position."""
+        leaf, j = self._validate(pos)
+        del self[leaf._keys[j]]
+
+    def __iter__(self):
+        """Generate an iteration of all keys in the map in order."""
+        leaf = self._first_leaf()
+        while leaf is not None:
+            for k in leaf._keys:
+                yield k
+            leaf = leaf._next
+
+    def __reversed__(self):
+        """Generate an iteration of all keys in the map in reverse order."""
+        leaf = self._last_leaf()
+        while leaf is not None:
+            for k in reversed(leaf._keys):
+                yield k
+            leaf = leaf._prev
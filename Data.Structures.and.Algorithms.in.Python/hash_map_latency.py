@@ -0,0 +1,67 @@
+"""Compare insert latencies of stop-the-world and incremental resizing for
+the hash maps in map.py.
+
+Usage: python3 hash_map_latency.py [number_of_inserts]
+"""
+import gc
+import sys
+from time import perf_counter
+from map import ChainHashMap, ProbeHashMap, RobinHoodHashMap
+
+def percentile(sorted_samples, pct):
+    """Return the pct-th percentile of an ascending list of samples."""
+    j = min(len(sorted_samples) - 1, int(len(sorted_samples) * pct / 100))
+    return sorted_samples[j]
+
+def insert_latencies(m, n):
+    """Insert n distinct keys into map m and return per-insert latencies in
+    microseconds, together with the indices of the inserts that resized
+    the table.
+
+    The garbage collector is disabled while sampling, as timeit does, so
+    that its pauses are not mistaken for resize stalls.
+    """
+    samples = []
+    resizes = []
+    capacity = len(m._table)
+    gc.disable()
+    try:
+        for k in range(n):
+            start = perf_counter()
+            m[k] = k
+            samples.append((perf_counter() - start) * 1e6)
+            if len(m._table) != capacity:
+                capacity = len(m._table)
+                resizes.append(k)
+    finally:
+        gc.enable()
+    return samples, resizes
+
+def report(name, samples, resizes, windows=4):
+    """Print latency percentiles overall and for consecutive windows of the
+    run, and the worst insert between consecutive resizes.
+
+    A stop-the-world resize is a single insert, so it shows up in the max
+    of its window and of its resize interval but not in the percentiles.
+    """
+    ordered = sorted(samples)
+    print("%-32s p50 %8.2f  p99 %8.2f  p99.9 %10.2f  max %12.2f (us)" % (
+        name, percentile(ordered, 50), percentile(ordered, 99),
+        percentile(ordered, 99.9), ordered[-1]))
+    size = len(samples) // windows
+    for w in range(windows):
+        window = sorted(samples[w * size:(w + 1) * size])
+        print("%32s p50 %8.2f  p99 %8.2f  p99.9 %10.2f  max %12.2f" % (
+            "window %d:" % w, percentile(window, 50), percentile(window, 99),
+            percentile(window, 99.9), window[-1]))
+    bounds = [0] + resizes + [len(samples)]
+    worst = ["%.0f" % max(samples[bounds[i]:bounds[i + 1]])
+             for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+    print("%32s %s" % ("worst insert per resize interval:", ", ".join(worst)))
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    for cls in (ChainHashMap, ProbeHashMap, RobinHoodHashMap):
+        for incremental in (False, True):
+            name = "%s(incremental=%s)" % (cls.__name__, incremental)
+            report(name, *insert_latencies(cls(incremental=incremental), n))
@@ -1,8 +1,11 @@
+import pickle
 from abstract_tree import BinaryTree
 
 class LinkedBinaryTree(BinaryTree):
     """Linked representation of a binary tree structure."""
 
+    _DUMP_CHUNK = 4096  # nodes per chunk written by dump
+
     class _Node:    # Lightweight, non-public class for storing a node
         __slots__ = "_element", "_parent", "_left", "_right"
 
@@ -177,6 +180,65 @@ class LinkedBinaryTree(BinaryTree):
             t2._root = None
             t2._size = 0
 
+    # ------------- serialization -----------------
+    def dump(self, fp):
+        """Write the tree to binary file fp.
+
+        Nodes are written in preorder, in chunks of _DUMP_CHUNK, as a byte
+        per node telling whether it has a left (2) and right (1) child plus
+        the list of their elements. No recursion is involved, so any shape
+        can be written.
+        """
+        pickle.dump(("LinkedBinaryTree", self._size), fp, 4)
+        shape, elements = bytearray(), []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            shape.append((node._left is not None) << 1
+                         | (node._right is not None))
+            elements.append(node._element)
+            if node._right is not None:
+                stack.append(node._right)
+            if node._left is not None:
+                stack.append(node._left)
+            if len(elements) == self._DUMP_CHUNK:
+                pickle.dump((bytes(shape), elements), fp, 4)
+                shape, elements = bytearray(), []
+        if elements:
+            pickle.dump((bytes(shape), elements), fp, 4)
+
+    @classmethod
+    def load(cls, fp):
+        """Return a tree read from binary file fp, as written by dump."""
+        kind, size = pickle.load(fp)
+        if kind != "LinkedBinaryTree":
+            raise ValueError("not a dumped LinkedBinaryTree")
+        tree = cls()
+        pending = []    # [node, flags of children still to be read]
+        count = 0
+        while count < size:
+            shape, elements = pickle.load(fp)
+            for flags, element in zip(shape, elements):
+                node = tree._Node(element)
+                if not pending:
+                    tree._root = node
+                else:
+                    entry = pending[-1]
+                    node._parent = entry[0]
+                    if entry[1] & 2:    # left child comes first in preorder
+                        entry[0]._left = node
+                        entry[1] &= 1
+                    else:
+                        entry[0]._right = node
+                        entry[1] = 0
+                    if entry[1] == 0:
+                        pending.pop()
+                if flags:
+                    pending.append([node, flags])
+            count += len(elements)
+        tree._size = size
+        return tree
+
 class MutableLinkedBinaryTree(LinkedBinaryTree):
     """Linked representation of a binary tree structure (with public update
     methods)."""
@@ -0,0 +1,422 @@
+import os
+import pickle
+import struct
+import threading
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from mmap import mmap, ACCESS_READ
+from zlib import crc32
+from map import MapBase, SortedTableMap
+
+_LENGTH = struct.Struct("<I")   # length prefix of every record
+_FOOTER = struct.Struct("<Q")   # offset of a run file's footer
+
+def _tagged(records, rank):
+    """Generate (k, rank, deleted, v) from (k, deleted, v) records."""
+    for (k, deleted, v) in records:
+        yield (k, rank, deleted, v)
+
+def _encode(k, deleted, v):
+    """Return the length-prefixed record for key k."""
+    data = pickle.dumps((k, deleted, v), 4)
+    return _LENGTH.pack(len(data)) + data
+
+class BloomFilter:
+    """Bit-array Bloom filter over byte strings."""
+
+    def __init__(self, capacity, bits_per_key=10, hashes=7, bits=None):
+        """Create a filter sized for capacity keys (or restore given bits)."""
+        if bits is None:
+            bits = bytearray((max(64, capacity * bits_per_key) + 7) // 8)
+        self._bits = bits
+        self._hashes = hashes
+
+    def _positions(self, data):
+        """Generate the bit positions of byte string data (double
+        hashing)."""
+        h1 = crc32(data)
+        h2 = crc32(data, h1) | 1
+        m = 8 * len(self._bits)
+        for i in range(self._hashes):
+            yield (h1 + i * h2) % m
+
+    def add(self, data):
+        for pos in self._positions(data):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def might_contain(self, data):
+        """Return False if data was certainly never added."""
+        for pos in self._positions(data):
+            if not self._bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+class SortedRun:
+    """Immutable sorted run file of an LSMTreeMap.
+
+    The file holds length-prefixed pickled (k, deleted, v) records in key
+    order, followed by a footer with a sparse index (the key and offset of
+    every _STRIDE-th record) and a Bloom filter of the keys, and finally the
+    offset of that footer. The file is memory-mapped, so only the footer is
+    read when a run is opened.
+    """
+    _STRIDE = 32    # records per block of the sparse index
+
+    @classmethod
+    def write(cls, path, records, capacity):
+        """Write iterable of sorted (k, deleted, v) records to path.
+
+        capacity is an upper bound on the number of records, used to size
+        the Bloom filter.
+        """
+        bloom = BloomFilter(capacity)
+        index_keys, index_offsets = [], []
+        count = 0
+        with open(path + ".tmp", "wb") as fp:
+            for (k, deleted, v) in records:
+                if count % cls._STRIDE == 0:
+                    index_keys.append(k)
+                    index_offsets.append(fp.tell())
+                bloom.add(pickle.dumps(k, 4))
+                fp.write(_encode(k, deleted, v))
+                count += 1
+            footer = fp.tell()
+            fp.write(pickle.dumps((index_keys, index_offsets,
+                                   bytes(bloom._bits), count), 4))
+            fp.write(_FOOTER.pack(footer))
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(path + ".tmp", path)
+        return cls(path)
+
+    def __init__(self, path):
+        """Open the run stored in file path."""
+        self.path = path
+        with open(path, "rb") as fp:
+            self._mm = mmap(fp.fileno(), 0, access=ACCESS_READ)
+        self._end = _FOOTER.unpack_from(self._mm, len(self._mm) - 8)[0]
+        (self._keys, self._offsets, bits, self.count) = \
+            pickle.loads(self._mm[self._end:len(self._mm) - 8])
+        self._bloom = BloomFilter(0, bits=bytearray(bits))
+
+    def _block(self, i):
+        """Return list of the records in block i of the sparse index."""
+        pos = self._offsets[i]
+        end = self._offsets[i+1] if i + 1 < len(self._offsets) else self._end
+        records = []
+        while pos < end:
+            size = _LENGTH.unpack_from(self._mm, pos)[0]
+            records.append(pickle.loads(self._mm[pos+4:pos+4+size]))
+            pos += 4 + size
+        return records
+
+    def get(self, k):
+        """Return the (k, deleted, v) record of key k, or None."""
+        if not self._bloom.might_contain(pickle.dumps(k, 4)):
+            return None
+        i = bisect_right(self._keys, k) - 1
+        if i >= 0:
+            for record in self._block(i):
+                if record[0] == k:
+                    return record
+        return None
+
+    def records(self, start=None):
+        """Generate records with key >= start in increasing order."""
+        i = 0 if start is None else max(0, bisect_right(self._keys, start) - 1)
+        for b in range(i, len(self._keys)):
+            for record in self._block(b):
+                if start is None or not record[0] < start:
+                    yield record
+
+    def records_before(self, stop=None, inclusive=False):
+        """Generate records with key < stop (or <= stop if inclusive) in
+        decreasing order."""
+        if stop is None:
+            i = len(self._keys) - 1
+        elif inclusive:
+            i = bisect_right(self._keys, stop) - 1
+        else:
+            i = bisect_left(self._keys, stop) - 1
+        for b in range(i, -1, -1):
+            for record in reversed(self._block(b)):
+                if stop is None or record[0] < stop \
+                        or (inclusive and record[0] == stop):
+                    yield record
+
+class LSMTreeMap(MapBase):
+    """Persistent sorted map implemented as a log-structured merge tree.
+
+    Writes go to an append-only log and to an in-memory SortedTableMap
+    memtable. When the memtable holds memtable_limit entries it is flushed
+    to an immutable SortedRun file, and once _MAX_RUNS runs exist they are
+    merged into one, in a background thread if background is True.
+    Deletions are recorded as tombstones until that merge drops them.
+    Point reads consult the memtable, then the runs newest first, skipping
+    runs whose Bloom filter rules the key out; range reads merge all
+    sources, newest version first.
+
+    Keys must be mutually comparable, and are matched in the Bloom filters
+    by their pickled form. Background compaction is the only concurrency
+    supported; the map must not be used by several threads at once.
+    """
+    _MAX_RUNS = 4   # runs that trigger a compaction
+    _MANIFEST = "MANIFEST"
+    _LOG = "wal.log"
+
+    # ---- non-public behaviors ----
+    def _path(self, name):
+        return os.path.join(self._dir, name)
+
+    def _save_manifest(self):
+        """Atomically record the current list of runs."""
+        tmp = self._path(self._MANIFEST + ".tmp")
+        with open(tmp, "wb") as fp:
+            pickle.dump(([os.path.basename(run.path) for run in self._runs],
+                         self._next_run), fp, 4)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, self._path(self._MANIFEST))
+
+    def _replay_log(self):
+        """Load the records of the write-ahead log into the memtable."""
+        try:
+            with open(self._path(self._LOG), "rb") as fp:
+                data = fp.read()
+        except FileNotFoundError:
+            return
+        pos = 0
+        while pos + 4 <= len(data):
+            size = _LENGTH.unpack_from(data, pos)[0]
+            if pos + 4 + size > len(data):
+                break   # torn final record
+            (k, deleted, v) = pickle.loads(data[pos+4:pos+4+size])
+            self._mem[k] = (deleted, v)
+            pos += 4 + size
+
+    def _write(self, k, deleted, v):
+        self._log.write(_encode(k, deleted, v))
+        self._log.flush()
+        if self._sync:
+            os.fsync(self._log.fileno())
+        self._mem[k] = (deleted, v)
+        if len(self._mem) >= self._limit:
+            self.flush()
+
+    def _sources(self, start):
+        """Return ascending record iterators from newest to oldest source."""
+        mem = ((k, d, v) for (k, (d, v)) in self._mem.find_range(start, None))
+        return [mem] + [run.records(start) for run in reversed(self._runs)]
+
+    def _merged(self, start=None, stop=None):
+        """Generate live (k, v) pairs with start <= k < stop in order."""
+        sources = [_tagged(source, rank)
+                   for (rank, source) in enumerate(self._sources(start))]
+        last = _NOTHING = object()
+        for (k, rank, deleted, v) in merge(*sources):
+            if stop is not None and not k < stop:
+                return
+            if last is _NOTHING or k != last: # newest version of key k
+                last = k
+                if not deleted:
+                    yield (k, v)
+
+    def _mem_before(self, stop, inclusive):
+        """Generate memtable records before stop in decreasing order."""
+        if stop is None:
+            item = self._mem.find_max()
+        else:
+            item = self._mem.find_le(stop) if inclusive \
+                   else self._mem.find_lt(stop)
+        while item is not None:
+            (k, (d, v)) = item
+            yield (k, d, v)
+            item = self._mem.find_lt(k)
+
+    def _merged_before(self, stop=None, inclusive=False):
+        """Generate live (k, v) pairs before stop in decreasing order."""
+        sources = [self._mem_before(stop, inclusive)] + \
+                  [run.records_before(stop, inclusive)
+                   for run in reversed(self._runs)]
+        sources = [_tagged(source, -rank)
+                   for (rank, source) in enumerate(sources)]
+        last = _NOTHING = object()
+        for (k, rank, deleted, v) in merge(*sources, reverse=True):
+            if last is _NOTHING or k != last:
+                last = k
+                if not deleted:
+                    yield (k, v)
+
+    def _compact(self, runs):
+        """Merge runs (the oldest runs of the map) into a single run."""
+        sources = [_tagged(run.records(), rank)
+                   for (rank, run) in enumerate(reversed(runs))]
+        def records():
+            last = _NOTHING = object()
+            for (k, rank, deleted, v) in merge(*sources):
+                if last is _NOTHING or k != last:
+                    last = k
+                    if not deleted: # nothing older can be shadowed
+                        yield (k, False, v)
+        with self._lock:
+            name = "run-%08d.sst" % self._next_run
+            self._next_run += 1
+        merged = SortedRun.write(self._path(name), records(),
+                                 sum(run.count for run in runs))
+        with self._lock:
+            self._runs = [merged] + self._runs[len(runs):]
+            self._save_manifest()
+        for run in runs:    # readers still holding a run keep its mapping
+            os.remove(run.path)
+
+    # ---- public behaviors ----
+    def __init__(self, directory, memtable_limit=4096, background=True,
+                 sync=False):
+        """Open (or create) the map stored in directory.
+
+        If sync is True, every write is forced to disk before returning.
+        """
+        self._dir = directory
+        self._limit = memtable_limit
+        self._background = background
+        self._sync = sync
+        self._lock = threading.Lock()   # guards self._runs and the manifest
+        self._compactor = None
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self._path(self._MANIFEST), "rb") as fp:
+                names, self._next_run = pickle.load(fp)
+        except FileNotFoundError:
+            names, self._next_run = [], 0
+        self._runs = [SortedRun(self._path(name)) for name in names]
+        self._mem = SortedTableMap()
+        self._replay_log()
+        self._log = open(self._path(self._LOG), "ab")
+
+    def flush(self):
+        """Write the memtable to a new sorted run and empty the log."""
+        if len(self._mem) == 0:
+            return
+        with self._lock:
+            name = "run-%08d.sst" % self._next_run
+            self._next_run += 1
+        records = ((k, d, v) for (k, (d, v)) in self._mem.find_range(None,
+                                                                     None))
+        run = SortedRun.write(self._path(name), records, len(self._mem))
+        with self._lock:
+            self._runs = self._runs + [run]
+            self._save_manifest()
+        self._log.close()
+        self._log = open(self._path(self._LOG), "wb")   # truncate
+        self._mem = SortedTableMap()
+        if len(self._runs) >= self._MAX_RUNS:
+            self.compact(wait=not self._background)
+
+    def compact(self, wait=True):
+        """Merge all current runs into one, dropping tombstones.
+
+        With wait=False the merge runs in a background thread, unless one
+        is already in progress.
+        """
+        if self._compactor is not None:
+            if not wait and self._compactor.is_alive():
+                return
+            self._compactor.join()
+            self._compactor = None
+        runs = list(self._runs)
+        if len(runs) < 2:
+            return
+        if wait:
+            self._compact(runs)
+        else:
+            self._compactor = threading.Thread(target=self._compact,
+                                               args=(runs,), daemon=True)
+            self._compactor.start()
+
+    def close(self):
+        """Wait for background compaction and close the log."""
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        self._log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getitem__(self, k):
+        """Return value associated with key k (raise KeyError if not
+        found)."""
+        try:
+            deleted, v = self._mem[k]
+        except KeyError:
+            for run in reversed(self._runs):
+                record = run.get(k)
+                if record is not None:
+                    (_, deleted, v) = record
+                    break
+            else:
+                raise KeyError("Key Error: " + repr(k))
+        if deleted:
+            raise KeyError("Key Error: " + repr(k))
+        return v
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting existing value if present."""
+        self._write(k, False, v)
+
+    def __delitem__(self, k):
+        """Remove item associated with key k (raise KeyError if not found)."""
+        self[k]     # may raise KeyError
+        self._write(k, True, None)
+
+    def __len__(self):
+        """Return number of items in the map (O(n): merges all sources)."""
+        return sum(1 for _ in self._merged())
+
+    def __iter__(self):
+        """Generate keys of the map ordered from minimum to maximum."""
+        for (k, v) in self._merged():
+            yield k
+
+    def __reversed__(self):
+        """Generate keys of the map ordered from maximum to minimum."""
+        for (k, v) in self._merged_before():
+            yield k
+
+    def find_min(self):
+        """Return (k, v) pair with minimum key (or None if empty)."""
+        return next(self._merged(), None)
+
+    def find_max(self):
+        """Return (k, v) pair with maximum key (or None if empty)."""
+        return next(self._merged_before(), None)
+
+    def find_ge(self, k):
+        """Return (k, v) pair with least key >= k."""
+        return next(self._merged(k), None)
+
+    def find_gt(self, k):
+        """Return (k, v) pair with least key > k."""
+        for item in self._merged(k):
+            if item[0] != k:
+                return item
+        return None
+
+    def find_lt(self, k):
+        """Return (k, v) pair with greatest key < k."""
+        return next(self._merged_before(k), None)
+
+    def find_le(self, k):
+        """Return (k, v) pair with greatest key <= k."""
+        return next(self._merged_before(k, True), None)
+
+    def find_range(self, start, stop):
+        """Iterate all (k, v) pairs such that start <= key < stop
+
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        """
+        return self._merged(start, stop)
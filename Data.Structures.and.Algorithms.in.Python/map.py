@@ -1,5 +1,17 @@
-from collections import MutableMapping
+from collections.abc import Mapping, MutableMapping
 from random import randrange
+from array import array
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from mmap import mmap, ACCESS_READ
+from zlib import crc32
+import pickle
+import struct
+try:
+    import numpy
+except ImportError: # batch lookups fall back to the bisect module
+    numpy = None
 
 class MapBase(MutableMapping):
     """Abstract Map base class that includes a nonpublic _Item class."""
@@ -21,6 +33,10 @@ class MapBase(MutableMapping):
         def __lt__(self, rhs):
             return self._key < rhs._key
 
+    def freeze(self):
+        """Return an immutable PerfectHashMap with the map's items."""
+        return PerfectHashMap(self.items())
+
 class UnsortedTableMap(MapBase):
     """Inefficient Map implementation using an unordered list."""
 
@@ -72,44 +88,196 @@ def hash_code(s):
 
 class HashMapBase(MapBase):
     """Abstract base class for map using hash-table with MAD (Multiply, Add
-    and Divide) compression."""
+    and Divide) compression.
+
+    With incremental=True a resize does not rehash every item at once: the
+    old table is kept alongside the new one and each later operation moves a
+    few of its buckets, while lookups consult both tables until the old one
+    has been drained. No single insert then pays for a whole rehash; the
+    rehash work is spread over the following operations instead, each
+    moving a few items and checking both tables, so the total cost is about
+    the same while the median insert is some 3x slower (see
+    hash_map_latency.py).
+    """
+    _MIGRATE_STEPS = 2  # old buckets moved per operation; enough to drain
+                        # the old table before the new one fills up
 
-    def __init__(self, cap=11, p=109345121):
+    def __init__(self, cap=11, p=109345121, incremental=False):
         self._table = cap * [None]
         self._n = 0 # number of entries in the map
         self._prime = p # prime for MAD compression
         self._scale = 1 + randrange(p-1) # scale from 1 to p-1 for MAD
         self._shift = randrange(p) # shift from 0 to p-1 for MAD
+        self._incremental = incremental
+        self._old = None    # table being drained by an incremental resize
+        self._next = 0      # next bucket of self._old to be migrated
+        self._resizes = 0   # number of resizes so far
+        self._timing = False    # whether resizes are timed for stats()
+        self._resize_time = 0.0 # seconds spent resizing (and migrating)
 
     def _hash_function(self, k):
         return (hash(k) * self._scale + self._shift)\
                 % self._prime % len(self._table)
 
+    def _home(self, k, cap):
+        """Return index of key k's home bucket in a table of capacity cap."""
+        return self._compress(hash(k), cap)
+
+    def _compress(self, h, cap):
+        """Return MAD compression of hash code h into range(cap)."""
+        return (h * self._scale + self._shift) % self._prime % cap
+
     def __len__(self):
         return self._n
 
     def __getitem__(self, k):
-        j = self._hash_function(k)
-        return self._bucket_getitem(j, k) # may raise KeyError
+        if self._old is None:
+            j = self._hash_function(k)
+            return self._bucket_getitem(j, k) # may raise KeyError
+        self._migrate(self._MIGRATE_STEPS)
+        try:
+            return self._bucket_getitem(self._hash_function(k), k)
+        except KeyError:
+            if self._old is None:
+                raise
+            return self._on_old(self._bucket_getitem, k) # may raise KeyError
 
     def __setitem__(self, k, v):
+        if self._old is not None:
+            self._migrate(self._MIGRATE_STEPS)
+        if self._old is not None and self._old_contains(k):
+            self._on_old(self._bucket_setitem, k, v) # overwrite in place
+            return
         j = self._hash_function(k)
         self._bucket_setitem(j, k, v)   # subroutine maintains self._n
         if self._n > len(self._table) // 2: # keep load factor <= 0.5
-            self._resize(2 * len(self._table) + 1)
+            self._finish_resize()
+            self._timed_resize(2 * len(self._table) + 1)
 
     def __delitem__(self, k):
-        j = self._hash_function(k)
-        self._bucket_delitem(j, k)  # may raise KeyError
+        if self._old is None:
+            j = self._hash_function(k)
+            self._bucket_delitem(j, k)  # may raise KeyError
+        else:
+            self._migrate(self._MIGRATE_STEPS)
+            if self._old is not None and self._old_contains(k):
+                self._on_old(self._bucket_delitem, k)
+            else:
+                self._bucket_delitem(self._hash_function(k), k)
         self._n -= 1
 
     def _resize(self, c): # Resize bucket array to capacity c
+        if self._incremental:   # items are moved later by _migrate
+            self._old = self._table
+            self._table = c * [None]
+            self._next = 0
+            return
         old = list(self.items())
         self._table = c * [None]
         self._n = 0
         for (k, v) in old:
             self[k] = v
 
+    def _timed_resize(self, c):
+        """Resize to capacity c, accounting for it in the statistics."""
+        self._resizes += 1
+        if not self._timing:
+            self._resize(c)
+            return
+        start = perf_counter()
+        self._resize(c)
+        self._resize_time += perf_counter() - start
+
+    # ---- support for incremental resizing ----
+    def _on_old(self, method, k, *args):
+        """Apply bucket method to key k within the table being drained."""
+        table, self._table = self._table, self._old
+        try:    # buckets before self._next are drained: start past them
+            return method(max(self._hash_function(k), self._next), k, *args)
+        finally:
+            self._table = table
+
+    def _old_contains(self, k):
+        """Return True if key k still lives in the table being drained."""
+        return self._on_old(self._bucket_contains, k)
+
+    def _bucket_contains(self, j, k):
+        """Return True if key k is in bucket j."""
+        try:
+            self._bucket_getitem(j, k)
+            return True
+        except KeyError:
+            return False
+
+    def _migrate(self, steps):
+        """Move the items of up to steps buckets of the old table into the
+        new one."""
+        if self._timing:
+            start = perf_counter()
+        while steps > 0 and self._old is not None:
+            items = self._take_old_slot(self._next)
+            while items:    # deletion may shift later items into the slot
+                for (k, v) in items:
+                    self._n -= 1    # re-counted by _bucket_setitem
+                    self._bucket_setitem(self._hash_function(k), k, v)
+                items = self._take_old_slot(self._next)
+            self._next += 1
+            if self._next == len(self._old):
+                self._old = None    # migration complete
+            steps -= 1
+        if self._timing:
+            self._resize_time += perf_counter() - start
+
+    def _finish_resize(self):
+        """Complete any pending incremental resize."""
+        if self._old is not None:
+            self._migrate(len(self._old))
+
+    # ---- health statistics ----
+    def time_resizes(self, enabled=True):
+        """Start (or stop) timing resizes for the resize_time statistic."""
+        self._timing = enabled
+
+    def stats(self):
+        """Return a dictionary describing the health of the hash table.
+
+        The table is scanned on demand, so keeping statistics costs nothing
+        until this method is called. Entries are:
+            size -- number of items in the map
+            capacity, load_factor -- buckets of the current table and the
+                fraction of them used by the items it holds
+            pending_buckets -- buckets of the old table still to be moved
+                by an incremental resize (0 if none is in progress)
+            histogram -- {length: count}; see _histogram of the subclass
+            tombstones -- number of slots marked as deleted
+            resizes -- number of resizes so far
+            resize_time -- seconds spent resizing while time_resizes() was
+                in effect (None if resizes are not being timed)
+        During an incremental resize the histogram and tombstones also cover
+        the part of the old table not yet moved.
+        """
+        histogram = {}
+        self._histogram(self._table, histogram)
+        tombstones = self._tombstones(self._table)
+        n, pending = self._n, 0
+        if self._old is not None:
+            self._histogram(self._old, histogram)
+            tombstones += self._tombstones(self._old[self._next:])
+            n -= self._table_items(self._old)
+            pending = len(self._old) - self._next
+        return {"size": self._n,
+                "capacity": len(self._table),
+                "load_factor": n / len(self._table),
+                "pending_buckets": pending,
+                "histogram": histogram,
+                "tombstones": tombstones,
+                "resizes": self._resizes,
+                "resize_time": self._resize_time if self._timing else None}
+
+    def _tombstones(self, table):
+        """Return number of slots of table marked as deleted."""
+        return 0
+
 class ChainHashMap(HashMapBase):
     """Hash map implemented with separate chaining for collision
     resolution."""
@@ -134,7 +302,32 @@ class ChainHashMap(HashMapBase):
             raise KeyError("Key Error: " + repr(k))
         del bucket[k]
 
+    def _bucket_contains(self, j, k):
+        bucket = self._table[j]
+        if bucket is None:
+            return False
+        return any(k == item._key for item in bucket._table)
+
+    def _take_old_slot(self, j):
+        """Remove and return the (k, v) pairs in bucket j of the old table."""
+        bucket = self._old[j]
+        if bucket is None:
+            return []
+        self._old[j] = None
+        return [(item._key, item._value) for item in bucket._table]
+
+    def _table_items(self, table):
+        """Return number of items stored in table."""
+        return sum(len(bucket) for bucket in table if bucket is not None)
+
+    def _histogram(self, table, hist):
+        """Count buckets of table by chain length (empty buckets included)."""
+        for bucket in table:
+            length = 0 if bucket is None else len(bucket)
+            hist[length] = hist.get(length, 0) + 1
+
     def __iter__(self):
+        self._finish_resize()
         for bucket in self._table:
             if bucket is not None:
                 for key in bucket:
@@ -188,11 +381,733 @@ class ProbeHashMap(HashMapBase):
             raise KeyError("Key Error: " + repr(k)) # No match found
         self._table[s] = ProbeHashMap._AVAIL # mark as vacated
 
+    def _bucket_contains(self, j, k):
+        return self._find_slot(j, k)[0]
+
+    def _take_old_slot(self, j):
+        """Remove and return the (k, v) pairs in slot j of the old table."""
+        item = self._old[j]
+        if item is None or item is ProbeHashMap._AVAIL:
+            return []
+        self._old[j] = ProbeHashMap._AVAIL  # later keys may probe past it
+        return [(item._key, item._value)]
+
+    def _histogram(self, table, hist):
+        """Count items of table by probe length, i.e. by the number of slots
+        a lookup passes before reaching them."""
+        for j in range(len(table)):
+            item = table[j]
+            if item is not None and item is not ProbeHashMap._AVAIL:
+                length = (j - self._home(item._key, len(table))) % len(table)
+                hist[length] = hist.get(length, 0) + 1
+
+    def _tombstones(self, table):
+        return sum(1 for item in table if item is ProbeHashMap._AVAIL)
+
+    def _table_items(self, table):
+        return sum(1 for item in table
+                   if item is not None and item is not ProbeHashMap._AVAIL)
+
     def __iter__(self):
+        self._finish_resize()
         for j in range(len(self._table)):
             if not self._is_available(j):
                 yield self._table[j]._key
 
+    def freeze(self, filename=None):
+        """Write the map to file filename in the FrozenProbeHashMap format.
+
+        Return a FrozenProbeHashMap opened on the new file. If no filename is
+        given, return an in-memory PerfectHashMap as MapBase.freeze does.
+        Raise TypeError if a key is of a type FrozenProbeHashMap does not
+        support.
+        """
+        if filename is None:
+            return super().freeze()
+        FrozenProbeHashMap.write(filename, self.items())
+        return FrozenProbeHashMap(filename)
+
+class RobinHoodHashMap(ProbeHashMap):
+    """Hash map implemented with Robin Hood linear probing.
+
+    Each item records its probe distance from its home slot. An insertion
+    displaces any item that is closer to home than the one being placed, and
+    a deletion shifts the following cluster back by one slot, so no _AVAIL
+    tombstones are ever left behind.
+    """
+
+    class _Item(MapBase._Item):
+        """Map item that also records its distance from its home slot."""
+        __slots__ = "_dist"
+
+        def __init__(self, k, v, d=0):
+            super().__init__(k, v)
+            self._dist = d
+
+    def __init__(self, cap=11, p=109345121, incremental=False):
+        super().__init__(cap, p, incremental)
+        self._longest = 0   # upper bound on the probe distance of any item
+
+    def _find_slot(self, j, k):
+        """Search for k in bucket at index j.
+
+        Return (success, index) tuple, described as follows:
+        If match was found, success is True and index denotes its location.
+        If no match found, success is False and index denotes the slot where
+        an item with key k belongs.
+        """
+        for d in range(self._longest + 1):
+            item = self._table[j]
+            if item is None or item._dist < d:  # k would have been placed here
+                return (False, j)
+            elif k == item._key:
+                return (True, j)
+            j = (j + 1) % len(self._table)
+        return (False, j)
+
+    def _bucket_setitem(self, j, k, v):
+        found, s = self._find_slot(j, k)
+        if found:
+            self._table[s]._value = v
+            return
+        item = self._Item(k, v, (s - j) % len(self._table))
+        while item is not None: # steal slots from items closer to home
+            occupant = self._table[s]
+            if occupant is None or occupant._dist < item._dist:
+                self._table[s] = item
+                self._longest = max(self._longest, item._dist)
+                item = occupant
+            if item is not None:
+                s = (s + 1) % len(self._table)
+                item._dist += 1
+        self._n += 1
+
+    def _bucket_delitem(self, j, k):
+        found, s = self._find_slot(j, k)
+        if not found:
+            raise KeyError("Key Error: " + repr(k)) # No match found
+        self._shift_back(self._table, s)
+
+    def _shift_back(self, table, s):
+        """Empty slot s of table by backward-shift deletion."""
+        nxt = (s + 1) % len(table)
+        while table[nxt] is not None and table[nxt]._dist > 0:
+            table[s] = table[nxt]
+            table[s]._dist -= 1
+            s = nxt
+            nxt = (nxt + 1) % len(table)
+        table[s] = None
+
+    def _take_old_slot(self, j):
+        item = self._old[j]
+        if item is None:
+            return []
+        self._shift_back(self._old, j)  # may shift another item into slot j
+        return [(item._key, item._value)]
+
+    def _resize(self, c):
+        if self._incremental:   # self._longest keeps bounding both tables
+            super()._resize(c)
+            return
+        old = [item for item in self._table if item is not None]
+        self._table = c * [None]
+        self._n = 0
+        self._longest = 0   # distances are recomputed for the new table
+        for item in old:
+            self[item._key] = item._value
+
+    def max_probe_length(self):
+        """Return an upper bound on the number of extra slots any lookup
+        probes.
+
+        The bound only grows between resizes, since deletions never make an
+        existing item travel further from its home slot.
+        """
+        return self._longest
+
+class CompactHashMap(HashMapBase):
+    """Hash map with a compact, insertion-ordered layout.
+
+    Hash codes, keys and values live in dense parallel arrays; the hash table
+    itself only holds small integer indices into them and is probed
+    linearly. Iteration follows insertion order. Each operation hashes its
+    key once, and a resize reuses the stored hash codes.
+
+    Resizing always rebuilds the index table at once; the incremental mode
+    of HashMapBase is not supported.
+    """
+    _FREE = -1      # index slot never used
+    _DUMMY = -2     # index slot whose entry was deleted
+    _DELETED = object() # placeholder key for a deleted entry
+
+    def __init__(self, cap=11, p=109345121, incremental=False):
+        if incremental:
+            raise ValueError("CompactHashMap does not resize incrementally")
+        super().__init__(cap, p)
+        self._table = array("q", [CompactHashMap._FREE]) * cap
+        self._hashes = array("q")   # hash(k) of each entry
+        self._keys = []
+        self._values = []
+
+    def _find_slot(self, k, h):
+        """Search for key k, whose hash code is h, in the index table.
+
+        Return (success, slot) tuple, described as follows:
+        If match was found, success is True and slot denotes its location.
+        If no match found, success is False and slot denotes first slot
+        available for an insertion.
+        """
+        j = self._compress(h, len(self._table))
+        firstAvail = None
+        while True:
+            e = self._table[j]
+            if e == CompactHashMap._FREE:
+                return (False, j if firstAvail is None else firstAvail)
+            elif e == CompactHashMap._DUMMY:
+                if firstAvail is None:
+                    firstAvail = j
+            elif self._hashes[e] == h and self._keys[e] == k:
+                return (True, j)
+            j = (j + 1) % len(self._table)
+
+    def __getitem__(self, k):
+        found, s = self._find_slot(k, hash(k))
+        if not found:
+            raise KeyError("Key Error: " + repr(k)) # No match found
+        return self._values[self._table[s]]
+
+    def __setitem__(self, k, v):
+        h = hash(k)
+        found, s = self._find_slot(k, h)
+        if found:
+            self._values[self._table[s]] = v
+            return
+        self._table[s] = len(self._keys)
+        self._hashes.append(h)
+        self._keys.append(k)
+        self._values.append(v)
+        self._n += 1
+        if len(self._keys) > len(self._table) // 2: # count deleted entries
+            if self._n > len(self._table) // 4:
+                self._timed_resize(2 * len(self._table) + 1)
+            else:   # mostly deleted entries: compact at the same capacity
+                self._timed_resize(len(self._table))
+
+    def __delitem__(self, k):
+        found, s = self._find_slot(k, hash(k))
+        if not found:
+            raise KeyError("Key Error: " + repr(k)) # No match found
+        e = self._table[s]
+        self._table[s] = CompactHashMap._DUMMY
+        self._keys[e] = CompactHashMap._DELETED # entries stay dense until
+        self._values[e] = None                  # the next resize
+        self._n -= 1
+
+    def _resize(self, c):
+        """Compact the entry arrays and rebuild an index table of capacity
+        c."""
+        live = [e for e in range(len(self._keys))
+                if self._keys[e] is not CompactHashMap._DELETED]
+        self._hashes = array("q", (self._hashes[e] for e in live))
+        self._keys = [self._keys[e] for e in live]
+        self._values = [self._values[e] for e in live]
+        self._table = array("q", [CompactHashMap._FREE]) * c
+        for e in range(len(self._hashes)):
+            j = self._compress(self._hashes[e], c)
+            while self._table[j] != CompactHashMap._FREE:
+                j = (j + 1) % c
+            self._table[j] = e
+
+    def __iter__(self):
+        for k in self._keys:
+            if k is not CompactHashMap._DELETED:
+                yield k
+
+    def _histogram(self, table, hist):
+        """Count live entries by probe length within the index table."""
+        for j in range(len(table)):
+            e = table[j]
+            if e >= 0:
+                length = (j - self._compress(self._hashes[e], len(table))) \
+                         % len(table)
+                hist[length] = hist.get(length, 0) + 1
+
+    def _tombstones(self, table):
+        return sum(1 for e in table if e == CompactHashMap._DUMMY)
+
+class CuckooHashMap(HashMapBase):
+    """Hash map implemented with bucketized cuckoo hashing.
+
+    Every key has two candidate buckets, chosen by two independent MAD
+    compressions, and each bucket holds up to _SLOTS items. An insertion
+    into two full buckets evicts an item to its alternate bucket, repeating
+    for at most _MAX_KICKS evictions; an item still without a place goes to
+    a small stash that lookups search after the two buckets. Once the stash
+    outgrows its limit, the table is rebuilt with fresh hash parameters and
+    the limit is set to twice the stash left over, so keys no hash function
+    can separate (many keys with equal hash codes) stay in the stash rather
+    than forcing rebuild after rebuild.
+
+    Resizing always rebuilds the table at once; the incremental mode of
+    HashMapBase is not supported.
+    """
+    _SLOTS = 4          # items per bucket
+    _MAX_KICKS = 64     # evictions tried before stashing an item
+    _STASH = 4          # stash size tolerated before the first rebuild
+
+    def __init__(self, cap=11, p=109345121, incremental=False):
+        if incremental:
+            raise ValueError("CuckooHashMap does not resize incrementally")
+        super().__init__(cap, p)
+        self._scale2 = 1 + randrange(p-1) # MAD parameters of second hash
+        self._shift2 = randrange(p)
+        self._stash = []    # items that found no place in their buckets
+        self._stash_limit = self._STASH
+
+    def _hash_function2(self, k):
+        return (hash(k) * self._scale2 + self._shift2)\
+                % self._prime % len(self._table)
+
+    def _find(self, j, k):
+        """Return (bucket, index) of key k whose first bucket is j, where
+        bucket is a list of the table or the stash, or None if k is not in
+        the map."""
+        for b in (j, self._hash_function2(k)):
+            bucket = self._table[b]
+            if bucket is not None:
+                for i in range(len(bucket)):
+                    if k == bucket[i]._key:
+                        return (bucket, i)
+        for i in range(len(self._stash)):
+            if k == self._stash[i]._key:
+                return (self._stash, i)
+        return None
+
+    def _bucket_getitem(self, j, k):
+        loc = self._find(j, k)
+        if loc is None:
+            raise KeyError("Key Error: " + repr(k)) # No match found
+        return loc[0][loc[1]]._value
+
+    def _bucket_setitem(self, j, k, v):
+        loc = self._find(j, k)
+        if loc is not None:
+            loc[0][loc[1]]._value = v
+            return
+        self._n += 1
+        item = self._Item(k, v)
+        b = j
+        for _ in range(self._MAX_KICKS):
+            for c in (b, self._hash_function2(item._key)):
+                if self._table[c] is None:
+                    self._table[c] = []
+                if len(self._table[c]) < self._SLOTS:
+                    self._table[c].append(item)
+                    return
+            # both buckets full: evict a victim to its alternate bucket
+            i = randrange(self._SLOTS)
+            item, self._table[b][i] = self._table[b][i], item
+            h1 = self._hash_function(item._key)
+            b = self._hash_function2(item._key) if b == h1 else h1
+        self._stash.append(item)
+        if len(self._stash) > self._stash_limit:
+            self._timed_resize(len(self._table))    # fresh hash functions
+
+    def _bucket_delitem(self, j, k):
+        loc = self._find(j, k)
+        if loc is None:
+            raise KeyError("Key Error: " + repr(k)) # No match found
+        loc[0].pop(loc[1])
+
+    def __setitem__(self, k, v):
+        j = self._hash_function(k)
+        self._bucket_setitem(j, k, v)   # subroutine maintains self._n
+        if self._n > len(self._table) * self._SLOTS // 2: # half the slots
+            self._timed_resize(2 * len(self._table) + 1)
+
+    def _resize(self, c):
+        old = [item for bucket in self._table if bucket is not None
+               for item in bucket] + self._stash
+        self._table = c * [None]
+        self._stash = []
+        self._stash_limit = len(old)    # no rebuild while rebuilding
+        self._n = 0
+        self._scale = 1 + randrange(self._prime - 1) # draw fresh hash
+        self._shift = randrange(self._prime)        # functions, in case
+        self._scale2 = 1 + randrange(self._prime - 1) # the old ones cycled
+        self._shift2 = randrange(self._prime)
+        for item in old:
+            self[item._key] = item._value
+        self._stash_limit = max(self._STASH, 2 * len(self._stash))
+
+    def _histogram(self, table, hist):
+        """Count items by probe length: 0 in their first bucket, 1 in their
+        second and 2 in the stash."""
+        for b in range(len(table)):
+            if table[b] is not None:
+                for item in table[b]:
+                    length = 0 if b == self._home(item._key, len(table)) \
+                             else 1
+                    hist[length] = hist.get(length, 0) + 1
+        if self._stash:
+            hist[2] = hist.get(2, 0) + len(self._stash)
+
+    def __iter__(self):
+        for bucket in self._table:
+            if bucket is not None:
+                for item in bucket:
+                    yield item._key
+        for item in self._stash:
+            yield item._key
+
+class FrozenProbeHashMap(Mapping):
+    """Read-only linear-probing hash map stored in a memory-mapped file.
+
+    The file is a fixed header, an open-addressed array of fixed-size slots
+    and a heap of pickled keys and values. Opening it parses nothing but the
+    header, so lookups page in only the slots and entries they touch, and
+    processes mapping the same file share its pages. Values are pickled.
+    Keys are hashed and compared by a canonical encoding, so they must be
+    None, numbers, str, bytes or tuples of those; equal keys such as 1, 1.0
+    and True encode alike, and iteration returns integral numbers as int.
+    """
+    _MAGIC = b"PROBEMAP"
+    _HEADER = struct.Struct("<8sQQQQQ") # magic, cap, n, prime, scale, shift
+    _SLOT = struct.Struct("<QIII")  # offset (0 if empty), crc, klen, vlen
+
+    @classmethod
+    def _encode_key(cls, k):
+        """Return canonical bytes for key k; equal keys give equal bytes.
+
+        Raise TypeError if k is of an unsupported type.
+        """
+        if k is None:
+            return b"n"
+        if isinstance(k, (int, float)):     # bool is a subclass of int
+            if isinstance(k, float) and not k.is_integer():
+                return b"f" + struct.pack("<d", k)
+            k = int(k)
+            return b"i" + k.to_bytes(k.bit_length() // 8 + 1, "little",
+                                     signed=True)
+        if isinstance(k, str):
+            return b"s" + k.encode("utf-8", "surrogatepass")
+        if isinstance(k, bytes):
+            return b"b" + k
+        if isinstance(k, tuple):
+            parts = [cls._encode_key(x) for x in k]
+            return b"t" + b"".join(struct.pack("<I", len(part)) + part
+                                   for part in parts)
+        raise TypeError("unsupported key type: " + type(k).__name__)
+
+    @classmethod
+    def _decode_key(cls, kb):
+        """Return the key encoded by bytes kb."""
+        tag, body = kb[:1], kb[1:]
+        if tag == b"n":
+            return None
+        if tag == b"f":
+            return struct.unpack("<d", body)[0]
+        if tag == b"i":
+            return int.from_bytes(body, "little", signed=True)
+        if tag == b"s":
+            return body.decode("utf-8", "surrogatepass")
+        if tag == b"b":
+            return body
+        items = []
+        j = 0
+        while j < len(body):
+            size = struct.unpack_from("<I", body, j)[0]
+            items.append(cls._decode_key(body[j+4:j+4+size]))
+            j += 4 + size
+        return tuple(items)
+
+    @classmethod
+    def write(cls, filename, items, p=109345121):
+        """Write (k, v) pairs of iterable items to file filename.
+
+        Raise TypeError, before creating the file, if a key is of an
+        unsupported type.
+        """
+        entries = [(cls._encode_key(k), pickle.dumps(v, 4))
+                   for (k, v) in items]
+        cap = 2 * len(entries) + 1  # keep load factor <= 0.5
+        scale = 1 + randrange(p-1)
+        shift = randrange(p)
+        slots = cap * [None]
+        offset = cls._HEADER.size + cap * cls._SLOT.size
+        for (kb, vb) in entries:
+            h = crc32(kb)
+            j = (h * scale + shift) % p % cap
+            while slots[j] is not None:
+                j = (j + 1) % cap
+            slots[j] = (offset, h, len(kb), len(vb))
+            offset += len(kb) + len(vb)
+        with open(filename, "wb") as fp:
+            fp.write(cls._HEADER.pack(cls._MAGIC, cap, len(entries), p,
+                                      scale, shift))
+            for slot in slots:
+                fp.write(cls._SLOT.pack(*slot) if slot is not None
+                         else cls._SLOT.pack(0, 0, 0, 0))
+            for (kb, vb) in entries:    # heap order matches slot offsets
+                fp.write(kb)
+                fp.write(vb)
+
+    def __init__(self, filename):
+        """Open the frozen map stored in file filename."""
+        with open(filename, "rb") as fp:
+            self._mm = mmap(fp.fileno(), 0, access=ACCESS_READ)
+        (magic, self._cap, self._n, self._prime, self._scale,
+         self._shift) = self._HEADER.unpack_from(self._mm, 0)
+        if magic != self._MAGIC:
+            self._mm.close()
+            raise ValueError("not a frozen probe hash map: " + filename)
+
+    def _slot(self, j):
+        """Return (offset, crc, klen, vlen) tuple of slot j."""
+        return self._SLOT.unpack_from(self._mm,
+                                      self._HEADER.size + j * self._SLOT.size)
+
+    def __getitem__(self, k):
+        try:
+            kb = self._encode_key(k)
+        except TypeError:   # no key of this type can have been stored
+            raise KeyError("Key Error: " + repr(k))
+        h = crc32(kb)
+        j = (h * self._scale + self._shift) % self._prime % self._cap
+        while True:
+            offset, crc, klen, vlen = self._slot(j)
+            if offset == 0:
+                raise KeyError("Key Error: " + repr(k)) # No match found
+            if crc == h and klen == len(kb) \
+                    and self._mm[offset:offset+klen] == kb:
+                return pickle.loads(self._mm[offset+klen:offset+klen+vlen])
+            j = (j + 1) % self._cap
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        for j in range(self._cap):
+            offset, _, klen, _ = self._slot(j)
+            if offset != 0:
+                yield self._decode_key(self._mm[offset:offset+klen])
+
+    def close(self):
+        """Unmap the underlying file."""
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class PerfectHashMap(Mapping):
+    """Immutable map backed by a minimal perfect hash function.
+
+    The function is built with the hash-and-displace (CHD) scheme: the hash
+    code of every key is scrambled into a bucket number, and the buckets are
+    placed largest first, each with the smallest displacement d for which
+    _mix(hash(k) + d * _GOLDEN) % n sends all of its keys to distinct free
+    slots. A bucket of one key takes a free slot directly, recorded as a
+    negative displacement. Keys and values fill dense arrays of exactly n
+    slots, and a lookup costs one hash and a single key comparison.
+
+    Distinct keys may share a hash code (hash(-1) == hash(-2)); only the
+    first of them is placed by the perfect hash, and the rest go to a small
+    overflow dict that a lookup consults after missing its slot.
+    """
+    _LAMBDA = 1     # average number of keys per bucket
+    _MASK = (1 << 64) - 1
+    _GOLDEN = 0x9e3779b97f4a7c15    # odd constant stepping the displacement
+
+    @staticmethod
+    def _mix(h):
+        """Return 64-bit hash h with its bits thoroughly scrambled."""
+        mask = PerfectHashMap._MASK
+        h ^= h >> 33
+        h = h * 0xff51afd7ed558ccd & mask
+        h ^= h >> 33
+        h = h * 0xc4ceb9fe1a85ec53 & mask
+        return h ^ (h >> 33)
+
+    def _position(self, h, d):
+        """Return slot of a key with hash code h under displacement d."""
+        return self._mix(h + d * self._GOLDEN & self._MASK) % len(self._keys)
+
+    def __init__(self, items=()):
+        """Create a map holding the (k, v) pairs of iterable items."""
+        placed = {}     # hash code -> first (h, k, v) with that code
+        self._overflow = {} # later keys whose hash codes were taken
+        for (k, v) in dict(items).items():  # the last value of a key wins
+            h = hash(k) & self._MASK
+            if h in placed:
+                self._overflow[k] = v
+            else:
+                placed[h] = (h, k, v)
+        n = len(placed)
+        self._disp = [0] * max(1, n // self._LAMBDA)
+        self._keys = n * [None]
+        self._values = n * [None]
+        buckets = [[] for _ in self._disp]
+        for (h, k, v) in placed.values():
+            buckets[self._mix(h) % len(buckets)].append((h, k, v))
+        taken = n * [False]
+        free = 0    # all slots below free are taken
+        for b in sorted(range(len(buckets)), key=lambda b: -len(buckets[b])):
+            bucket = buckets[b]
+            if len(bucket) > 1:
+                d = 1
+                while True:
+                    slots = [self._position(h, d) for (h, k, v) in bucket]
+                    if len(set(slots)) == len(slots) \
+                            and not any(taken[s] for s in slots):
+                        break
+                    d += 1
+                self._disp[b] = d
+            elif len(bucket) == 1:
+                while taken[free]:
+                    free += 1
+                slots = [free]
+                self._disp[b] = -free - 1
+            else:
+                break   # only empty buckets remain
+            for (s, (h, k, v)) in zip(slots, bucket):
+                taken[s] = True
+                self._keys[s] = k
+                self._values[s] = v
+
+    def __getitem__(self, k):
+        if self._keys:
+            h = hash(k) & self._MASK
+            d = self._disp[self._mix(h) % len(self._disp)]
+            s = -d - 1 if d < 0 else self._position(h, d)
+            if self._keys[s] == k:
+                return self._values[s]
+            if k in self._overflow:
+                return self._overflow[k]
+        raise KeyError("Key Error: " + repr(k))
+
+    def __len__(self):
+        return len(self._keys) + len(self._overflow)
+
+    def __iter__(self):
+        for k in self._keys:
+            yield k
+        for k in self._overflow:
+            yield k
+
+class ConcurrentHashMap(MapBase):
+    """Thread-safe map that stripes its keys across ChainHashMap shards.
+
+    Each shard is guarded by its own lock, so threads working on keys of
+    different shards do not contend. Single-key operations, setdefault,
+    compute_if_absent and pop are atomic; iteration is weakly consistent,
+    visiting a snapshot of one shard at a time.
+    """
+
+    def __init__(self, shards=16):
+        """Create an empty map with the given number of lock stripes."""
+        self._shards = [ChainHashMap() for _ in range(shards)]
+        self._locks = [Lock() for _ in range(shards)]
+
+    def _stripe(self, k):
+        """Return index of the shard responsible for key k."""
+        return hash(k) % len(self._shards)
+
+    def __getitem__(self, k):
+        j = self._stripe(k)
+        with self._locks[j]:
+            return self._shards[j][k]   # may raise KeyError
+
+    def __setitem__(self, k, v):
+        j = self._stripe(k)
+        with self._locks[j]:
+            self._shards[j][k] = v
+
+    def __delitem__(self, k):
+        j = self._stripe(k)
+        with self._locks[j]:
+            del self._shards[j][k]      # may raise KeyError
+
+    def __len__(self):
+        """Return number of items, holding every lock for a consistent
+        count."""
+        for lock in self._locks:        # always acquired in the same order
+            lock.acquire()
+        try:
+            return sum(len(shard) for shard in self._shards)
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def __iter__(self):
+        for j in range(len(self._shards)):
+            with self._locks[j]:
+                keys = list(self._shards[j])
+            for k in keys:
+                yield k
+
+    def setdefault(self, k, default=None):
+        """Return value of key k, first inserting default if k is absent."""
+        j = self._stripe(k)
+        with self._locks[j]:
+            shard = self._shards[j]
+            try:
+                return shard[k]
+            except KeyError:
+                shard[k] = default
+                return default
+
+    def compute_if_absent(self, k, factory):
+        """Return value of key k, first inserting factory(k) if k is absent.
+
+        factory is called at most once per missing key, while holding the
+        shard lock; it must not access this map.
+        """
+        j = self._stripe(k)
+        with self._locks[j]:
+            shard = self._shards[j]
+            try:
+                return shard[k]
+            except KeyError:
+                v = factory(k)
+                shard[k] = v
+                return v
+
+    def pop(self, k, *default):
+        """Remove key k and return its value (or default if given)."""
+        j = self._stripe(k)
+        with self._locks[j]:
+            shard = self._shards[j]
+            try:
+                v = shard[k]
+            except KeyError:
+                if default:
+                    return default[0]
+                raise
+            del shard[k]
+            return v
+
+    def update(self, other=(), **kwargs):
+        """Add all (k, v) pairs of other and kwargs, taking each shard lock
+        once."""
+        if isinstance(other, Mapping):
+            pairs = list(other.items())
+        elif hasattr(other, "keys"):
+            pairs = [(k, other[k]) for k in other.keys()]
+        else:
+            pairs = list(other)
+        pairs.extend(kwargs.items())
+        batches = [[] for _ in self._shards]
+        for (k, v) in pairs:
+            batches[self._stripe(k)].append((k, v))
+        for j in range(len(batches)):
+            if batches[j]:
+                with self._locks[j]:
+                    for (k, v) in batches[j]:
+                        self._shards[j][k] = v
+
 class SortedTableMap(MapBase):
     """Map implementation using a sorted table."""
 
@@ -324,3 +1239,300 @@ class SortedTableMap(MapBase):
                                         self._table[j]._key < stop):
             yield (self._table[j]._key, self._table[j]._value)
             j += 1
+
+class BlockedSortedTableMap(SortedTableMap):
+    """Sorted map implementation using a list of bounded-size sorted blocks.
+
+    Keys and values are kept in blocks of at most 2 * _LOAD entries, with a
+    parallel index of each block's maximum key. Locating a key costs two
+    binary searches, and an insertion or deletion only shifts entries within
+    one block, so updates take O(sqrt n) time rather than O(n).
+    """
+    _LOAD = 512     # preferred block size
+
+    # ---- non-public behaviors ----
+    def _locate(self, k):
+        """Return (b, i) denoting the leftmost entry with key >= k.
+
+        Return (len(self._keys), 0) if no such entry exists.
+        """
+        b = bisect_left(self._maxes, k)
+        if b == len(self._maxes):
+            return (b, 0)
+        return (b, bisect_left(self._keys[b], k))
+
+    def _next(self, b, i):
+        """Return location of the entry following (b, i)."""
+        if i + 1 < len(self._keys[b]):
+            return (b, i + 1)
+        return (b + 1, 0)
+
+    def _prev(self, b, i):
+        """Return location of the entry preceding (b, i), or None."""
+        if i > 0:
+            return (b, i - 1)
+        elif b > 0:
+            return (b - 1, len(self._keys[b-1]) - 1)
+        else:
+            return None
+
+    def _pair(self, b, i):
+        """Return (k, v) pair at location (b, i), or None past the end."""
+        if b < len(self._keys):
+            return (self._keys[b][i], self._values[b][i])
+        return None
+
+    def _split(self, b):
+        """Split block b in halves when it has outgrown the load."""
+        half = len(self._keys[b]) // 2
+        self._keys.insert(b + 1, self._keys[b][half:])
+        self._values.insert(b + 1, self._values[b][half:])
+        del self._keys[b][half:]
+        del self._values[b][half:]
+        self._maxes.insert(b, self._keys[b][-1])
+
+    def _merge(self, b):
+        """Merge undersized block b into a neighbour."""
+        if len(self._keys) == 1:
+            return
+        if b == len(self._keys) - 1:
+            b -= 1  # merge last block into its predecessor
+        self._keys[b].extend(self._keys[b+1])
+        self._values[b].extend(self._values[b+1])
+        del self._keys[b+1], self._values[b+1], self._maxes[b]
+        if len(self._keys[b]) > 2 * self._LOAD:
+            self._split(b)
+
+    # ---- public behaviors ----
+    def __init__(self):
+        """Create an empty map."""
+        self._keys = []     # list of sorted key blocks
+        self._values = []   # values parallel to self._keys
+        self._maxes = []    # maximum key of each block
+        self._n = 0
+
+    def __len__(self):
+        """Return number of items in the map."""
+        return self._n
+
+    def __getitem__(self, k):
+        """Return value associated with key k (raise KeyError if not
+        found)."""
+        b, i = self._locate(k)
+        if b == len(self._keys) or self._keys[b][i] != k:
+            raise KeyError("Key Error: " + repr(k))
+        return self._values[b][i]
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting existing value if present."""
+        if not self._keys:
+            self._keys.append([k])
+            self._values.append([v])
+            self._maxes.append(k)
+            self._n = 1
+            return
+        b = bisect_left(self._maxes, k)
+        if b == len(self._maxes):   # new maximum goes to the last block
+            b -= 1
+        keys = self._keys[b]
+        i = bisect_left(keys, k)
+        if i < len(keys) and keys[i] == k:
+            self._values[b][i] = v
+            return
+        keys.insert(i, k)
+        self._values[b].insert(i, v)
+        self._maxes[b] = keys[-1]
+        self._n += 1
+        if len(keys) > 2 * self._LOAD:
+            self._split(b)
+
+    def __delitem__(self, k):
+        """Remove item associated with key k (raise KeyError if not found)."""
+        b, i = self._locate(k)
+        if b == len(self._keys) or self._keys[b][i] != k:
+            raise KeyError("Key Error: " + repr(k))
+        del self._keys[b][i]
+        del self._values[b][i]
+        self._n -= 1
+        if not self._keys[b]:
+            del self._keys[b], self._values[b], self._maxes[b]
+        else:
+            self._maxes[b] = self._keys[b][-1]
+            if len(self._keys[b]) < self._LOAD // 2:
+                self._merge(b)
+
+    def __iter__(self):
+        """Generate keys of the map ordered from minimum to maximum."""
+        for keys in self._keys:
+            for k in keys:
+                yield k
+
+    def __reversed__(self):
+        """Generate keys of the map ordered from maximum to minimum."""
+        for keys in reversed(self._keys):
+            for k in reversed(keys):
+                yield k
+
+    def find_min(self):
+        """Return (k, v) pair with minimum key (or None if empty)."""
+        return self._pair(0, 0)
+
+    def find_max(self):
+        """Return (k, v) pair with maximum key (or None if empty)."""
+        if self._n > 0:
+            return (self._keys[-1][-1], self._values[-1][-1])
+        else:
+            return None
+
+    def find_ge(self, k):
+        """Return (k, v) pair with least key >= k."""
+        return self._pair(*self._locate(k))
+
+    def find_lt(self, k):
+        """Return (k, v) pair with greatest key < k."""
+        loc = self._prev(*self._locate(k))
+        return self._pair(*loc) if loc is not None else None
+
+    def find_gt(self, k):
+        """Return (k, v) pair with least key > k."""
+        b, i = self._locate(k)
+        if b < len(self._keys) and self._keys[b][i] == k:
+            b, i = self._next(b, i) # advance past match
+        return self._pair(b, i)
+
+    def find_le(self, k):
+        """Return (k, v) pair with greatest key <= k."""
+        b, i = self._locate(k)
+        if b < len(self._keys) and self._keys[b][i] == k:
+            return self._pair(b, i)
+        loc = self._prev(b, i)
+        return self._pair(*loc) if loc is not None else None
+
+    def find_range(self, start, stop):
+        """Iterate all (k, v) pairs such that start <= key < stop
+
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        """
+        if start is None:
+            b, i = 0, 0
+        else:
+            b, i = self._locate(start)
+        while b < len(self._keys):
+            keys, values = self._keys[b], self._values[b]
+            while i < len(keys):
+                if stop is not None and not keys[i] < stop:
+                    return
+                yield (keys[i], values[i])
+                i += 1
+            b, i = b + 1, 0
+
+class NumericSortedTableMap(SortedTableMap):
+    """SortedTableMap for numeric keys with vectorized batch lookups.
+
+    The keys are mirrored in a contiguous buffer (a NumPy array, or an
+    array.array when NumPy is not installed) that is rebuilt lazily by the
+    first batch query after an insertion or deletion. Each batch query then
+    resolves all of its probes with one searchsorted call.
+
+    Every key must be exactly representable in the buffer's typecode; with
+    the default "d", integer keys beyond 2**53 need typecode "q" instead.
+    """
+
+    def __init__(self, typecode="d"):
+        """Create an empty map whose keys fit the given array typecode."""
+        super().__init__()
+        self._typecode = typecode
+        self._buffer = None # key buffer (None when out of date)
+
+    def _check_key(self, k):
+        """Raise ValueError unless key k is exact in the buffer's typecode."""
+        try:
+            exact = array(self._typecode, [k])[0] == k
+        except (OverflowError, TypeError):
+            exact = False
+        if not exact:
+            raise ValueError("Key %r is not representable with typecode %r"
+                             % (k, self._typecode))
+
+    def __setitem__(self, k, v):
+        """Assign value v to key k, overwriting existing value if present."""
+        n = len(self._table)
+        j = self._find_index(k, 0, n - 1)
+        if j < n and self._table[j]._key == k:
+            self._table[j]._value = v
+        else:
+            self._check_key(k)  # before the table changes
+            self._table.insert(j, self._Item(k, v))
+            self._buffer = None
+
+    def __delitem__(self, k):
+        """Remove item associated with key k (raise KeyError if not found)."""
+        super().__delitem__(k)
+        self._buffer = None
+
+    def _key_buffer(self):
+        """Return buffer holding the keys of the table in order."""
+        if self._buffer is None:
+            keys = [item._key for item in self._table]
+            if numpy is not None:
+                self._buffer = numpy.array(keys, dtype=self._typecode)
+            else:
+                self._buffer = array(self._typecode, keys)
+        return self._buffer
+
+    def _search(self, keys):
+        """Return index of the leftmost item with key >= k for each k of
+        keys."""
+        buf = self._key_buffer()
+        if numpy is None:
+            return [bisect_left(buf, k) for k in keys]
+        found = numpy.searchsorted(buf, numpy.asarray(keys)).tolist()
+        table = self._table
+        for i, k in enumerate(keys):    # NumPy may have rounded k itself
+            j = found[i]
+            while j > 0 and not table[j - 1]._key < k:
+                j -= 1
+            while j < len(table) and table[j]._key < k:
+                j += 1
+            found[i] = j
+        return found
+
+    def get_many(self, keys, default=None):
+        """Return list of values associated with each of keys.
+
+        Keys that are not in the map yield default.
+        """
+        keys = list(keys)
+        n = len(self._table)
+        result = []
+        for k, j in zip(keys, self._search(keys)):
+            if j < n and self._table[j]._key == k:
+                result.append(self._table[j]._value)
+            else:
+                result.append(default)
+        return result
+
+    def find_ge_many(self, keys):
+        """Return list of (k, v) pairs with least key >= each of keys.
+
+        None takes the place of a pair if there is no such key.
+        """
+        n = len(self._table)
+        result = []
+        for j in self._search(list(keys)):
+            if j < n:
+                result.append((self._table[j]._key, self._table[j]._value))
+            else:
+                result.append(None)
+        return result
+
+    def count_range(self, start, stop):
+        """Return number of keys such that start <= key < stop.
+
+        If start is None, counting begins with minimum key of map.
+        If stop is None, counting continues through the maximum key of map.
+        """
+        low = 0 if start is None else self._search([start])[0]
+        high = len(self._table) if stop is None else self._search([stop])[0]
+        return int(max(0, high - low))
@@ -1,14 +1,15 @@
 from priority_queue import AdaptableHeapPriorityQueue
 from priority_queue import HeapPriorityQueue
 
-def MST_PrimJarnik(g):  # O((n+m)logn)
+def MST_PrimJarnik(g, pq_type=AdaptableHeapPriorityQueue):  # O((n+m)logn)
     """Compute a minimum spanning tree of simple connected weighted graph g.
 
     Return a list of edges that comprise the MST (in arbitrary order).
+    pq_type is the adaptable priority queue class to use.
     """
     dist = {}   # dist[v] is bound on distance to tree
     tree = []   # list of edges in spanning tree
-    pq = AdaptableHeapPriorityQueue()   # dist[v] maps to value (v, e=(u, v))
+    pq = pq_type()  # dist[v] maps to value (v, e=(u, v))
     pq_locator = {} # map from vertex to its pq locator
 
     # for each vertex v of the graph, add an entry to the priority queue,
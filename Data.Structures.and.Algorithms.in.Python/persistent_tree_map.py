@@ -0,0 +1,305 @@
+from map import MapBase
+
+class PersistentRedBlackTreeMap(MapBase):
+    """Sorted map implementation using a persistent red-black tree.
+
+    Nodes are never modified once built: an update copies the O(log n)
+    nodes on the path from the root and shares every other subtree with the
+    previous version (Okasaki's insertion and Kahrs' deletion). Hence
+    snapshot() is O(1), and a snapshot can be read by other threads while
+    this map keeps changing.
+    """
+
+    # ----  nested _Node class  ----
+    class _Node:
+        """Immutable node; the tree has no parent links, so that subtrees
+        can be shared."""
+        __slots__ = "_red", "_left", "_key", "_value", "_right"
+
+        def __init__(self, red, left, key, value, right):
+            self._red = red
+            self._left = left
+            self._key = key
+            self._value = value
+            self._right = right
+
+    # ----  non-public utilities  ----
+    def _red_node(self, node):
+        return node is not None and node._red
+
+    def _make(self, red, left, node, right):
+        """Return new node with the item of node and given color and
+        children."""
+        return self._Node(red, left, node._key, node._value, right)
+
+    def _balance(self, left, node, right):
+        """Return black subtree with the item of node between left and
+        right, repairing a red child with a red child."""
+        red = self._red_node
+        if red(left) and red(right):
+            return self._make(True, self._make(False, left._left, left,
+                                               left._right), node,
+                              self._make(False, right._left, right,
+                                         right._right))
+        if red(left):
+            if red(left._left):
+                a = left._left
+                return self._make(True, self._make(False, a._left, a,
+                                                   a._right), left,
+                                  self._make(False, left._right, node, right))
+            if red(left._right):
+                b = left._right
+                return self._make(True, self._make(False, left._left, left,
+                                                   b._left), b,
+                                  self._make(False, b._right, node, right))
+        if red(right):
+            if red(right._right):
+                c = right._right
+                return self._make(True, self._make(False, left, node,
+                                                   right._left), right,
+                                  self._make(False, c._left, c, c._right))
+            if red(right._left):
+                b = right._left
+                return self._make(True, self._make(False, left, node,
+                                                   b._left), b,
+                                  self._make(False, b._right, right,
+                                             right._right))
+        return self._make(False, left, node, right)
+
+    def _insert(self, node, k, v):
+        """Return new subtree with key k set to value v (root may be red)."""
+        if node is None:
+            self._size += 1
+            return self._Node(True, None, k, v, None)
+        if k < node._key:
+            left, right = self._insert(node._left, k, v), node._right
+        elif node._key < k:
+            left, right = node._left, self._insert(node._right, k, v)
+        else:
+            return self._Node(node._red, node._left, k, v, node._right)
+        if node._red:
+            return self._make(True, left, node, right)
+        return self._balance(left, node, right)
+
+    def _redden(self, node):
+        """Return copy of black node colored red."""
+        return self._make(True, node._left, node, node._right)
+
+    def _balance_left(self, left, node, right):
+        """Rebuild after left subtree lost one black level."""
+        if self._red_node(left):
+            return self._make(True, self._make(False, left._left, left,
+                                               left._right), node, right)
+        if not self._red_node(right):
+            return self._balance(left, node, self._redden(right))
+        b = right._left    # right is red, so b is black
+        return self._make(True, self._make(False, left, node, b._left), b,
+                          self._balance(b._right, right,
+                                        self._redden(right._right)))
+
+    def _balance_right(self, left, node, right):
+        """Rebuild after right subtree lost one black level."""
+        if self._red_node(right):
+            return self._make(True, left, node,
+                              self._make(False, right._left, right,
+                                         right._right))
+        if not self._red_node(left):
+            return self._balance(self._redden(left), node, right)
+        b = left._right    # left is red, so b is black
+        return self._make(True, self._balance(self._redden(left._left), left,
+                                              b._left), b,
+                          self._make(False, b._right, node, right))
+
+    def _append(self, left, right):
+        """Return subtree concatenating sibling subtrees left and right."""
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left._red and right._red:
+            middle = self._append(left._right, right._left)
+            if self._red_node(middle):
+                return self._make(True,
+                                  self._make(True, left._left, left,
+                                             middle._left), middle,
+                                  self._make(True, middle._right, right,
+                                             right._right))
+            return self._make(True, left._left, left,
+                              self._make(True, middle, right, right._right))
+        if not left._red and not right._red:
+            middle = self._append(left._right, right._left)
+            if self._red_node(middle):
+                return self._make(True,
+                                  self._make(False, left._left, left,
+                                             middle._left), middle,
+                                  self._make(False, middle._right, right,
+                                             right._right))
+            return self._balance_left(left._left, left,
+                                      self._make(False, middle, right,
+                                                 right._right))
+        if right._red:
+            return self._make(True, self._append(left, right._left), right,
+                              right._right)
+        return self._make(True, left._left, left,
+                          self._append(left._right, right))
+
+    def _delete(self, node, k):
+        """Return new subtree without key k (which must be present)."""
+        if k < node._key:
+            if self._red_node(node._left) or node._left is None:
+                return self._make(True, self._delete(node._left, k), node,
+                                  node._right)
+            return self._balance_left(self._delete(node._left, k), node,
+                                      node._right)
+        if node._key < k:
+            if self._red_node(node._right) or node._right is None:
+                return self._make(True, node._left, node,
+                                  self._delete(node._right, k))
+            return self._balance_right(node._left, node,
+                                       self._delete(node._right, k))
+        return self._append(node._left, node._right)
+
+    def _blacken(self, node):
+        if node is not None and node._red:
+            node = self._make(False, node._left, node, node._right)
+        return node
+
+    def _search(self, k):
+        """Return node with key k (or None)."""
+        walk = self._root
+        while walk is not None:
+            if k < walk._key:
+                walk = walk._left
+            elif walk._key < k:
+                walk = walk._right
+            else:
+                return walk
+        return None
+
+    def _nodes(self, start=None):
+        """Generate nodes with key >= start (all if None) in order."""
+        stack = []
+        walk = self._root
+        while walk is not None:     # path to start, skipping smaller keys
+            if start is not None and walk._key < start:
+                walk = walk._right
+            else:
+                stack.append(walk)
+                walk = walk._left
+        while stack:
+            node = stack.pop()
+            yield node
+            walk = node._right
+            while walk is not None:
+                stack.append(walk)
+                walk = walk._left
+
+    def _nodes_reversed(self, stop=None, inclusive=False):
+        """Generate nodes with key < stop (<= if inclusive; all if None) in
+        reverse order."""
+        stack = []
+        walk = self._root
+        while walk is not None:
+            if stop is not None and (stop < walk._key or
+                                     (walk._key == stop and not inclusive)):
+                walk = walk._left
+            else:
+                stack.append(walk)
+                walk = walk._right
+        while stack:
+            node = stack.pop()
+            yield node
+            walk = node._left
+            while walk is not None:
+                stack.append(walk)
+                walk = walk._right
+
+    def _pair(self, node):
+        return (node._key, node._value) if node is not None else None
+
+    # ----  public behaviors  ----
+    def __init__(self):
+        """Create an empty map."""
+        self._root = None
+        self._size = 0
+
+    def snapshot(self):     # O(1)
+        """Return an independent map holding the current items.
+
+        Later changes to either map are not visible in the other.
+        """
+        other = type(self)()
+        other._root, other._size = self._root, self._size
+        return other
+
+    def __len__(self):
+        """Return number of items in the map."""
+        return self._size
+
+    def __getitem__(self, k):   # O(log n)
+        """Return value associated with key k (raise KeyError if not
+        found)."""
+        node = self._search(k)
+        if node is None:
+            raise KeyError("Key Error: " + repr(k))
+        return node._value
+
+    def __setitem__(self, k, v):    # O(log n)
+        """Assign value v to key k, overwriting existing value if present."""
+        self._root = self._blacken(self._insert(self._root, k, v))
+
+    def __delitem__(self, k):   # O(log n)
+        """Remove item associated with key k (raise KeyError if not found)."""
+        if self._search(k) is None:
+            raise KeyError("Key Error: " + repr(k))
+        self._root = self._blacken(self._delete(self._root, k))
+        self._size -= 1
+
+    def __iter__(self):
+        """Generate an iteration of all keys in the map in order."""
+        for node in self._nodes():
+            yield node._key
+
+    def __reversed__(self):
+        """Generate an iteration of all keys in the map in reverse order."""
+        for node in self._nodes_reversed():
+            yield node._key
+
+    def find_min(self):
+        """Return (k, v) pair with minimum key (or None if empty)."""
+        return self._pair(next(self._nodes(), None))
+
+    def find_max(self):
+        """Return (k, v) pair with maximum key (or None if empty)."""
+        return self._pair(next(self._nodes_reversed(), None))
+
+    def find_ge(self, k):
+        """Return (k, v) pair with least key >= k."""
+        return self._pair(next(self._nodes(k), None))
+
+    def find_gt(self, k):
+        """Return (k, v) pair with least key > k."""
+        for node in self._nodes(k):
+            if k < node._key:
+                return self._pair(node)
+        return None
+
+    def find_lt(self, k):
+        """Return (k, v) pair with greatest key < k."""
+        return self._pair(next(self._nodes_reversed(k), None))
+
+    def find_le(self, k):
+        """Return (k, v) pair with greatest key <= k."""
+        return self._pair(next(self._nodes_reversed(k, True), None))
+
+    def find_range(self, start, stop):
+        """Iterate all (k, v) pairs such that start <= key < stop.
+
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        The iteration reads the version of the map current when it begins.
+        """
+        for node in self._nodes(start):
+            if stop is not None and not node._key < stop:
+                break
+            yield (node._key, node._value)
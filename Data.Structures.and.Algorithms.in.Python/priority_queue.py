@@ -143,9 +143,8 @@ class HeapPriorityQueue(PriorityQueueBase):
         By default, queue will be empty. If contents is given, it should be an
         iterable sequence of (k, v) tuples specifying the initial contents.
         """
-        self._data = [self._Item(k, v) for (k, v) in contents]
-        if len(self._data) > 1:
-            self._heapify()
+        self._data = []
+        self.add_all(contents)
 
     def _heapify(self):
         """Bottom-up construction of a heap with time complexity of O(n)."""
@@ -153,6 +152,33 @@ class HeapPriorityQueue(PriorityQueueBase):
         for j in range(start, -1, -1):
             self._downheap(j)
 
+    def _new_item(self, key, value, j):
+        """Return a new item for the key-value pair, to be put at index j."""
+        return self._Item(key, value)
+
+    def _append_all(self, iterable):
+        """Append items for (k, v) pairs of iterable, restore heap order, and
+        return the list of new items."""
+        start = len(self._data)
+        items = [self._new_item(k, v, j)
+                 for j, (k, v) in enumerate(iterable, start)]
+        self._data.extend(items)
+        self._restore_heap(start)
+        return items
+
+    def _restore_heap(self, start):
+        """Restore heap order after items were appended at indices >= start.
+
+        Upheaping each new item costs O(log n) at worst; when the batch is at
+        least as large as the existing heap, rebuild it in O(n) instead.
+        """
+        n = len(self._data)
+        if n - start >= start:
+            self._heapify()
+        else:
+            for j in range(start, n):
+                self._upheap(j)
+
     def __len__(self):
         """Return the number of items in the priority queue."""
         return len(self._data)
@@ -184,6 +210,56 @@ class HeapPriorityQueue(PriorityQueueBase):
         self._downheap(0)
         return (item._key, item._value)
 
+    def add_all(self, iterable):
+        """Add all (k, v) pairs of iterable to the priority queue."""
+        self._append_all(iterable)
+
+    def pop_many(self, k):
+        """Remove and return a list of the (k, v) tuples with the k smallest
+        keys (fewer if the queue is smaller), in increasing key order."""
+        if k >= len(self._data):    # taking everything: sort once
+            items = sorted(self._data)
+            self._data = []
+            return [(item._key, item._value) for item in items]
+        return [self.remove_min() for _ in range(k)]
+
+    def _replace_root(self, key, value):
+        """Replace the root by a new item for the key-value pair; return
+        (old root, new item)."""
+        item = self._data[0]
+        token = self._new_item(key, value, 0)
+        self._data[0] = token
+        self._downheap(0)
+        return (item, token)
+
+    def pushpop(self, key, value):
+        """Add a key-value pair, then remove and return (k, v) tuple with
+        minimum key; faster than add followed by remove_min."""
+        if self.is_empty() or not self._data[0]._key < key:
+            return (key, value)     # new pair would be removed at once
+        item, _ = self._replace_root(key, value)
+        return (item._key, item._value)
+
+    def replace(self, key, value):
+        """Remove and return (k, v) tuple with minimum key, then add the
+        key-value pair; the result may have a larger key than the new pair.
+
+        Raise Empty exception if empty.
+        """
+        if self.is_empty():
+            raise Empty("Priority queue is empty.")
+        item, _ = self._replace_root(key, value)
+        return (item._key, item._value)
+
+    @classmethod
+    def merge(cls, *queues):    # O(n)
+        """Return a new priority queue holding the (k, v) pairs of all given
+        heap priority queues, which are left unchanged."""
+        result = cls()
+        result.add_all((item._key, item._value)
+                       for queue in queues for item in queue._data)
+        return result
+
 class AdaptableHeapPriorityQueue(HeapPriorityQueue):
     """A locator-based priority queue implemented with a binary heap. Effort
     to make better support for Locator is under way.
@@ -219,6 +295,66 @@ class AdaptableHeapPriorityQueue(HeapPriorityQueue):
         self._upheap(len(self._data) - 1)
         return token
 
+    def _new_item(self, key, value, j):
+        return self.Locator(key, value, j)
+
+    def add_all(self, iterable):
+        """Add all (k, v) pairs of iterable; return the list of their
+        Locators."""
+        return self._append_all(iterable)
+
+    def pop_many(self, k):
+        """Remove and return a list of the (k, v) tuples with the k smallest
+        keys (fewer if the queue is smaller), in increasing key order.
+
+        The Locators of the removed entries become invalid.
+        """
+        if k >= len(self._data):    # sorted at once, without swaps
+            for loc in self._data:
+                loc._index = -1     # invalidate locator
+        return super().pop_many(k)
+
+    def pushpop(self, key, value):
+        """Add a key-value pair, then remove the (k, v) tuple with minimum
+        key.
+
+        Return a pair ((k, v), loc) of the removed tuple and the Locator of
+        the new entry, which is None if the new pair itself was removed.
+        """
+        if self.is_empty() or not self._data[0]._key < key:
+            return ((key, value), None)
+        item, token = self._replace_root(key, value)
+        return ((item._key, item._value), token)
+
+    def replace(self, key, value):
+        """Remove the (k, v) tuple with minimum key, then add the key-value
+        pair.
+
+        Return a pair ((k, v), loc) of the removed tuple and the Locator of
+        the new entry. Raise Empty exception if empty.
+        """
+        if self.is_empty():
+            raise Empty("Priority queue is empty.")
+        item, token = self._replace_root(key, value)
+        return ((item._key, item._value), token)
+
+    @classmethod
+    def merge(cls, *queues):    # O(n)
+        """Return a new priority queue holding the entries of all given
+        adaptable heap priority queues, which become empty.
+
+        Entries are moved rather than copied, so their Locators remain
+        valid and now refer to the new queue.
+        """
+        result = cls()
+        for queue in queues:
+            result._data.extend(queue._data)
+            queue._data = []
+        for j in range(len(result._data)):
+            result._data[j]._index = j
+        result._restore_heap(0)
+        return result
+
     def update(self, loc, newkey, newval):
         """Update the key and value for the entry identified by Locator
         loc."""
@@ -241,3 +377,403 @@ class AdaptableHeapPriorityQueue(HeapPriorityQueue):
             self._data.pop()
             self._bubble(j)
         return (loc._key, loc._value)
+
+class DaryHeapPriorityQueue(PriorityQueueBase):
+    """A min-oriented priority queue implemented with a d-ary heap.
+
+    Keys and values are kept in parallel lists rather than _Item objects,
+    and entries are moved into a hole instead of being swapped. The
+    children of index j are d*j + 1 through d*j + d.
+    """
+
+    # ----------  nonpublic behaviors  --------------
+    def _upheap(self, j):
+        """Move the entry at index j up to its place; return its index."""
+        keys, values, d = self._keys, self._values, self._d
+        key, value = keys[j], values[j]
+        while j > 0:
+            parent = (j - 1) // d
+            if not key < keys[parent]:
+                break
+            keys[j] = keys[parent]  # move parent down into the hole
+            values[j] = values[parent]
+            j = parent
+        keys[j] = key
+        values[j] = value
+        return j
+
+    def _downheap(self, j):
+        """Move the entry at index j down to its place; return its index."""
+        keys, values, d, n = self._keys, self._values, self._d, len(self._keys)
+        key, value = keys[j], values[j]
+        while True:
+            first = d*j + 1
+            if first >= n:
+                break
+            small = first
+            for c in range(first + 1, min(first + d, n)):
+                if keys[c] < keys[small]:
+                    small = c
+            if not keys[small] < key:
+                break
+            keys[j] = keys[small]   # move smallest child up into the hole
+            values[j] = values[small]
+            j = small
+        keys[j] = key
+        values[j] = value
+        return j
+
+    def _heapify(self):
+        """Bottom-up construction of a heap with time complexity of O(n)."""
+        for j in range((len(self._keys) - 2) // self._d, -1, -1):
+            self._downheap(j)
+
+    # -----------------  public behaviors  ---------------------
+    def __init__(self, contents=(), d=4):
+        """Create a new priority queue whose heap nodes have d children.
+
+        If contents is given, it should be an iterable sequence of (k, v)
+        tuples specifying the initial contents.
+        """
+        if d < 2:
+            raise ValueError("d must be at least 2")
+        self._d = d
+        self._keys = []
+        self._values = []
+        for (k, v) in contents:
+            self._keys.append(k)
+            self._values.append(v)
+        if len(self._keys) > 1:
+            self._heapify()
+
+    def __len__(self):
+        """Return the number of items in the priority queue."""
+        return len(self._keys)
+
+    def add(self, key, value):  # O(log_d n)
+        """Add a key-value pair to the priority queue."""
+        self._keys.append(key)
+        self._values.append(value)
+        self._upheap(len(self._keys) - 1)
+
+    def min(self):
+        """Return but don't remove (k, v) tuple with minimum key.
+
+        Raise Empty exception if empty.
+        """
+        if self.is_empty():
+            raise Empty("Priority queue is empty.")
+        return (self._keys[0], self._values[0])
+
+    def remove_min(self):   # O(d log_d n)
+        """Remove and return (k, v) tuple with minimum key.
+
+        Raise Empty exception if empty.
+        """
+        if self.is_empty():
+            raise Empty("Priority queue is empty.")
+        item = (self._keys[0], self._values[0])
+        key, value = self._keys.pop(), self._values.pop()
+        if self._keys:
+            self._keys[0] = key
+            self._values[0] = value
+            self._downheap(0)
+        return item
+
+class AdaptableDaryHeapPriorityQueue(DaryHeapPriorityQueue):
+    """A locator-based priority queue implemented with a d-ary heap."""
+
+    # ----  nested Locator class  -----
+    class Locator:
+        """Token for locating an entry of the priority queue."""
+        __slots__ = "_index"
+
+        def __init__(self, j):
+            self._index = j
+
+    # ----  nonpublic behaviors  -------
+    # the sift loops are repeated here so that the non-adaptable queue pays
+    # nothing for moving locators
+    def _move(self, i, j):
+        """Move the entry at index j to index i."""
+        self._keys[i] = self._keys[j]
+        self._values[i] = self._values[j]
+        self._locators[i] = self._locators[j]
+        self._locators[i]._index = i
+
+    def _upheap(self, j):
+        keys, values, locators = self._keys, self._values, self._locators
+        d = self._d
+        key, value, loc = keys[j], values[j], locators[j]
+        while j > 0:
+            parent = (j - 1) // d
+            if not key < keys[parent]:
+                break
+            keys[j] = keys[parent]
+            values[j] = values[parent]
+            locators[j] = locators[parent]
+            locators[j]._index = j
+            j = parent
+        keys[j] = key
+        values[j] = value
+        locators[j] = loc
+        loc._index = j
+        return j
+
+    def _downheap(self, j):
+        keys, values, locators = self._keys, self._values, self._locators
+        d, n = self._d, len(keys)
+        key, value, loc = keys[j], values[j], locators[j]
+        while True:
+            first = d*j + 1
+            if first >= n:
+                break
+            small = first
+            for c in range(first + 1, min(first + d, n)):
+                if keys[c] < keys[small]:
+                    small = c
+            if not keys[small] < key:
+                break
+            keys[j] = keys[small]
+            values[j] = values[small]
+            locators[j] = locators[small]
+            locators[j]._index = j
+            j = small
+        keys[j] = key
+        values[j] = value
+        locators[j] = loc
+        loc._index = j
+        return j
+
+    def _bubble(self, j):
+        """bubbling of element at index j."""
+        if j > 0 and self._keys[j] < self._keys[(j - 1) // self._d]:
+            self._upheap(j)
+        else:
+            self._downheap(j)
+
+    def _validate(self, loc):
+        j = loc._index
+        if not (0 <= j < len(self._keys) and self._locators[j] is loc):
+            raise ValueError("Invalid locator.")
+        return j
+
+    # -----------------  public behaviors  ---------------------
+    def __init__(self, contents=(), d=4):
+        """Create a new priority queue whose heap nodes have d children."""
+        contents = list(contents)
+        self._locators = [self.Locator(j) for j in range(len(contents))]
+        super().__init__(contents, d)
+
+    def add(self, key, value):
+        """Add a key-value pair and return its Locator."""
+        token = self.Locator(len(self._keys))
+        self._locators.append(token)
+        super().add(key, value)
+        return token
+
+    def remove_min(self):
+        """Remove and return (k, v) tuple with minimum key.
+
+        Raise Empty exception if empty.
+        """
+        if self.is_empty():
+            raise Empty("Priority queue is empty.")
+        return self.remove(self._locators[0])
+
+    def update(self, loc, newkey, newval):
+        """Update the key and value for the entry identified by Locator
+        loc."""
+        j = self._validate(loc)
+        self._keys[j] = newkey
+        self._values[j] = newval
+        self._bubble(j)
+
+    def remove(self, loc):
+        """Remove and return the (k, v) pair identified by Locator loc."""
+        j = self._validate(loc)
+        item = (self._keys[j], self._values[j])
+        last = len(self._keys) - 1
+        if j != last:
+            self._move(j, last)
+        self._keys.pop()
+        self._values.pop()
+        self._locators.pop()
+        if j != last:
+            self._bubble(j)
+        loc._index = -1     # invalidate locator
+        return item
+
+class PairingHeapPriorityQueue(PriorityQueueBase):
+    """A locator-based priority queue implemented with a pairing heap.
+
+    add, min, meld and key decreases through update take O(1) time;
+    remove_min, remove and key increases take O(log n) amortized time.
+    """
+
+    # ----  nested Locator class  -----
+    class Locator(PriorityQueueBase._Item):
+        """Token for locating an entry of the priority queue; it is also the
+        heap node holding the entry."""
+        __slots__ = "_child", "_sibling", "_prev", "_owner"
+
+        def __init__(self, k, v, owner):
+            super().__init__(k, v)
+            self._child = None      # leftmost child
+            self._sibling = None    # next sibling to the right
+            self._prev = None       # left sibling, or parent if leftmost
+            self._owner = owner     # _Owner record of the holding queue
+
+    # ----  nested _Owner class  -----
+    class _Owner:
+        """Record shared by the locators added to one queue; meld forwards
+        the record of the emptied queue to that of the receiving one."""
+        __slots__ = "_queue", "_next"
+
+        def __init__(self, queue):
+            self._queue = queue     # the queue, while not forwarded
+            self._next = None       # record forwarded to, if any
+
+    # ----  nonpublic behaviors  -------
+    def _link(self, a, b):
+        """Link root nodes a and b (either may be None); return new root."""
+        if a is None:
+            return b
+        if b is None:
+            return a
+        if b < a:
+            a, b = b, a
+        b._sibling = a._child   # b becomes leftmost child of a
+        if a._child is not None:
+            a._child._prev = b
+        b._prev = a
+        a._child = b
+        return a
+
+    def _merge_pairs(self, first):
+        """Combine sibling list starting at first into one root (two-pass
+        pairing); return it."""
+        pairs = []
+        while first is not None:    # first pass: link pairs left to right
+            a = first
+            b = a._sibling
+            first = b._sibling if b is not None else None
+            a._sibling = a._prev = None
+            if b is not None:
+                b._sibling = b._prev = None
+            pairs.append(self._link(a, b))
+        root = None
+        for tree in reversed(pairs):    # second pass: right to left
+            root = self._link(tree, root)
+        return root
+
+    def _cut(self, node):
+        """Detach non-root node (with its subtree) from the heap."""
+        if node._prev._child is node:
+            node._prev._child = node._sibling
+        else:
+            node._prev._sibling = node._sibling
+        if node._sibling is not None:
+            node._sibling._prev = node._prev
+        node._sibling = node._prev = None
+
+    def _validate(self, loc):
+        if not isinstance(loc, self.Locator) or loc._prev is loc:
+            raise ValueError("Invalid locator.")
+        owner = loc._owner
+        while owner._next is not None:      # follow melds, halving the path
+            if owner._next._next is not None:
+                owner._next = owner._next._next
+            owner = owner._next
+        loc._owner = owner
+        if owner._queue is not self:
+            raise ValueError("Locator belongs to another queue.")
+
+    def _detach(self, loc):
+        """Remove node loc from the heap, keeping the rest of its subtree."""
+        if loc is self._root:
+            self._root = self._merge_pairs(loc._child)
+        else:
+            self._cut(loc)
+            self._root = self._link(self._root, self._merge_pairs(loc._child))
+        loc._child = None
+
+    # -----------------  public behaviors  ---------------------
+    def __init__(self, contents=()):
+        """Create a new priority queue, holding (k, v) tuples of contents."""
+        self._root = None
+        self._size = 0
+        self._owner = self._Owner(self)
+        for (k, v) in contents:
+            self.add(k, v)
+
+    def __len__(self):
+        """Return the number of items in the priority queue."""
+        return self._size
+
+    def add(self, key, value):  # O(1)
+        """Add a key-value pair and return its Locator."""
+        token = self.Locator(key, value, self._owner)
+        self._root = self._link(self._root, token)
+        self._size += 1
+        return token
+
+    def min(self):  # O(1)
+        """Return but don't remove (k, v) tuple with minimum key.
+
+        Raise Empty exception if empty.
+        """
+        if self.is_empty():
+            raise Empty("Priority queue is empty.")
+        return (self._root._key, self._root._value)
+
+    def remove_min(self):
+        """Remove and return (k, v) tuple with minimum key.
+
+        Raise Empty exception if empty.
+        """
+        if self.is_empty():
+            raise Empty("Priority queue is empty.")
+        return self.remove(self._root)
+
+    def update(self, loc, newkey, newval):
+        """Update the key and value for the entry identified by Locator
+        loc."""
+        self._validate(loc)
+        decrease = not loc._key < newkey
+        loc._key = newkey
+        loc._value = newval
+        if loc is self._root:
+            if not decrease:
+                self._detach(loc)
+                self._root = self._link(self._root, loc)
+        elif decrease:  # cut subtree and link it with the root
+            self._cut(loc)
+            self._root = self._link(self._root, loc)
+        else:           # children may now be smaller than loc
+            self._detach(loc)
+            self._root = self._link(self._root, loc)
+
+    def remove(self, loc):
+        """Remove and return the (k, v) pair identified by Locator loc."""
+        self._validate(loc)
+        self._detach(loc)
+        loc._prev = loc     # convention for removed nodes
+        self._size -= 1
+        return (loc._key, loc._value)
+
+    def meld(self, other):  # O(1)
+        """Move all entries of pairing heap other into this one.
+
+        Locators of other remain valid in this queue; other becomes empty.
+        Raise ValueError if other is this queue.
+        """
+        if other is self:
+            raise ValueError("Cannot meld a queue with itself.")
+        self._root = self._link(self._root, other._root)
+        self._size += other._size
+        other._root = None
+        other._size = 0
+        other._owner._queue = None      # its locators now belong here
+        other._owner._next = self._owner
+        other._owner = other._Owner(other)
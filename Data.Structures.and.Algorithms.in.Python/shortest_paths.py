@@ -1,6 +1,6 @@
 from priority_queue import AdaptableHeapPriorityQueue
 
-def shortest_path_lengths(g, src):
+def shortest_path_lengths(g, src, pq_type=AdaptableHeapPriorityQueue):
     """Compute shortest-path distances from src to reachable vertices of g.
 
     Graph g can be undirected or directed, but must be weighted such that
@@ -11,15 +11,18 @@ def shortest_path_lengths(g, src):
     For a graph with n vertices and m edges, Dijkstra's algorithm can compute
     the distance from s to all other vertices in the better of O(n**2) or
     O((n+m)logn) time.
+
+    pq_type is the adaptable priority queue class to use, such as
+    PairingHeapPriorityQueue, whose decrease-key updates take O(1) time.
     """
-    return __shortest_path_lengths_noinf(g, src)
+    return __shortest_path_lengths_noinf(g, src, pq_type)
 
-def __shortest_path_lengths_noinf(g, src):
+def __shortest_path_lengths_noinf(g, src, pq_type=AdaptableHeapPriorityQueue):
     """Compute shortest-path distances from src to reachable vertices of g
     without python inf notation."""
     dist = {}    # dist[v] is upper bound from s to v
     cloud = {}    # map reachable v to its dist[v] value
-    pq = AdaptableHeapPriorityQueue() # vertex v will have key dist[v]
+    pq = pq_type() # vertex v will have key dist[v]
     pq_locator = {}    # map from vertex to its pq locator
 
     dist[src] = 0
@@ -46,13 +49,13 @@ def __shortest_path_lengths_noinf(g, src):
     # vertices.
     return cloud
 
-def __shortest_path_lengths_inf(g, src):
+def __shortest_path_lengths_inf(g, src, pq_type=AdaptableHeapPriorityQueue):
     """Compute shortest-path distances from src to reachable vertices of g
     with python inf notation."""
 
     dist = {}                         # dist[v] is upper bound from s to v
     cloud = {}                        # map reachable v to its dist[v] value
-    pq = AdaptableHeapPriorityQueue() # vertex v will have key dist[v]
+    pq = pq_type() # vertex v will have key dist[v]
     pq_locator = {}                   # map from vertex to its pq locator
 
     # for each vertex v of the graph, add an entry to the priority queue, with
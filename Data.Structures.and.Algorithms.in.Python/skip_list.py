@@ -0,0 +1,203 @@
+import threading
+from random import getrandbits
+from map import MapBase
+
+class SkipListMap(MapBase):
+    """Sorted map implementation using a skip list (see skip_list.pseudo).
+
+    Each node keeps its tower as a list of forward links, one per level, so
+    that drop down is an index change; the bottom level also links
+    backward for reverse iteration.
+
+    If concurrent is True, updates are serialized by a writer lock while
+    readers take no lock at all: a new node is fully built before it is
+    linked in, bottom level first, and a removed node is unlinked top level
+    first and keeps its own links, so a reader standing on it still reaches
+    the rest of the list. Readers see each key either before or after a
+    concurrent update of it.
+    """
+    _MAX_LEVEL = 32
+
+    # ----  nested _Node class  ----
+    class _Node:
+        __slots__ = "_key", "_value", "_next", "_prev"
+
+        def __init__(self, k, v, height):
+            self._key = k
+            self._value = v
+            self._next = [None] * height    # forward link at each level
+            self._prev = None               # backward link at level 0
+
+    # ----  non-public behaviors  ----
+    def _random_height(self):
+        """Return a tower height, which is h with probability 2**-h."""
+        bits = getrandbits(self._MAX_LEVEL - 1)
+        height = 1
+        while bits & 1:     # coin flip came up heads
+            height += 1
+            bits >>= 1
+        return height
+
+    def _search(self, k, preds=None):
+        """Return last node with key < k (the head if none).
+
+        If preds is a list, preds[i] is set to that node at level i.
+        """
+        pos = self._head
+        for i in range(self._height - 1, -1, -1):    # drop down
+            walk = pos._next[i]
+            while walk is not None and walk._key < k:
+                pos = walk  # scan forward
+                walk = pos._next[i]
+            if preds is not None:
+                preds[i] = pos
+        return pos
+
+    def _last(self):
+        """Return node with the maximum key (the head if empty)."""
+        pos = self._head
+        for i in range(self._height - 1, -1, -1):
+            while pos._next[i] is not None:
+                pos = pos._next[i]
+        return pos
+
+    def _pair(self, node):
+        if node is None or node is self._head:
+            return None
+        return (node._key, node._value)
+
+    def _set(self, k, v):
+        preds = [self._head] * self._MAX_LEVEL
+        node = self._search(k, preds)._next[0]
+        if node is not None and node._key == k:
+            node._value = v     # reassign value
+            return
+        height = self._random_height()
+        node = self._Node(k, v, height)
+        for i in range(height):
+            node._next[i] = preds[i]._next[i]
+        if preds[0] is not self._head:
+            node._prev = preds[0]
+        for i in range(height):     # publish, bottom level first
+            preds[i]._next[i] = node
+        if node._next[0] is not None:
+            node._next[0]._prev = node
+        if height > self._height:
+            self._height = height
+        self._n += 1
+
+    def _delete(self, k):
+        preds = [self._head] * self._MAX_LEVEL
+        node = self._search(k, preds)._next[0]
+        if node is None or node._key != k:
+            raise KeyError("Key Error: " + repr(k))
+        for i in range(len(node._next) - 1, -1, -1):   # unlink, top first
+            preds[i]._next[i] = node._next[i]
+        if node._next[0] is not None:
+            node._next[0]._prev = node._prev
+        while self._height > 1 and self._head._next[self._height-1] is None:
+            self._height -= 1
+        self._n -= 1
+
+    # ----  public behaviors  ----
+    def __init__(self, concurrent=False):
+        """Create an empty map.
+
+        If concurrent is True, readers may traverse the map while another
+        thread updates it.
+        """
+        self._head = self._Node(None, None, self._MAX_LEVEL)
+        self._height = 1    # number of levels in use
+        self._n = 0
+        self._lock = threading.Lock() if concurrent else None
+
+    def __len__(self):
+        """Return number of items in the map."""
+        return self._n
+
+    def __getitem__(self, k):   # expected O(log n)
+        """Return value associated with key k (raise KeyError if not
+        found)."""
+        node = self._search(k)._next[0]
+        if node is None or node._key != k:
+            raise KeyError("Key Error: " + repr(k))
+        return node._value
+
+    def __setitem__(self, k, v):    # expected O(log n)
+        """Assign value v to key k, overwriting existing value if present."""
+        if self._lock is None:
+            self._set(k, v)
+        else:
+            with self._lock:
+                self._set(k, v)
+
+    def __delitem__(self, k):   # expected O(log n)
+        """Remove item associated with key k (raise KeyError if not found)."""
+        if self._lock is None:
+            self._delete(k)
+        else:
+            with self._lock:
+                self._delete(k)
+
+    def __iter__(self):
+        """Generate keys of the map ordered from minimum to maximum."""
+        node = self._head._next[0]
+        while node is not None:
+            yield node._key
+            node = node._next[0]
+
+    def __reversed__(self):
+        """Generate keys of the map ordered from maximum to minimum."""
+        node = self._last()
+        while node is not None and node is not self._head:
+            yield node._key
+            node = node._prev
+
+    def find_min(self):
+        """Return (key, value) pair with minimum key (or None if empty)."""
+        return self._pair(self._head._next[0])
+
+    def find_max(self):
+        """Return (key, value) pair with maximum key (or None if empty)."""
+        return self._pair(self._last())
+
+    def find_ge(self, k):
+        """Return (key, value) pair with least key greater than or equal to
+        k."""
+        return self._pair(self._search(k)._next[0])
+
+    def find_gt(self, k):
+        """Return (key, value) pair with least key strictly greater than
+        k."""
+        node = self._search(k)._next[0]
+        if node is not None and node._key == k:
+            node = node._next[0]
+        return self._pair(node)
+
+    def find_lt(self, k):
+        """Return (key, value) pair with greatest key strictly less than
+        k."""
+        return self._pair(self._search(k))
+
+    def find_le(self, k):
+        """Return (key, value) pair with greatest key less than or equal to
+        k."""
+        pos = self._search(k)
+        node = pos._next[0]
+        if node is not None and node._key == k:
+            pos = node
+        return self._pair(pos)
+
+    def find_range(self, start, stop):
+        """Iterate all (key, value) pairs such that start <= key < stop.
+
+        If start is None, iteration begins with minimum key of map.
+        If stop is None, iteration continues through the maximum key of map.
+        """
+        if start is None:
+            node = self._head._next[0]
+        else:
+            node = self._search(start)._next[0]
+        while node is not None and (stop is None or node._key < stop):
+            yield (node._key, node._value)
+            node = node._next[0]
@@ -0,0 +1,123 @@
+import random
+import unittest
+from array_tree_map import ArrayRedBlackTreeMap, _NIL, _BLACK, _RED, _FREE
+
+def check_invariants(test, m):
+    """Check search order, parent links, red-black colors and the free list
+    of map m."""
+    keys, left, right = m._keys, m._left, m._right
+    color, parent = m._color, m._parent
+    test.assertEqual(color[_NIL], _BLACK)
+    test.assertEqual(color[m._root], _BLACK)
+    test.assertEqual(parent[m._root], _NIL)
+    live = []
+    stack = [(m._root, None, None)] if m._root != _NIL else []
+    black = {_NIL: 0}
+    order = []      # nodes in preorder; children are checked after parents
+    while stack:
+        j, lo, hi = stack.pop()
+        live.append(j)
+        order.append(j)
+        test.assertIn(color[j], (_BLACK, _RED))
+        test.assertTrue((lo is None or lo < keys[j]) and
+                        (hi is None or keys[j] < hi))
+        for child, bounds in ((left[j], (lo, keys[j])),
+                              (right[j], (keys[j], hi))):
+            if child != _NIL:
+                test.assertEqual(parent[child], j)
+                if color[j] == _RED:
+                    test.assertEqual(color[child], _BLACK)
+                stack.append((child,) + bounds)
+    for j in reversed(order):
+        test.assertEqual(black[left[j]], black[right[j]])
+        black[j] = black[left[j]] + (color[j] == _BLACK)
+    test.assertEqual(len(live), len(m))
+    free = []
+    j = m._free
+    while j != _NIL:
+        test.assertEqual(color[j], _FREE)
+        free.append(j)
+        j = left[j]
+    test.assertEqual(sorted(live + free + [_NIL]), list(range(len(keys))))
+
+class TestArrayRedBlackTreeMap(unittest.TestCase):
+
+    def check(self, m, ref):
+        check_invariants(self, m)
+        keys = sorted(ref)
+        self.assertEqual(list(m), keys)
+        self.assertEqual(list(reversed(m)), keys[::-1])
+        self.assertEqual(m.find_min(), (keys[0], ref[keys[0]])
+                         if keys else None)
+        self.assertEqual(m.find_max(), (keys[-1], ref[keys[-1]])
+                         if keys else None)
+        for k in random.sample(range(-5, 505), 20):
+            self.assertEqual(m.get(k), ref.get(k))
+            ge = [x for x in keys if x >= k]
+            lt = [x for x in keys if x < k]
+            gt = [x for x in ge if x != k]
+            le = lt + [k] if k in ref else lt
+            self.assertEqual(m.find_ge(k), (ge[0], ref[ge[0]])
+                             if ge else None)
+            self.assertEqual(m.find_gt(k), (gt[0], ref[gt[0]])
+                             if gt else None)
+            self.assertEqual(m.find_lt(k), (lt[-1], ref[lt[-1]])
+                             if lt else None)
+            self.assertEqual(m.find_le(k), (le[-1], ref[le[-1]])
+                             if le else None)
+            stop = k + random.randrange(100)
+            self.assertEqual(list(m.find_range(k, stop)),
+                             [(x, ref[x]) for x in ge if x < stop])
+
+    def test_against_dict(self):
+        m = ArrayRedBlackTreeMap()
+        ref = {}
+        for j in range(5000):
+            k = random.randrange(500)
+            if random.random() < 0.55:
+                m[k] = ref[k] = j
+            elif k in ref:
+                del m[k]
+                del ref[k]
+            else:
+                with self.assertRaises(KeyError):
+                    del m[k]
+            self.assertEqual(len(m), len(ref))
+            if j % 500 == 0:
+                self.check(m, ref)
+        self.check(m, ref)
+        self.assertLessEqual(len(m._keys), 501)     # slots are reused
+        for k in list(ref):
+            del m[k]
+            del ref[k]
+        self.check(m, ref)
+
+    def test_positions(self):
+        m = ArrayRedBlackTreeMap()
+        self.assertIsNone(m.first())
+        self.assertIsNone(m.find_position(1))
+        keys = random.sample(range(1000), 200)
+        for k in keys:
+            m[k] = str(k)
+        keys.sort()
+        p = m.first()
+        for k in keys:
+            self.assertEqual((p.key(), p.value()), (k, str(k)))
+            p = m.after(p)
+        self.assertIsNone(p)
+        p = m.last()
+        for k in reversed(keys):
+            self.assertEqual(p.key(), k)
+            p = m.before(p)
+        self.assertIsNone(p)
+        p = m.find_position(keys[10])
+        m.delete(p)
+        self.assertNotIn(keys[10], m)
+        with self.assertRaises(ValueError):
+            m.delete(p)
+        with self.assertRaises(ValueError):
+            ArrayRedBlackTreeMap().delete(m.first())
+        check_invariants(self, m)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import random
+import unittest
+from btree_map import BTreeMap
+
+def check_invariants(test, m):
+    """Check fill, balance, key order and leaf links of B+ tree m."""
+    leaves = []
+
+    def walk(node, lo, hi, depth):
+        test.assertTrue(node is m._root or
+                        m._order // 2 <= len(node._keys) <= m._order)
+        test.assertEqual(node._keys, sorted(node._keys))
+        for k in node._keys:
+            test.assertTrue((lo is None or lo <= k) and
+                            (hi is None or k < hi))
+        if isinstance(node, m._Leaf):
+            test.assertEqual(len(node._values), len(node._keys))
+            leaves.append((node, depth))
+            return
+        test.assertEqual(len(node._children), len(node._keys) + 1)
+        bounds = [lo] + node._keys + [hi]
+        for j, child in enumerate(node._children):
+            walk(child, bounds[j], bounds[j + 1], depth + 1)
+    walk(m._root, None, None, 0)
+    test.assertEqual(len({depth for (leaf, depth) in leaves}), 1)
+    test.assertEqual(sum(len(leaf._keys) for (leaf, d) in leaves), len(m))
+    for j, (leaf, depth) in enumerate(leaves):
+        test.assertIs(leaf._prev, leaves[j - 1][0] if j else None)
+        test.assertIs(leaf._next,
+                      leaves[j + 1][0] if j + 1 < len(leaves) else None)
+
+class TestBTreeMap(unittest.TestCase):
+
+    def check(self, m, ref):
+        keys = sorted(ref)
+        check_invariants(self, m)
+        self.assertEqual(list(m), keys)
+        self.assertEqual(list(reversed(m)), keys[::-1])
+        self.assertEqual(list(m.find_range(None, None)),
+                         [(k, ref[k]) for k in keys])
+        self.assertEqual(m.find_min(), (keys[0], ref[keys[0]])
+                         if keys else None)
+        self.assertEqual(m.find_max(), (keys[-1], ref[keys[-1]])
+                         if keys else None)
+        for k in random.sample(range(-5, 1005), 30):
+            self.assertEqual(m.get(k), ref.get(k))
+            ge = [x for x in keys if x >= k]
+            lt = [x for x in keys if x < k]
+            self.assertEqual(m.find_ge(k), (ge[0], ref[ge[0]])
+                             if ge else None)
+            self.assertEqual(m.find_lt(k), (lt[-1], ref[lt[-1]])
+                             if lt else None)
+            gt = [x for x in ge if x != k]
+            le = lt + [k] if k in ref else lt
+            self.assertEqual(m.find_gt(k), (gt[0], ref[gt[0]])
+                             if gt else None)
+            self.assertEqual(m.find_le(k), (le[-1], ref[le[-1]])
+                             if le else None)
+            stop = k + random.randrange(200)
+            self.assertEqual(list(m.find_range(k, stop)),
+                             [(x, ref[x]) for x in ge if x < stop])
+
+    def test_against_dict(self):
+        for order in (3, 4, 5, 16, 64):
+            m = BTreeMap(order)
+            ref = {}
+            for j in range(4000):
+                k = random.randrange(1000)
+                if random.random() < 0.55:
+                    m[k] = ref[k] = j
+                elif k in ref:
+                    del m[k]
+                    del ref[k]
+                else:
+                    with self.assertRaises(KeyError):
+                        del m[k]
+                self.assertEqual(len(m), len(ref))
+                if j % 500 == 0:
+                    self.check(m, ref)
+            self.check(m, ref)
+            for k in list(ref):
+                del m[k]
+                del ref[k]
+            self.check(m, ref)
+            self.assertEqual(m.height(), 0)
+
+    def test_positions(self):
+        m = BTreeMap(4)
+        keys = random.sample(range(1000), 200)
+        for k in keys:
+            m[k] = str(k)
+        keys.sort()
+        p = m.first()
+        for k in keys:
+            self.assertEqual((p.key(), p.value()), (k, str(k)))
+            p = m.after(p)
+        self.assertIsNone(p)
+        p = m.last()
+        for k in reversed(keys):
+            self.assertEqual(p.key(), k)
+            p = m.before(p)
+        self.assertIsNone(p)
+        self.assertEqual(m.find_position(keys[10]).key(), keys[10])
+        m.delete(m.find_position(keys[10]))
+        self.assertNotIn(keys[10], m)
+        self.assertIsNone(BTreeMap().first())
+        self.assertIsNone(BTreeMap().find_position(1))
+
+    def test_find_range_empty(self):
+        m = BTreeMap()
+        for start in (None, 0, 5):
+            for stop in (None, 0, 5, 10):
+                self.assertEqual(list(m.find_range(start, stop)), [])
+
+    def test_find_range_after_deleting_all(self):
+        m = BTreeMap(order=4)
+        for k in range(100):
+            m[k] = k
+        for k in range(100):
+            del m[k]
+        for start in (None, 50):
+            for stop in (None, 60):
+                self.assertEqual(list(m.find_range(start, stop)), [])
+
+    def test_find_range(self):
+        m = BTreeMap(order=4)
+        for k in range(0, 100, 2):
+            m[k] = str(k)
+        for start in (None, -1, 0, 13, 98, 99):
+            for stop in (None, -1, 0, 14, 98, 200):
+                expect = [(k, str(k)) for k in range(0, 100, 2)
+                          if (start is None or start <= k) and
+                          (stop is None or k < stop)]
+                self.assertEqual(list(m.find_range(start, stop)), expect)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import random
+import tempfile
+import unittest
+from lsm_map import LSMTreeMap
+
+class TestLSMTreeMap(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "lsm")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def check(self, m, ref):
+        keys = sorted(ref)
+        self.assertEqual(len(m), len(keys))
+        self.assertEqual(list(m), keys)
+        self.assertEqual(list(reversed(m)), keys[::-1])
+        self.assertEqual(m.find_min(), (keys[0], ref[keys[0]])
+                         if keys else None)
+        self.assertEqual(m.find_max(), (keys[-1], ref[keys[-1]])
+                         if keys else None)
+        for k in random.sample(range(-5, 505), 40):
+            self.assertEqual(m.get(k), ref.get(k))
+            ge = [x for x in keys if x >= k]
+            gt = [x for x in keys if x > k]
+            lt = [x for x in keys if x < k]
+            le = [x for x in keys if x <= k]
+            self.assertEqual(m.find_ge(k), (ge[0], ref[ge[0]])
+                             if ge else None)
+            self.assertEqual(m.find_gt(k), (gt[0], ref[gt[0]])
+                             if gt else None)
+            self.assertEqual(m.find_lt(k), (lt[-1], ref[lt[-1]])
+                             if lt else None)
+            self.assertEqual(m.find_le(k), (le[-1], ref[le[-1]])
+                             if le else None)
+            stop = k + random.randrange(100)
+            self.assertEqual(list(m.find_range(k, stop)),
+                             [(x, ref[x]) for x in ge if x < stop])
+
+    def random_ops(self, m, ref, steps):
+        for j in range(steps):
+            k = random.randrange(500)
+            if random.random() < 0.65:
+                m[k] = ref[k] = j
+            elif k in ref:
+                del m[k]
+                del ref[k]
+            else:
+                with self.assertRaises(KeyError):
+                    del m[k]
+
+    def test_against_dict(self):
+        for background in (False, True):
+            ref = {}
+            with LSMTreeMap(self.path + str(background), memtable_limit=37,
+                            background=background) as m:
+                for _ in range(5):
+                    self.random_ops(m, ref, 600)
+                    self.check(m, ref)
+                m.compact()
+                self.assertLessEqual(len(m._runs), 1)
+                self.check(m, ref)
+
+    def test_reopen(self):
+        ref = {}
+        with LSMTreeMap(self.path, memtable_limit=50) as m:
+            self.random_ops(m, ref, 2000)
+        with LSMTreeMap(self.path, memtable_limit=50) as m:
+            self.check(m, ref)
+            self.random_ops(m, ref, 500)
+        with LSMTreeMap(self.path) as m:
+            self.check(m, ref)
+
+    def test_reopen_after_crash(self):
+        ref = {}
+        m = LSMTreeMap(self.path, memtable_limit=50, background=False)
+        self.random_ops(m, ref, 1234)   # unflushed writes sit in the log
+        self.assertGreater(len(m._mem), 0)
+        # the process dies here: no close(), and the log ends in a torn
+        # record while a half-written run is left behind
+        with open(os.path.join(self.path, "wal.log"), "ab") as fp:
+            fp.write(b"\xff\x00\x00\x00partial")
+        with open(os.path.join(self.path, "run-99999999.sst.tmp"), "wb") \
+                as fp:
+            fp.write(b"garbage")
+        with LSMTreeMap(self.path, memtable_limit=50) as m2:
+            self.check(m2, ref)
+            self.random_ops(m2, ref, 300)
+            self.check(m2, ref)
+        with LSMTreeMap(self.path) as m3:
+            self.check(m3, ref)
+
+    def test_tombstones_are_dropped(self):
+        with LSMTreeMap(self.path, memtable_limit=10, background=False) as m:
+            for k in range(100):
+                m[k] = k
+            for k in range(100):
+                del m[k]
+            m.flush()
+            m.compact()
+            self.assertEqual(len(m), 0)
+            self.assertEqual(sum(run.count for run in m._runs), 0)
+            self.assertIsNone(m.find_min())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,330 @@
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from map import NumericSortedTableMap, PerfectHashMap
+from map import ChainHashMap, ProbeHashMap, CompactHashMap, CuckooHashMap
+from map import ConcurrentHashMap, FrozenProbeHashMap
+
+class CountedKey:
+    """Integer key that counts the calls to its __hash__."""
+    calls = 0
+
+    def __init__(self, n):
+        self.n = n
+
+    def __hash__(self):
+        CountedKey.calls += 1
+        return hash(self.n)
+
+    def __eq__(self, other):
+        return isinstance(other, CountedKey) and self.n == other.n
+
+def random_ops(test, m, keys, steps=3000):
+    """Apply random inserts, updates and deletes to m and to a dict."""
+    ref = {}
+    for j in range(steps):
+        k = random.choice(keys)
+        if random.random() < 0.6:
+            m[k] = ref[k] = j
+        elif k in ref:
+            del ref[k]
+            del m[k]
+        else:
+            with test.assertRaises(KeyError):
+                del m[k]
+        test.assertEqual(len(m), len(ref))
+    test.assertEqual(dict(m.items()), ref)
+    for k in keys:
+        test.assertEqual(m.get(k), ref.get(k))
+    return ref
+
+class TestNumericSortedTableMap(unittest.TestCase):
+
+    def test_large_int_keys(self):
+        m = NumericSortedTableMap("q")
+        keys = [2**53, 2**53 + 1, 2**62, 2**62 + 1]
+        for k in keys:
+            m[k] = str(k)
+        self.assertEqual(m.get_many(keys + [2**53 + 2]),
+                         [str(k) for k in keys] + [None])
+        self.assertEqual(m.count_range(2**53 + 1, 2**62 + 1), 2)
+        self.assertEqual(m.find_ge_many([2**53 + 1, 2**62 + 2]),
+                         [(2**53 + 1, str(2**53 + 1)), None])
+
+    def test_large_int_query_on_float_keys(self):
+        m = NumericSortedTableMap()
+        m[2**53] = "a"
+        self.assertEqual(m.get_many([2**53, 2**53 + 1]), ["a", None])
+        self.assertEqual(m.find_ge_many([2**53 + 1]), [None])
+        self.assertEqual(m.count_range(2**53 + 1, None), 0)
+
+    def test_unrepresentable_key_is_rejected(self):
+        m = NumericSortedTableMap()
+        m[2**53] = "a"
+        with self.assertRaises(ValueError):
+            m[2**53 + 1] = "b"
+        m2 = NumericSortedTableMap("q")
+        for k in (2**63, 1.5):
+            with self.assertRaises(ValueError):
+                m2[k] = "b"
+        self.assertEqual(list(m.items()), [(2**53, "a")])
+        self.assertEqual(len(m2), 0)
+        self.assertEqual(m2.get_many([1]), [None])
+
+class TestCompactHashMap(unittest.TestCase):
+
+    def test_against_dict(self):
+        for keys in (list(range(50)), list(range(2000)),
+                     [i * (2**61 - 1) for i in range(20)]):
+            m = CompactHashMap()
+            ref = random_ops(self, m, keys)
+            self.assertEqual(m.stats()["size"], len(ref))
+
+    def test_insertion_order(self):
+        m = CompactHashMap()
+        keys = random.sample(range(10000), 500)
+        for k in keys:
+            m[k] = k
+        for k in keys[::3]:
+            del m[k]
+        m[keys[0]] = 0
+        self.assertEqual(list(m), [k for k in keys if k not in keys[::3]]
+                         + [keys[0]])
+
+    def test_hashes_each_key_once(self):
+        m = CompactHashMap()
+        keys = [CountedKey(n) for n in range(1000)]
+        CountedKey.calls = 0
+        for k in keys:          # several resizes along the way
+            m[k] = k.n
+        for k in keys:
+            self.assertEqual(m[k], k.n)
+        for k in keys[::2]:
+            del m[k]
+        self.assertEqual(CountedKey.calls, len(keys) * 2 + len(keys) // 2)
+
+    def test_no_incremental_mode(self):
+        with self.assertRaises(ValueError):
+            CompactHashMap(incremental=True)
+
+class TestCuckooHashMap(unittest.TestCase):
+
+    def test_against_dict(self):
+        for keys in (list(range(50)), list(range(3000)),
+                     list(range(100)) + [i * (2**61 - 1) for i in range(30)]):
+            m = CuckooHashMap()
+            ref = random_ops(self, m, keys, 5000)
+            stats = m.stats()
+            self.assertEqual(sum(stats["histogram"].values()), len(ref))
+
+    def test_keys_with_equal_hash_codes(self):
+        keys = [i * (2**61 - 1) for i in range(200)]
+        self.assertEqual(len({hash(k) for k in keys}), 1)
+        m = CuckooHashMap()
+        for k in keys:
+            m[k] = str(k)
+        self.assertEqual(len(m), len(keys))
+        self.assertLess(len(m._table), 1000)    # no runaway doubling
+        self.assertLess(m.stats()["resizes"], 20)
+        for k in keys:
+            self.assertEqual(m[k], str(k))
+        self.assertEqual(sorted(m), keys)
+        for k in keys[::2]:
+            del m[k]
+        self.assertEqual(sorted(m), keys[1::2])
+        self.assertNotIn(keys[0], m)
+
+    def test_no_incremental_mode(self):
+        with self.assertRaises(ValueError):
+            CuckooHashMap(incremental=True)
+
+def run_threads(target, count=8):
+    """Run target(i) in count threads at once and wait for all of them."""
+    start = threading.Barrier(count)
+
+    def body(i):
+        start.wait()
+        target(i)
+    threads = [threading.Thread(target=body, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+class TestConcurrentHashMap(unittest.TestCase):
+
+    def test_against_dict(self):
+        for shards in (1, 4, 16):
+            random_ops(self, ConcurrentHashMap(shards), list(range(300)))
+
+    def test_compute_if_absent_calls_factory_once(self):
+        m = ConcurrentHashMap(4)
+        calls = []
+
+        def factory(k):
+            calls.append(k)
+            time.sleep(0.001)   # widen the window for a racing thread
+            return [k]
+        results = [[] for _ in range(8)]
+        run_threads(lambda i: results[i].extend(
+            m.compute_if_absent(k, factory) for k in range(50)))
+        self.assertEqual(sorted(calls), list(range(50)))
+        for r in results:       # every thread got the one stored object
+            self.assertTrue(all(r[k] is m[k] for k in range(50)))
+
+    def test_setdefault_is_atomic(self):
+        m = ConcurrentHashMap(4)
+        results = [[] for _ in range(8)]
+        run_threads(lambda i: results[i].extend(
+            m.setdefault(k, (i, k)) for k in range(200)))
+        for r in results:
+            self.assertEqual(r, [m[k] for k in range(200)])
+        self.assertEqual(len(m), 200)
+
+    def test_concurrent_updates(self):
+        m = ConcurrentHashMap(8)
+
+        def work(i):
+            for k in range(i * 500, (i + 1) * 500):
+                m[k] = k
+            for k in range(i * 500, (i + 1) * 500, 2):
+                self.assertEqual(m.pop(k), k)
+        run_threads(work)
+        self.assertEqual(sorted(m), list(range(1, 4000, 2)))
+        self.assertEqual(len(m), 2000)
+
+    def test_iteration_during_writes(self):
+        m = ConcurrentHashMap(8)
+        m.update((k, k) for k in range(1000))
+        done = threading.Event()
+
+        def writer():
+            k = 1000
+            while not done.is_set():
+                m[k] = k
+                del m[k]
+                k += 1
+        t = threading.Thread(target=writer)
+        t.start()
+        try:
+            for _ in range(20):     # stable keys are always seen, once
+                seen = [k for k in m if k < 1000]
+                self.assertEqual(sorted(seen), list(range(1000)))
+        finally:
+            done.set()
+            t.join()
+
+    def test_update_sources(self):
+        m = ConcurrentHashMap(4)
+        m.update({1: "a"})
+        m.update(ChainHashMap())
+        m.update([(2, "b")], c=3)
+
+        class KeysOnly:
+            def keys(self):
+                return [4]
+
+            def __getitem__(self, k):
+                return "d"
+        m.update(KeysOnly())
+        self.assertEqual(dict(m.items()), {1: "a", 2: "b", "c": 3, 4: "d"})
+        self.assertEqual(m.pop(5, None), None)
+        with self.assertRaises(KeyError):
+            m.pop(5)
+
+class TestFrozenProbeHashMap(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, "map.bin")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def freeze(self, items):
+        m = ProbeHashMap()
+        for k, v in items:
+            m[k] = v
+        return m.freeze(self.filename)
+
+    def test_round_trip(self):
+        keys = [None, 0, -1, 7, 2**64, -2**100, 0.5, -1.5e-300, float("inf"),
+                "", "abc", "\u00e9\U0001f600", "\udc80", b"", b"\x00\xff",
+                (), (1,), ("a", (b"b", 2.5)), ((),)]
+        keys += random.sample(range(-10**6, 10**6), 500)
+        items = [(k, [k]) for k in keys]
+        with self.freeze(items) as frozen:
+            self.assertEqual(len(frozen), len(keys))
+            for k, v in items:
+                self.assertEqual(frozen[k], v)
+            self.assertEqual(sorted(frozen, key=repr), sorted(keys, key=repr))
+            for k in (1, 2**64 + 1, "abd", b"\x01", (2,), ("a", (b"b",))):
+                self.assertNotIn(k, frozen)
+
+    def test_equal_keys_are_found(self):
+        s = "x" * 20
+        t = "".join(["x"] * 20)
+        self.assertIsNot(s, t)
+        with self.freeze([((s, s), "pair"), (1, "one"), (2.0, "two")]) \
+                as frozen:
+            self.assertEqual(frozen[(s, t)], "pair")
+            self.assertEqual(frozen[(t, t)], "pair")
+            for k in (1, 1.0, True):
+                self.assertEqual(frozen[k], "one")
+            self.assertEqual(frozen[2], "two")
+            self.assertEqual(set(frozen), {(s, s), 1, 2})
+
+    def test_unsupported_keys(self):
+        for k in (frozenset([1]), (1, [2]), 1j):
+            m = ProbeHashMap()
+            m[1] = 1
+            try:
+                m[k] = 2
+            except TypeError:   # unhashable
+                continue
+            with self.assertRaises(TypeError):
+                m.freeze(self.filename)
+            self.assertFalse(os.path.exists(self.filename))
+        with self.freeze([(1, 1)]) as frozen:
+            for k in (frozenset([1]), 1j, object()):
+                with self.assertRaises(KeyError):
+                    frozen[k]
+
+class TestPerfectHashMap(unittest.TestCase):
+
+    def check(self, items):
+        m = PerfectHashMap(items)
+        self.assertEqual(len(m), len(items))
+        self.assertEqual(dict(m.items()), dict(items))
+        for k, v in items.items():
+            self.assertEqual(m[k], v)
+        return m
+
+    def test_keys_with_equal_hash_codes(self):
+        self.assertEqual(hash(-1), hash(-2))
+        self.check({-1: "a", -2: "b"})
+        self.check({0: "a", 2**61 - 1: "b", 2 * (2**61 - 1): "c"})
+        m = self.check({-1: "a", -2: "b", 3: "c"})
+        for k in (-3, 2**61 + 2, "x"):
+            self.assertNotIn(k, m)
+            with self.assertRaises(KeyError):
+                m[k]
+
+    def test_freeze(self):
+        for cls in (ChainHashMap, ProbeHashMap):
+            m = cls()
+            m[-1] = "a"
+            m[-2] = "b"
+            self.assertEqual(dict(m.freeze()), {-1: "a", -2: "b"})
+
+    def test_many_keys(self):
+        items = {k: str(k) for k in range(-500, 500)}
+        items.update({k * (2**61 - 1): k for k in range(1, 50)})
+        self.check(items)
+        self.check({})
+
+if __name__ == "__main__":
+    unittest.main()
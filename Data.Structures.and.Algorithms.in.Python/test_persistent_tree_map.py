@@ -0,0 +1,114 @@
+import random
+import unittest
+from persistent_tree_map import PersistentRedBlackTreeMap
+
+def check_invariants(test, m):
+    """Check search order, size and red-black colors of map m; return the
+    list of its nodes."""
+    nodes = []
+
+    def walk(node, lo, hi):
+        if node is None:
+            return 0
+        nodes.append(node)
+        test.assertTrue((lo is None or lo < node._key) and
+                        (hi is None or node._key < hi))
+        if node._red:
+            for child in (node._left, node._right):
+                test.assertFalse(child is not None and child._red)
+        left = walk(node._left, lo, node._key)
+        test.assertEqual(walk(node._right, node._key, hi), left)
+        return left + (0 if node._red else 1)
+    walk(m._root, None, None)
+    test.assertFalse(m._root is not None and m._root._red)
+    test.assertEqual(len(nodes), len(m))
+    return nodes
+
+class TestPersistentRedBlackTreeMap(unittest.TestCase):
+
+    def check(self, m, ref):
+        check_invariants(self, m)
+        keys = sorted(ref)
+        self.assertEqual(list(m), keys)
+        self.assertEqual(list(reversed(m)), keys[::-1])
+        self.assertEqual(m.find_min(), (keys[0], ref[keys[0]])
+                         if keys else None)
+        self.assertEqual(m.find_max(), (keys[-1], ref[keys[-1]])
+                         if keys else None)
+        for k in random.sample(range(-5, 505), 20):
+            self.assertEqual(m.get(k), ref.get(k))
+            ge = [x for x in keys if x >= k]
+            lt = [x for x in keys if x < k]
+            gt = [x for x in ge if x != k]
+            le = lt + [k] if k in ref else lt
+            self.assertEqual(m.find_ge(k), (ge[0], ref[ge[0]])
+                             if ge else None)
+            self.assertEqual(m.find_gt(k), (gt[0], ref[gt[0]])
+                             if gt else None)
+            self.assertEqual(m.find_lt(k), (lt[-1], ref[lt[-1]])
+                             if lt else None)
+            self.assertEqual(m.find_le(k), (le[-1], ref[le[-1]])
+                             if le else None)
+            stop = k + random.randrange(100)
+            self.assertEqual(list(m.find_range(k, stop)),
+                             [(x, ref[x]) for x in ge if x < stop])
+
+    def test_against_dict(self):
+        m = PersistentRedBlackTreeMap()
+        ref = {}
+        for j in range(4000):
+            k = random.randrange(500)
+            if random.random() < 0.55:
+                m[k] = ref[k] = j
+            elif k in ref:
+                del m[k]
+                del ref[k]
+            else:
+                with self.assertRaises(KeyError):
+                    del m[k]
+            self.assertEqual(len(m), len(ref))
+            if j % 400 == 0:
+                self.check(m, ref)
+        self.check(m, ref)
+        for k in list(ref):
+            del m[k]
+            del ref[k]
+        self.check(m, ref)
+
+    def test_snapshots_are_unchanged(self):
+        m = PersistentRedBlackTreeMap()
+        ref = {}
+        snapshots = []
+        for j in range(3000):
+            k = random.randrange(300)
+            if random.random() < 0.6:
+                m[k] = ref[k] = j
+            elif k in ref:
+                del m[k]
+                del ref[k]
+            if j % 300 == 0:
+                snap = m.snapshot()
+                fields = [(node, node._red, node._left, node._key,
+                           node._value, node._right)
+                          for node in check_invariants(self, snap)]
+                snapshots.append((snap, dict(ref), fields))
+        for snap, items, fields in snapshots:
+            self.check(snap, items)
+            for node, *before in fields:    # shared nodes were not mutated
+                self.assertEqual([node._red, node._left, node._key,
+                                  node._value, node._right], before)
+
+    def test_snapshot_is_independent(self):
+        m = PersistentRedBlackTreeMap()
+        for k in range(100):
+            m[k] = k
+        snap = m.snapshot()
+        snap[1000] = 0
+        del snap[5]
+        m[5] = "new"
+        self.assertEqual((len(m), len(snap)), (100, 100))
+        self.assertEqual((m[5], snap.get(5)), ("new", None))
+        self.assertNotIn(1000, m)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,293 @@
+import heapq
+import random
+import unittest
+from priority_queue import HeapPriorityQueue, AdaptableHeapPriorityQueue
+from priority_queue import DaryHeapPriorityQueue
+from priority_queue import AdaptableDaryHeapPriorityQueue
+from priority_queue import PairingHeapPriorityQueue
+from graph import Graph
+from mst import MST_PrimJarnik, MST_Kruskal
+from shortest_paths import shortest_path_lengths
+
+ADAPTABLE_TYPES = (AdaptableHeapPriorityQueue, AdaptableDaryHeapPriorityQueue,
+                   PairingHeapPriorityQueue)
+
+def drain(pq):
+    return [pq.remove_min()[0] for _ in range(len(pq))]
+
+class TestHeapBulkOperations(unittest.TestCase):
+
+    def test_against_heapq(self):
+        pq = HeapPriorityQueue()
+        ref = []
+        for j in range(300):
+            k = random.randrange(100)
+            r = random.random()
+            if r < 0.1:
+                batch = [random.randrange(100) for _ in range(j % 30)]
+                pq.add_all((x, j) for x in batch)
+                for x in batch:
+                    heapq.heappush(ref, x)
+            elif r < 0.4 or not ref:
+                self.assertEqual(pq.pushpop(k, j)[0],
+                                 heapq.heappushpop(ref, k))
+            elif r < 0.7:
+                self.assertEqual(pq.replace(k, j)[0],
+                                 heapq.heapreplace(ref, k))
+            else:
+                pq.add(k, j)
+                heapq.heappush(ref, k)
+            self.assertEqual(len(pq), len(ref))
+        self.assertEqual(drain(pq), sorted(ref))
+
+    def test_merge_copies(self):
+        a = HeapPriorityQueue([(3, "a"), (1, "b")])
+        b = HeapPriorityQueue([(2, "c")])
+        m = HeapPriorityQueue.merge(a, b)
+        self.assertEqual(drain(m), [1, 2, 3])
+        self.assertEqual((len(a), len(b)), (2, 1))
+
+class TestAdaptableHeapBulkOperations(unittest.TestCase):
+
+    def check(self, pq, live):
+        for j, loc in enumerate(pq._data):
+            self.assertEqual(loc._index, j)
+        for loc, (k, v) in live.items():
+            pq.update(loc, k - 1000, v)     # every locator is still usable
+            self.assertEqual(pq.remove_min(), (k - 1000, v))
+
+    def test_add_all_returns_locators(self):
+        pq = AdaptableHeapPriorityQueue()
+        pq.add(50, "x")
+        locs = pq.add_all((k, k) for k in range(10, 0, -1))
+        self.assertEqual([(loc._key, loc._value) for loc in locs],
+                         [(k, k) for k in range(10, 0, -1)])
+        self.check(pq, {loc: (loc._key, loc._value) for loc in locs})
+
+    def test_pushpop_and_replace_locators(self):
+        pq = AdaptableHeapPriorityQueue()
+        self.assertEqual(pq.pushpop(5, "a"), ((5, "a"), None))
+        live = {pq.add(k, k): (k, k) for k in (4, 8, 6)}
+        self.assertEqual(pq.pushpop(3, "b"), ((3, "b"), None))
+        pair, loc = pq.pushpop(7, "c")
+        self.assertEqual(pair, (4, 4))
+        self.assertEqual(pq.remove(loc), (7, "c"))
+        pair, loc = pq.replace(1, "d")
+        self.assertEqual(pair, (6, 6))
+        pq.update(loc, 9, "d")
+        self.assertEqual(drain(pq), [8, 9])
+        with self.assertRaises(ValueError):
+            pq.remove(loc)
+
+    def test_random_with_locators(self):
+        pq = AdaptableHeapPriorityQueue()
+        live = {}
+        for j in range(300):
+            k = random.randrange(100)
+            if random.random() < 0.5 or not live:
+                pair, loc = pq.pushpop(k, j)
+            else:
+                pair, loc = pq.replace(k, j)
+            if loc is not None:
+                live[loc] = (k, j)
+            if pair != (k, j):
+                live = {l: p for l, p in live.items() if p != pair}
+            self.assertEqual(len(pq), len(live))
+        self.check(pq, live)
+
+    def test_pop_many_invalidates_locators(self):
+        for k in (3, 10, 50):
+            pq = AdaptableHeapPriorityQueue()
+            locs = pq.add_all((x, str(x)) for x in random.sample(range(100),
+                                                                  10))
+            keys = sorted(loc._key for loc in locs)
+            self.assertEqual([p[0] for p in pq.pop_many(k)], keys[:k])
+            pq.add(1000, "new")     # may reuse the index of a removed one
+            live = {}
+            for loc in locs:
+                if loc._key in keys[:k]:
+                    with self.assertRaises(ValueError):
+                        pq.remove(loc)
+                    with self.assertRaises(ValueError):
+                        pq.update(loc, 0, "x")
+                else:
+                    live[loc] = (loc._key, loc._value)
+            self.check(pq, live)
+            self.assertEqual(pq.remove_min(), (1000, "new"))
+
+    def test_merge_moves_locators(self):
+        a = AdaptableHeapPriorityQueue()
+        b = AdaptableHeapPriorityQueue()
+        live = {}
+        for k in range(20):
+            live[(a, b)[k % 2].add(k, str(k))] = (k, str(k))
+        m = AdaptableHeapPriorityQueue.merge(a, b)
+        self.assertEqual((len(a), len(b), len(m)), (0, 0, 20))
+        loc = next(iter(live))
+        with self.assertRaises(ValueError):
+            a.remove(loc)
+        self.check(m, live)
+        self.assertTrue(m.is_empty())
+
+class TestDaryHeapPriorityQueue(unittest.TestCase):
+
+    def test_against_heapq(self):
+        for d in (2, 3, 4, 8):
+            init = [(random.randrange(100), j) for j in range(20)]
+            pq = DaryHeapPriorityQueue(init, d)
+            ref = [k for (k, v) in init]
+            heapq.heapify(ref)
+            for j in range(500):
+                if random.random() < 0.55 or not ref:
+                    k = random.randrange(100)
+                    pq.add(k, j)
+                    heapq.heappush(ref, k)
+                else:
+                    self.assertEqual(pq.remove_min()[0], heapq.heappop(ref))
+                self.assertEqual(len(pq), len(ref))
+            self.assertEqual(drain(pq), sorted(ref))
+
+    def test_adaptable(self):
+        for d in (2, 4):
+            pq = AdaptableDaryHeapPriorityQueue([(5, "a"), (3, "b")], d)
+            live = {}
+            for j in range(500):
+                r = random.random()
+                if r < 0.4 or not live:
+                    k = random.randrange(100)
+                    live[pq.add(k, j)] = (k, j)
+                elif r < 0.7:
+                    loc = random.choice(list(live))
+                    k = random.randrange(100)
+                    pq.update(loc, k, j)
+                    live[loc] = (k, j)
+                else:
+                    loc = random.choice(list(live))
+                    self.assertEqual(pq.remove(loc), live.pop(loc))
+                    with self.assertRaises(ValueError):
+                        pq.remove(loc)
+                for i, loc in enumerate(pq._locators):
+                    self.assertEqual(loc._index, i)
+            self.assertEqual(drain(pq), sorted([3, 5] + [k for (k, v) in
+                                                        live.values()]))
+
+class TestPairingHeapPriorityQueue(unittest.TestCase):
+
+    def test_against_heapq(self):
+        pq = PairingHeapPriorityQueue()
+        live = {}
+        for j in range(2000):
+            r = random.random()
+            if r < 0.4 or not live:
+                k = random.randrange(100)
+                live[pq.add(k, j)] = (k, j)
+            elif r < 0.6:
+                loc = random.choice(list(live))
+                k = live[loc][0] + random.randrange(-20, 21)
+                pq.update(loc, k, j)
+                live[loc] = (k, j)
+            elif r < 0.8:
+                loc = random.choice(list(live))
+                self.assertEqual(pq.remove(loc), live.pop(loc))
+                with self.assertRaises(ValueError):
+                    pq.remove(loc)
+                with self.assertRaises(ValueError):
+                    pq.update(loc, 0, j)
+            else:
+                k = pq.min()[0]
+                self.assertEqual(k, min(k for (k, v) in live.values()))
+                pair = pq.remove_min()
+                self.assertEqual(pair[0], k)
+                live = {l: p for l, p in live.items() if p != pair}
+            self.assertEqual(len(pq), len(live))
+        ref = [k for (k, v) in live.values()]
+        heapq.heapify(ref)
+        while ref:
+            self.assertEqual(pq.remove_min()[0], heapq.heappop(ref))
+        self.assertTrue(pq.is_empty())
+
+    def test_foreign_locator(self):
+        a = PairingHeapPriorityQueue()
+        b = PairingHeapPriorityQueue()
+        loc_a = a.add(1, "a")
+        loc_b = b.add(2, "b")
+        for pq, loc in ((a, loc_b), (b, loc_a)):
+            with self.assertRaises(ValueError):
+                pq.remove(loc)
+            with self.assertRaises(ValueError):
+                pq.update(loc, 0, "x")
+        with self.assertRaises(ValueError):
+            a.remove("not a locator")
+        self.assertEqual((a.remove_min(), b.remove_min()),
+                         ((1, "a"), (2, "b")))    # both heaps are intact
+
+    def test_meld(self):
+        queues = [PairingHeapPriorityQueue() for _ in range(6)]
+        live = {}
+        for k in range(60):
+            pq = queues[k % 6]
+            live[pq.add(k, pq)] = k
+        for i in range(5, 0, -1):    # meld along a chain: 5 into 4 ...
+            queues[i - 1].meld(queues[i])
+            self.assertTrue(queues[i].is_empty())
+        top = queues[0]
+        self.assertEqual(len(top), 60)
+        for loc in live:
+            for other in queues[1:]:
+                with self.assertRaises(ValueError):
+                    other.remove(loc)
+            top.update(loc, live[loc] - 100, None)
+        self.assertEqual(drain(top), list(range(-100, -40)))
+        loc = queues[3].add(7, "new")     # a melded queue stays usable
+        with self.assertRaises(ValueError):
+            top.remove(loc)
+        self.assertEqual(queues[3].remove(loc), (7, "new"))
+
+    def test_meld_self(self):
+        pq = PairingHeapPriorityQueue([(1, "a"), (2, "b")])
+        with self.assertRaises(ValueError):
+            pq.meld(pq)
+        self.assertEqual(drain(pq), [1, 2])
+
+def random_graph(n, m):
+    """Return a connected undirected graph with n vertices and about m
+    edges of random integer weights."""
+    g = Graph()
+    verts = [g.insert_vertex(j) for j in range(n)]
+    for j in range(1, n):   # a random spanning tree keeps g connected
+        g.insert_edge(verts[random.randrange(j)], verts[j],
+                      random.randrange(1, 50))
+    for _ in range(m - n + 1):
+        u, v = random.sample(verts, 2)
+        if g.get_edge(u, v) is None:
+            g.insert_edge(u, v, random.randrange(1, 50))
+    return g, verts
+
+class TestGraphAlgorithms(unittest.TestCase):
+
+    def test_shortest_path_lengths(self):
+        for _ in range(5):
+            g, verts = random_graph(60, 200)
+            dist = {v: float("inf") for v in verts}   # Bellman-Ford
+            dist[verts[0]] = 0
+            for _ in range(len(verts)):
+                for e in g.edges():
+                    u, v = e.endpoints()
+                    w = e.element()
+                    dist[v] = min(dist[v], dist[u] + w)
+                    dist[u] = min(dist[u], dist[v] + w)
+            for pq_type in ADAPTABLE_TYPES:
+                self.assertEqual(shortest_path_lengths(g, verts[0], pq_type),
+                                 dist)
+
+    def test_MST_PrimJarnik(self):
+        for _ in range(5):
+            g, verts = random_graph(60, 200)
+            weight = sum(e.element() for e in MST_Kruskal(g))
+            for pq_type in ADAPTABLE_TYPES:
+                tree = MST_PrimJarnik(g, pq_type)
+                self.assertEqual(len(tree), len(verts) - 1)
+                self.assertEqual(sum(e.element() for e in tree), weight)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import random
+import threading
+import unittest
+from skip_list import SkipListMap
+
+def check_invariants(test, m):
+    """Check the levels, tower heights and backward links of map m."""
+    head = m._head
+    test.assertTrue(1 <= m._height <= m._MAX_LEVEL)
+    for i in range(m._height, m._MAX_LEVEL):
+        test.assertIsNone(head._next[i])    # unused levels are empty
+    if m._height > 1:
+        test.assertIsNotNone(head._next[m._height - 1])
+    below = None
+    for i in range(m._height):
+        level = []
+        node = head._next[i]
+        while node is not None:
+            test.assertLessEqual(len(node._next), m._height)
+            test.assertGreater(len(node._next), i)
+            level.append(node)
+            node = node._next[i]
+        keys = [node._key for node in level]
+        test.assertEqual(keys, sorted(set(keys)))
+        if below is None:
+            test.assertEqual(len(level), len(m))
+            prev = None
+            for node in level:
+                test.assertIs(node._prev, prev)
+                prev = node
+        else:
+            # each level holds exactly the nodes of the level below that
+            # are tall enough
+            test.assertEqual(level, [node for node in below
+                                     if len(node._next) > i])
+        below = level
+
+class TestSkipListMap(unittest.TestCase):
+
+    def check(self, m, ref):
+        check_invariants(self, m)
+        keys = sorted(ref)
+        self.assertEqual(list(m), keys)
+        self.assertEqual(list(reversed(m)), keys[::-1])
+        self.assertEqual(m.find_min(), (keys[0], ref[keys[0]])
+                         if keys else None)
+        self.assertEqual(m.find_max(), (keys[-1], ref[keys[-1]])
+                         if keys else None)
+        for k in random.sample(range(-5, 505), 20):
+            self.assertEqual(m.get(k), ref.get(k))
+            ge = [x for x in keys if x >= k]
+            lt = [x for x in keys if x < k]
+            gt = [x for x in ge if x != k]
+            le = lt + [k] if k in ref else lt
+            self.assertEqual(m.find_ge(k), (ge[0], ref[ge[0]])
+                             if ge else None)
+            self.assertEqual(m.find_gt(k), (gt[0], ref[gt[0]])
+                             if gt else None)
+            self.assertEqual(m.find_lt(k), (lt[-1], ref[lt[-1]])
+                             if lt else None)
+            self.assertEqual(m.find_le(k), (le[-1], ref[le[-1]])
+                             if le else None)
+            stop = k + random.randrange(100)
+            self.assertEqual(list(m.find_range(k, stop)),
+                             [(x, ref[x]) for x in ge if x < stop])
+        self.assertEqual(list(m.find_range(None, None)),
+                         [(x, ref[x]) for x in keys])
+
+    def test_against_dict(self):
+        for concurrent in (False, True):
+            m = SkipListMap(concurrent)
+            ref = {}
+            for j in range(5000):
+                k = random.randrange(500)
+                if random.random() < 0.55:
+                    m[k] = ref[k] = j
+                elif k in ref:
+                    del m[k]
+                    del ref[k]
+                else:
+                    with self.assertRaises(KeyError):
+                        del m[k]
+                self.assertEqual(len(m), len(ref))
+                if j % 500 == 0:
+                    self.check(m, ref)
+            self.check(m, ref)
+            for k in list(ref):
+                del m[k]
+                del ref[k]
+            self.check(m, ref)
+            self.assertEqual(m._height, 1)
+
+    def test_random_height(self):
+        m = SkipListMap()
+        heights = [m._random_height() for _ in range(20000)]
+        self.assertTrue(all(1 <= h <= m._MAX_LEVEL for h in heights))
+        ones = heights.count(1) / len(heights)
+        self.assertTrue(0.45 < ones < 0.55)
+
+    def test_concurrent_readers(self):
+        m = SkipListMap(concurrent=True)
+        for k in range(0, 1000, 2):
+            m[k] = k        # even keys are never touched again
+        stop = threading.Event()
+        errors = []
+
+        def reader():
+            while not stop.is_set():
+                keys = list(m)
+                if keys != sorted(set(keys)) or \
+                        not set(range(0, 1000, 2)) <= set(keys):
+                    errors.append(keys)
+                    return
+
+        def writer(seed):
+            rnd = random.Random(seed)
+            for _ in range(3000):
+                k = 2 * rnd.randrange(500) + 1
+                if k in m:
+                    try:
+                        del m[k]
+                    except KeyError:    # the other writer got there first
+                        pass
+                else:
+                    m[k] = k
+        readers = [threading.Thread(target=reader) for _ in range(2)]
+        writers = [threading.Thread(target=writer, args=(s,))
+                   for s in range(2)]
+        for t in readers + writers:
+            t.start()
+        for t in writers:
+            t.join()
+        stop.set()
+        for t in readers:
+            t.join()
+        self.assertEqual(errors, [])
+        check_invariants(self, m)
+
+if __name__ == "__main__":
+    unittest.main()
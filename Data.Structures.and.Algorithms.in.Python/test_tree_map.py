@@ -0,0 +1,487 @@
+import io
+import operator
+import random
+import unittest
+from tree_map import TreeMap, AVLTreeMap, SplayTreeMap, RedBlackTreeMap
+from tree_map import OrderStatisticAVLTreeMap, OrderStatisticRedBlackTreeMap
+from tree_map import AggregateAVLTreeMap, AggregateRedBlackTreeMap
+from tree_map import OrderStatisticMixin, AggregateMixin, IntervalTreeMap
+
+TREE_TYPES = (TreeMap, AVLTreeMap, SplayTreeMap, RedBlackTreeMap,
+              OrderStatisticAVLTreeMap, OrderStatisticRedBlackTreeMap)
+
+def build(cls, keys):
+    m = cls()
+    for k in keys:
+        m[k] = str(k)
+    return m
+
+def nodes_of(m):
+    """Return the nodes of tree map m in breadth-first order."""
+    nodes = [m._root] if m._root is not None else []
+    for node in nodes:      # the list grows while it is scanned
+        for child in (node._left, node._right):
+            if child is not None:
+                nodes.append(child)
+    return nodes
+
+def check_invariants(test, m):
+    """Check search order, parent links, size and the balance data and
+    augmentations of tree map m."""
+    nodes = nodes_of(m)
+    test.assertEqual(len(nodes), len(m))
+    keys = list(m)
+    test.assertTrue(all(a < b for a, b in zip(keys, keys[1:])))
+    if m._root is not None:
+        test.assertIsNone(m._root._parent)
+    height, black = {None: 0}, {None: 0}
+    for node in reversed(nodes):    # children before their parents
+        left, right = node._left, node._right
+        for child in (left, right):
+            if child is not None:
+                test.assertIs(child._parent, node)
+        height[node] = 1 + max(height[left], height[right])
+        if isinstance(m, AVLTreeMap):
+            test.assertEqual(node._height, height[node])
+            test.assertLessEqual(abs(height[left] - height[right]), 1)
+        if isinstance(m, RedBlackTreeMap):
+            test.assertEqual(black[left], black[right])
+            black[node] = black[left] + (0 if node._red else 1)
+            if node._red:
+                for child in (left, right):
+                    test.assertFalse(child is not None and child._red)
+        if isinstance(m, OrderStatisticMixin):
+            test.assertEqual(node._count, 1 + (left._count if left else 0)
+                             + (right._count if right else 0))
+        if isinstance(m, AggregateMixin):
+            test.assertEqual(node._agg, m._op(m._op(m._agg(left),
+                                                    node._element._value),
+                                              m._agg(right)))
+        if isinstance(m, IntervalTreeMap):
+            test.assertEqual(node._max, max([node._element._key[1]] +
+                                            [c._max for c in (left, right)
+                                             if c is not None]))
+
+def check_queries(test, m, ref, probes):
+    """Check ordered queries of map m against dict ref at keys probes."""
+    keys = sorted(ref)
+    test.assertEqual(list(m), keys)
+    test.assertEqual(list(reversed(m)), keys[::-1])
+    test.assertEqual(m.find_min(), (keys[0], ref[keys[0]]) if keys else None)
+    test.assertEqual(m.find_max(), (keys[-1], ref[keys[-1]])
+                     if keys else None)
+    for k in probes:
+        test.assertEqual(m.get(k), ref.get(k))
+        ge = [x for x in keys if x >= k]
+        gt = [x for x in keys if x > k]
+        lt = [x for x in keys if x < k]
+        le = [x for x in keys if x <= k]
+        test.assertEqual(m.find_ge(k), (ge[0], ref[ge[0]]) if ge else None)
+        test.assertEqual(m.find_gt(k), (gt[0], ref[gt[0]]) if gt else None)
+        test.assertEqual(m.find_lt(k), (lt[-1], ref[lt[-1]]) if lt else None)
+        test.assertEqual(m.find_le(k), (le[-1], ref[le[-1]]) if le else None)
+        stop = k + random.randrange(50)
+        test.assertEqual(list(m.find_range(k, stop)),
+                         [(x, ref[x]) for x in ge if x < stop])
+        test.assertEqual(list(m.find_range(None, k)),
+                         [(x, ref[x]) for x in lt])
+
+class TestRandomized(unittest.TestCase):
+
+    def test_against_dict(self):
+        for cls in TREE_TYPES:
+            m = cls()
+            ref = {}
+            for j in range(3000):
+                k = random.randrange(500)
+                if random.random() < 0.55:
+                    m[k] = ref[k] = j
+                elif k in ref:
+                    del m[k]
+                    del ref[k]
+                else:
+                    with self.assertRaises(KeyError):
+                        del m[k]
+                if j % 300 == 0:
+                    check_invariants(self, m)
+                    check_queries(self, m, ref,
+                                  random.sample(range(-5, 505), 20))
+            check_invariants(self, m)
+            check_queries(self, m, ref, random.sample(range(-5, 505), 100))
+
+class TestOrderStatistics(unittest.TestCase):
+
+    def check(self, m, keys):
+        check_invariants(self, m)
+        keys = sorted(keys)
+        for i, k in enumerate(keys):
+            self.assertEqual(m.select(i), (k, str(k)))
+        for i in (-1, len(keys)):
+            with self.assertRaises(IndexError):
+                m.select(i)
+        for k in random.sample(range(-5, 1005), 30):
+            self.assertEqual(m.rank(k), sum(1 for x in keys if x < k))
+            stop = k + random.randrange(-10, 300)
+            self.assertEqual(m.count_range(k, stop),
+                             sum(1 for x in keys if k <= x < stop))
+            self.assertEqual(m.count_range(None, k), m.rank(k))
+            self.assertEqual(m.count_range(k, None), len(keys) - m.rank(k))
+        self.assertEqual(m.median(), (keys[(len(keys) - 1) // 2],
+                                      str(keys[(len(keys) - 1) // 2]))
+                         if keys else None)
+
+    def test_against_sorted(self):
+        for cls in (OrderStatisticAVLTreeMap, OrderStatisticRedBlackTreeMap):
+            m = cls()
+            keys = set()
+            for j in range(3000):
+                k = random.randrange(1000)
+                if random.random() < 0.6:
+                    m[k] = str(k)
+                    keys.add(k)
+                elif k in keys:
+                    del m[k]
+                    keys.remove(k)
+                if j % 250 == 0:
+                    self.check(m, keys)
+            self.check(m, keys)
+            for k in list(keys):
+                del m[k]
+            self.check(m, [])
+
+class TestAggregate(unittest.TestCase):
+
+    # (op, identity, value of key k at step j); concatenation is not
+    # commutative, so it also checks that values combine in key order
+    OPS = ((operator.add, 0, lambda k, j: j - 1500),
+           (operator.add, "", lambda k, j: chr(97 + (k + j) % 26)),
+           (max, float("-inf"), lambda k, j: (k * j) % 101))
+
+    def check(self, m, ref):
+        check_invariants(self, m)
+        keys = sorted(ref)
+        total = m._identity
+        for k in keys:
+            total = m._op(total, ref[k])
+        self.assertEqual(m.aggregate(None, None), total)
+        for _ in range(20):
+            start, stop = random.randrange(-5, 505), random.randrange(-5, 505)
+            expected = m._identity
+            for k in keys:
+                if start <= k < stop:
+                    expected = m._op(expected, ref[k])
+            self.assertEqual(m.aggregate(start, stop), expected)
+            before, after = m._identity, m._identity
+            for k in keys:
+                if k < stop:
+                    before = m._op(before, ref[k])
+                if k >= start:
+                    after = m._op(after, ref[k])
+            self.assertEqual(m.aggregate(None, stop), before)
+            self.assertEqual(m.aggregate(start, None), after)
+
+    def test_against_brute_force(self):
+        for cls in (AggregateAVLTreeMap, AggregateRedBlackTreeMap):
+            for op, identity, value in self.OPS:
+                m = cls(op, identity)
+                ref = {}
+                self.check(m, ref)
+                for j in range(2000):
+                    k = random.randrange(500)
+                    if random.random() < 0.6:
+                        m[k] = ref[k] = value(k, j)   # also overwrites
+                    elif k in ref:
+                        del m[k]
+                        del ref[k]
+                    if j % 250 == 0:
+                        self.check(m, ref)
+                self.check(m, ref)
+                for k in random.sample(list(ref), len(ref) // 2):
+                    del m[k]
+                    del ref[k]
+                self.check(m, ref)
+
+BUILD_TYPES = TREE_TYPES + ((AggregateAVLTreeMap, operator.add, 0),
+                            (AggregateRedBlackTreeMap, operator.add, 0))
+
+def new_map(spec):
+    """Return an empty map of spec, a tree type or (type, *arguments)."""
+    return spec[0](*spec[1:]) if isinstance(spec, tuple) else spec()
+
+class TestBulkBuild(unittest.TestCase):
+
+    def test_from_sorted(self):
+        for spec in BUILD_TYPES:
+            cls = spec[0] if isinstance(spec, tuple) else spec
+            args = spec[1:] if isinstance(spec, tuple) else ()
+            for n in list(range(18)) + [31, 32, 33, 100, 1000]:
+                ref = {k: k * 3 for k in range(0, 2 * n, 2)}
+                m = cls.from_sorted(sorted(ref.items()), *args)
+                self.assertIs(type(m), cls)
+                check_invariants(self, m)
+                check_queries(self, m, ref, random.sample(range(-1, 2 * n + 1),
+                                                          min(n, 10)))
+                for k in random.sample(range(-1, 2 * n + 1), min(n, 10)):
+                    m[k] = ref[k] = k   # the tree stays balanced
+                check_invariants(self, m)
+            for bad in ([(2, 0), (1, 0)], [(1, 0), (1, 0)]):
+                with self.assertRaises(ValueError):
+                    cls.from_sorted(bad, *args)
+
+    def test_bulk_update(self):
+        for spec in BUILD_TYPES:
+            m = new_map(spec)
+            ref = {}
+            for j in range(25):
+                size = random.choice((1, 2, 5, 50, 300))    # both paths
+                batch = sorted(random.sample(range(2000), size))
+                m.bulk_update((k, j) for k in batch)
+                ref.update((k, j) for k in batch)
+                check_invariants(self, m)
+                self.assertEqual(list(m.find_range(None, None)),
+                                 sorted(ref.items()))
+                k = random.randrange(2000)
+                if k in ref:
+                    del m[k]
+                    del ref[k]
+            for bad in ([(5, 0), (3, 0)], [(5, 0), (5, 0)]):
+                for n in (0, 1000):     # the rebuild and insert paths
+                    m = new_map(spec)
+                    m.bulk_update((k, k) for k in range(n))
+                    with self.assertRaises(ValueError):
+                        m.bulk_update(bad)
+
+    def test_stale_positions_after_rebuild(self):
+        for cls in TREE_TYPES:
+            m = build(cls, range(20))
+            pos = m.first()
+            m.bulk_update((k, k) for k in range(100))
+            with self.assertRaises(ValueError):
+                m.delete(pos)
+            check_invariants(self, m)
+
+class TestIntervalTreeMap(unittest.TestCase):
+
+    def check(self, m, ref):
+        check_invariants(self, m)
+        self.assertEqual(sorted(ref.items()), list(m.find_range(None, None)))
+        for _ in range(30):
+            lo = random.randrange(-10, 210)
+            hi = lo + random.randrange(30)
+            self.assertEqual(list(m.overlapping(lo, hi)),
+                             [(k, v) for k, v in sorted(ref.items())
+                              if k[0] <= hi and lo <= k[1]])
+            self.assertEqual(list(m.stabbing(lo)),
+                             [(k, v) for k, v in sorted(ref.items())
+                              if k[0] <= lo <= k[1]])
+
+    def test_against_brute_force(self):
+        m = IntervalTreeMap()
+        ref = {}
+        for j in range(2000):
+            lo = random.randrange(200)
+            k = (lo, lo + random.choice((0, 1, 5, 40)))
+            if random.random() < 0.6:
+                m[k] = ref[k] = j
+            elif k in ref:
+                del m[k]
+                del ref[k]
+            if j % 250 == 0:
+                self.check(m, ref)
+        self.check(m, ref)
+        m.bulk_update(((k, k + 3), "bulk") for k in range(300, 400))
+        ref.update((((k, k + 3), "bulk") for k in range(300, 400)))
+        self.check(m, ref)
+        self.check(IntervalTreeMap.from_sorted(sorted(ref.items())), ref)
+
+    def test_inverted_intervals_are_rejected(self):
+        good = [((k, k + 1), k) for k in range(100)]
+        bad = good[:50] + [((50, 49), 0)] + good[51:]
+        m = IntervalTreeMap.from_sorted(good)
+        with self.assertRaises(ValueError):
+            m[(3, 2)] = 0
+        with self.assertRaises(ValueError):
+            IntervalTreeMap.from_sorted(bad)
+        for batch in (bad, [((1000, 999), 0)]):     # rebuild, insert paths
+            with self.assertRaises(ValueError):
+                m.bulk_update(batch)
+            self.check(m, dict(good))
+        fp = io.BytesIO()
+        RedBlackTreeMap.from_sorted(bad).dump(fp)
+        fp.seek(0)
+        with self.assertRaises(ValueError):
+            IntervalTreeMap.load(fp)
+
+class TestCursor(unittest.TestCase):
+
+    def test_walk(self):
+        for cls in TREE_TYPES:
+            for n in (0, 1, 2, 50):
+                keys = sorted(random.sample(range(0, 1000, 2), n))
+                m = build(cls, keys)
+                items = [(k, str(k)) for k in keys]
+                self.assertEqual(list(m.cursor()), items)
+                c = m.cursor()
+                self.assertIsNone(c.prev())
+                at = 0      # index of the item just after the cursor
+                for _ in range(200):
+                    if random.random() < 0.5:
+                        self.assertEqual(c.next(), items[at]
+                                         if at < n else None)
+                        at = min(at + 1, n)
+                    else:
+                        self.assertEqual(c.prev(), items[at - 1]
+                                         if at > 0 else None)
+                        at = max(at - 1, 0)
+                for k in (-1, 0, 1, 500, 501, 999, 1000, None):
+                    c.seek(k)
+                    rest = [item for item in items
+                            if k is None or item[0] >= k]
+                    self.assertEqual(list(c), rest)
+                    self.assertIsNone(c.next())
+                    self.assertEqual(c.prev(), items[-1] if items else None)
+                    self.assertEqual(list(m.cursor(k)), rest)
+
+class TestSplitJoin(unittest.TestCase):
+
+    def check(self, m, keys):
+        keys = sorted(keys)
+        check_invariants(self, m)
+        self.assertEqual(len(m), len(keys))
+        self.assertEqual(m.is_empty(), not keys)
+        self.assertEqual(list(m), keys)
+        self.assertEqual(list(reversed(m)), keys[::-1])
+        for k in keys:
+            self.assertEqual(m[k], str(k))
+
+    def test_split(self):
+        for cls in TREE_TYPES:
+            for n in (0, 1, 2, 3, 10, 100):
+                keys = random.sample(range(1000), n)
+                for k in [-1, 1000] + keys[:5]:
+                    left, right = build(cls, keys).split(k)
+                    self.check(left, [x for x in keys if x < k])
+                    self.check(right, [x for x in keys if x >= k])
+                    left[k] = str(k)    # pieces stay usable
+                    del left[k]
+                    self.check(left, [x for x in keys if x < k])
+
+    def test_split_at_root(self):
+        for cls in TREE_TYPES:
+            m = build(cls, range(50))
+            k = m.root().key()
+            left, right = m.split(k)
+            self.check(left, range(k))
+            self.check(right, range(k, 50))
+            self.assertEqual(len(m), 0)
+
+    def test_join(self):
+        for cls in TREE_TYPES:
+            for n1, n2 in ((0, 0), (0, 5), (5, 0), (1, 1), (30, 3), (3, 30)):
+                left = build(cls, range(n1))
+                right = build(cls, range(n1, n1 + n2))
+                m = cls.join(left, right)
+                self.check(m, range(n1 + n2))
+                self.check(left, [])
+                self.check(right, [])
+            with self.assertRaises(ValueError):
+                cls.join(build(cls, [5]), build(cls, [1]))
+
+    def test_join_rejects_other_types(self):
+        for cls in TREE_TYPES:
+            for other in TREE_TYPES:
+                if other is not cls:
+                    left, right = build(cls, [1]), build(other, [2])
+                    with self.assertRaises(TypeError):
+                        cls.join(left, right)
+                    with self.assertRaises(TypeError):
+                        other.join(left, right)
+                    self.check(left, [1])   # both maps are left intact
+                    self.check(right, [2])
+        with self.assertRaises(TypeError):
+            AVLTreeMap.join(build(TreeMap, [1]), build(TreeMap, [2]))
+        m = TreeMap.join(build(AVLTreeMap, [1]), build(AVLTreeMap, [2]))
+        self.assertIs(type(m), AVLTreeMap)
+
+    def test_split_join_aggregate(self):
+        for cls in (AggregateAVLTreeMap, AggregateRedBlackTreeMap):
+            m = cls(operator.add, 0)
+            for k in random.sample(range(500), 300):
+                m[k] = k
+            left, right = m.split(250)
+            check_invariants(self, left)
+            check_invariants(self, right)
+            self.assertEqual(left.aggregate(None, None),
+                             sum(k for k in left))
+            m = cls.join(left, right)
+            check_invariants(self, m)
+            self.assertEqual(m.aggregate(100, 400),
+                             sum(k for k in m if 100 <= k < 400))
+            gone = [k for k in m if 100 <= k < 400]
+            self.assertEqual(m.delete_range(100, 400), len(gone))
+            check_invariants(self, m)
+            self.assertEqual(m.aggregate(None, None), sum(k for k in m))
+
+    def test_join_after_split(self):
+        for cls in TREE_TYPES:
+            keys = random.sample(range(1000), 200)
+            left, right = build(cls, keys).split(500)
+            m = cls.join(left, right)
+            self.check(m, keys)
+
+    def test_delete_range(self):
+        for cls in TREE_TYPES:
+            keys = list(range(0, 60, 2))
+            bounds = (None, -1, 0, 7, 30, 58, 59, 100)
+            for start in bounds:
+                for stop in bounds:
+                    m = build(cls, keys)
+                    gone = [k for k in keys
+                            if (start is None or start <= k) and
+                            (stop is None or k < stop)]
+                    self.assertEqual(m.delete_range(start, stop), len(gone))
+                    self.check(m, [k for k in keys if k not in gone])
+
+    def test_delete_range_pivot_is_root(self):
+        for cls in TREE_TYPES:
+            for n in (1, 2, 3, 20):
+                m = build(cls, range(n))
+                self.assertEqual(m.delete_range(None, None), n)
+                self.check(m, [])
+            m = build(cls, range(20))
+            k = m.root().key()
+            self.assertEqual(m.delete_range(k, k + 1), 1)
+            self.check(m, [x for x in range(20) if x != k])
+
+    def test_split_deep_tree(self):
+        m = build(SplayTreeMap, range(3000))     # sorted inserts: deep tree
+        left, right = m.split(1500)
+        self.assertEqual((len(left), len(right)), (1500, 1500))
+        self.assertEqual(list(left), list(range(1500)))
+        self.assertEqual(list(right), list(range(1500, 3000)))
+
+    def test_splay_tree_deletes(self):
+        for n in (1, 2, 10, 100):
+            keys = list(range(n))
+            m = build(SplayTreeMap, keys)
+            random.shuffle(keys)
+            for j, k in enumerate(keys):
+                del m[k]
+                self.check(m, keys[j + 1:])
+
+class TestDumpLoad(unittest.TestCase):
+
+    def test_aggregate_map(self):
+        for cls in (AggregateAVLTreeMap, AggregateRedBlackTreeMap):
+            m = cls(operator.add, 0)
+            for k in range(5000):
+                m[k] = k
+            fp = io.BytesIO()
+            m.dump(fp)
+            fp.seek(0)
+            copy = cls.load(fp, operator.add, 0)
+            self.assertEqual(list(copy.items()), list(m.items()))
+            self.assertEqual(copy.aggregate(10, 20), sum(range(10, 20)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,13 @@
+import pickle
 from map import MapBase
 from linked_binary_tree import LinkedBinaryTree
 
 class TreeMap(LinkedBinaryTree, MapBase):
     """Sorted map implementation using a binary search tree."""
 
+    _augmented = False  # True if nodes carry data derived from subtrees
+    _counted = True     # False while _size is unknown after a split
+
     # ---- override Position class  ----
     class Position(LinkedBinaryTree.Position):
         def key(self):
@@ -14,6 +18,59 @@ class TreeMap(LinkedBinaryTree, MapBase):
             """Return value of map's key-value pair."""
             return self.element()._value
 
+    # ---- nested Cursor class ----
+    class Cursor:
+        """Bidirectional cursor over the items of a TreeMap.
+
+        The cursor rests in a gap between two consecutive items and walks
+        raw nodes, creating no Position objects. It is invalidated by any
+        change to the map's keys.
+        """
+
+        def __init__(self, container, node):
+            """Constructor, should not be invoked by user."""
+            self._container = container
+            self._node = node   # node just after the gap (None at the end)
+
+        def seek(self, k):
+            """Move cursor just before the least key >= k (None for first)."""
+            self._node = self._container._node_ge(k)
+
+        def next(self):
+            """Return (k, v) pair after the cursor and move past it.
+
+            Return None if the cursor is at the end.
+            """
+            node = self._node
+            if node is None:
+                return None
+            self._node = self._container._node_after(node)
+            return (node._element._key, node._element._value)
+
+        def prev(self):
+            """Return (k, v) pair before the cursor and move back past it.
+
+            Return None if the cursor is at the beginning.
+            """
+            tree = self._container
+            if self._node is None:
+                node = tree._node_last(tree._root)
+            else:
+                node = tree._node_before(self._node)
+            if node is None:
+                return None
+            self._node = node
+            return (node._element._key, node._element._value)
+
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            item = self.next()
+            if item is None:
+                raise StopIteration
+            return item
+
     # ----  nonpublic utilities  ----
     def _subtree_search(self, pos, k):
         """Return Position of pos's subtree having key k, or last node
@@ -41,6 +98,53 @@ class TreeMap(LinkedBinaryTree, MapBase):
             walk = self.right(walk)
         return walk
 
+    def _node_first(self, node):
+        """Return leftmost node of subtree rooted at node (or None)."""
+        if node is not None:
+            while node._left is not None:
+                node = node._left
+        return node
+
+    def _node_last(self, node):
+        """Return rightmost node of subtree rooted at node (or None)."""
+        if node is not None:
+            while node._right is not None:
+                node = node._right
+        return node
+
+    def _node_after(self, node):
+        """Return node following node in natural order (or None)."""
+        if node._right is not None:
+            return self._node_first(node._right)
+        above = node._parent
+        while above is not None and node is above._right:
+            node = above
+            above = node._parent
+        return above
+
+    def _node_before(self, node):
+        """Return node preceding node in natural order (or None)."""
+        if node._left is not None:
+            return self._node_last(node._left)
+        above = node._parent
+        while above is not None and node is above._left:
+            node = above
+            above = node._parent
+        return above
+
+    def _node_ge(self, k):
+        """Return node with least key >= k (first node if k is None)."""
+        if k is None:
+            return self._node_first(self._root)
+        walk, found = self._root, None
+        while walk is not None:
+            if walk._element._key < k:
+                walk = walk._right
+            else:
+                found = walk
+                walk = walk._left
+        return found
+
     def first(self):    # O(h)
         """Return the first Position in the tree (or None if empty)."""
         if not self.is_empty():
@@ -170,16 +274,20 @@ class TreeMap(LinkedBinaryTree, MapBase):
         If start is None, iteration begins with minimum key of map.
         If stop is None, iteration continues through the maximum key of map.
         """
-        if not self.is_empty():
-            if start is None:
-                pos = self.first()
-            else:
-                pos = self.find_position(start)
-                if pos.key() < start:
-                    pos = self.after(pos)
-            while pos is not None and (stop is None or pos.key() < stop):
-                yield (pos.key(), pos.value())
-                pos = self.after(pos)
+        node = self._node_ge(start)
+        while node is not None:
+            item = node._element
+            if stop is not None and not item._key < stop:
+                break
+            yield (item._key, item._value)
+            node = self._node_after(node)
+
+    def cursor(self, start=None):   # O(h)
+        """Return a Cursor placed just before the least key >= start.
+
+        If start is None, the cursor is placed before the minimum key.
+        """
+        return self.Cursor(self, self._node_ge(start))
 
     def __getitem__(self, k):   # O(h)
         """Return value associated with key k (raise KeyError if not
@@ -202,6 +310,7 @@ class TreeMap(LinkedBinaryTree, MapBase):
             pos = self._subtree_search(self.root(), k)
             if pos.key() == k:
                 pos.element()._value = v
+                self._fix_augment(pos._node)    # value may be aggregated
                 self._rebalance_access(pos) # hook as described above
                 return
             else:
@@ -210,21 +319,38 @@ class TreeMap(LinkedBinaryTree, MapBase):
                     leaf = self._add_right(pos, item)
                 else:
                     leaf = self._add_left(pos, item)
+        self._fix_augment(leaf._node)
         self._rebalance_insert(leaf) # hook for balanced tree subclasses
 
+    def __len__(self):  # O(1), or O(n) on first call after a split
+        """Return the number of items in the map."""
+        if not self._counted:
+            count = 0
+            node = self._node_first(self._root)
+            while node is not None:
+                count += 1
+                node = self._node_after(node)
+            self._size = count
+            self._counted = True
+        return self._size
+
+    def is_empty(self):
+        """Return True if the map is empty."""
+        return self._root is None
+
     def __iter__(self): # O(n)
         """Generate an iteration of all keys in the map in order."""
-        pos = self.first()
-        while pos is not None:
-            yield pos.key()
-            pos = self.after(pos)
+        node = self._node_first(self._root)
+        while node is not None:
+            yield node._element._key
+            node = self._node_after(node)
 
     def __reversed__(self): # O(n)
         """Generate an iteration of all keys in the map in reverse order."""
-        pos = self.last()
-        while pos is not None:
-            yield pos.key()
-            pos = self.before(pos)
+        node = self._node_last(self._root)
+        while node is not None:
+            yield node._element._key
+            node = self._node_before(node)
 
     def delete(self, pos):  # O(h)
         """Remove the item at given Position."""
@@ -236,6 +362,8 @@ class TreeMap(LinkedBinaryTree, MapBase):
         # now pos has at most one item
         parent = self.parent(pos)
         self._delete(pos) # inherited from LinkedBinaryTree
+        if parent is not None:
+            self._fix_augment(parent._node)
         self._rebalance_delete(parent) # if root deleted, parent is None
 
     def __delitem__(self, k):   # O(h)
@@ -249,6 +377,243 @@ class TreeMap(LinkedBinaryTree, MapBase):
             self._rebalance_access(pos)
         raise KeyError("Key Error: " + repr(k))
 
+    def _build_subtree(self, items, lo, hi, parent, depth, size):
+        """Return root of a perfectly balanced subtree of items[lo:hi]."""
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        k, v = items[mid]
+        node = self._Node(self._Item(k, v), parent)
+        node._left = self._build_subtree(items, lo, mid, node, depth + 1,
+                                         size)
+        node._right = self._build_subtree(items, mid + 1, hi, node,
+                                          depth + 1, size)
+        self._rebalance_build(node, depth, size)
+        if self._augmented:
+            self._recompute_augment(node)
+        return node
+
+    def _check_items(self, items):
+        """Raise ValueError unless list items holds (k, v) pairs fit for
+        _build."""
+        for j in range(1, len(items)):
+            if not items[j-1][0] < items[j][0]:
+                raise ValueError("keys must be strictly increasing")
+
+    def _build(self, items):
+        """Replace contents of the tree with list of sorted (k, v) pairs."""
+        self._check_items(items)
+        old = []
+        node = self._node_first(self._root)
+        while node is not None:
+            old.append(node)
+            node = self._node_after(node)
+        for node in old:
+            node._parent = node     # convention for deprecated node
+        self._root = self._build_subtree(items, 0, len(items), None, 0,
+                                         len(items))
+        self._size = len(items)
+        self._counted = True
+
+    @classmethod
+    def from_sorted(cls, items, *args, **kwargs):   # O(n)
+        """Return a new map built from (k, v) pairs in increasing key order.
+
+        Other arguments are passed to the constructor.
+        Raise ValueError if the keys are not strictly increasing.
+        """
+        tree = cls(*args, **kwargs)
+        tree._build(list(items))
+        return tree
+
+    def bulk_update(self, items):   # O(n+m), m is the number of new items
+        """Merge (k, v) pairs in increasing key order into the map.
+
+        A new value replaces the value of an existing equal key. Small
+        batches are inserted one at a time; larger ones are merged with the
+        existing items and the tree is rebuilt.
+        """
+        items = list(items)
+        if len(items) * len(self).bit_length() < len(self):
+            self._check_items(items)
+            for k, v in items:
+                self[k] = v
+            return
+        merged = []
+        old = self.find_range(None, None)
+        current = next(old, None)
+        for k, v in items:
+            while current is not None and current[0] < k:
+                merged.append(current)
+                current = next(old, None)
+            if current is not None and current[0] == k:
+                current = next(old, None)   # replaced by new value
+            merged.append((k, v))
+        while current is not None:
+            merged.append(current)
+            current = next(old, None)
+        self._build(merged)
+
+    def dump(self, fp):     # O(n)
+        """Write the items of the map to binary file fp.
+
+        Items are written in key order, in chunks of _DUMP_CHUNK holding a
+        list of keys and a list of values, so that load can rebuild a
+        balanced tree in linear time whatever the shape of this one.
+        """
+        pickle.dump(("TreeMap", len(self)), fp, 4)
+        keys, values = [], []
+        for k, v in self.find_range(None, None):
+            keys.append(k)
+            values.append(v)
+            if len(keys) == self._DUMP_CHUNK:
+                pickle.dump((keys, values), fp, 4)
+                keys, values = [], []
+        if keys:
+            pickle.dump((keys, values), fp, 4)
+
+    @classmethod
+    def load(cls, fp, *args, **kwargs):     # O(n)
+        """Return a map read from binary file fp, as written by dump.
+
+        Other arguments are passed to the constructor.
+        """
+        kind, size = pickle.load(fp)
+        if kind != "TreeMap":
+            raise ValueError("not a dumped TreeMap")
+        items = []
+        while len(items) < size:
+            keys, values = pickle.load(fp)
+            items.extend(zip(keys, values))
+        tree = cls(*args, **kwargs)
+        tree._build(items)
+        return tree
+
+    def _clone_empty(self):
+        """Return a new empty map of the same type and parameters."""
+        return type(self)()
+
+    def _link_middle(self, mid, left, right):
+        """Make detached node mid the parent of subtrees left and right."""
+        mid._parent = None
+        self._relink(mid, left, True)
+        self._relink(mid, right, False)
+
+    def _join_nodes(self, left, mid, right):
+        """Return root of a tree joining subtrees left and right, whose keys
+        are less and greater than the key of detached node mid."""
+        self._link_middle(mid, left, right)
+        self._fix_augment(mid)
+        return mid
+
+    def _split_nodes(self, node, k):
+        """Return roots of two trees holding the nodes of subtree node with
+        keys < k and keys >= k."""
+        path = []
+        while node is not None:     # detach the nodes on the search path
+            left, right = node._left, node._right
+            for child in (left, right):
+                if child is not None:
+                    child._parent = None
+            path.append((node, left, right))
+            node = right if node._element._key < k else left
+        low = high = None
+        for (node, left, right) in reversed(path):  # rejoin bottom-up
+            if node._element._key < k:
+                low = self._join_nodes(left, node, low)
+            else:
+                high = self._join_nodes(high, node, right)
+        return (low, high)
+
+    def _subtree_size(self, node):
+        """Return number of nodes in subtree of node (or None if that takes
+        more than O(1) time)."""
+        return None
+
+    def split(self, k):
+        """Split the map into two maps with keys < k and keys >= k.
+
+        Return the pair of new maps; this map becomes empty. The split
+        takes O(log n) time in an AVL tree and O(log^2 n) time in a red-
+        black tree. Unless subtree sizes are maintained, the size of each
+        new map is only counted, in O(n) time, by its first len() call.
+        """
+        low, high = self._split_nodes(self._root, k)
+        left, right = self._clone_empty(), self._clone_empty()
+        left._root, right._root = low, high
+        size = self._subtree_size(low)
+        if size is None:
+            left._counted = right._counted = False
+        else:
+            left._size, right._size = size, self._subtree_size(high)
+        self._root = None
+        self._size = 0
+        self._counted = True
+        return (left, right)
+
+    @classmethod
+    def join(cls, left, right):     # O(h)
+        """Return a new map holding the items of maps left and right.
+
+        Both maps must be of this class, or of one subclass of it (or raise
+        TypeError), and every key of left must be less than every key of
+        right (or raise ValueError). Maps left and right become empty.
+        """
+        if type(left) is not type(right) or not isinstance(left, cls):
+            raise TypeError("left and right must be maps of one type")
+        if not left.is_empty() and not right.is_empty() \
+                and not left.find_max()[0] < right.find_min()[0]:
+            raise ValueError("keys of left must precede keys of right")
+        tree = left._clone_empty()
+        if left.is_empty() or right.is_empty():
+            tree._root = left._root if right.is_empty() else right._root
+            tree._size = left._size + right._size
+        else:
+            pos = right.first()
+            item = pos.element()
+            right.delete(pos)   # its minimum becomes the joining node
+            tree._size = left._size + right._size + 1
+            tree._root = tree._join_nodes(left._root, tree._Node(item),
+                                          right._root)
+        tree._counted = left._counted and right._counted
+        for t in (left, right):
+            t._root = None
+            t._size = 0
+            t._counted = True
+        return tree
+
+    def delete_range(self, start, stop):    # O(split + s), s items removed
+        """Remove all items such that start <= key < stop; return their
+        number.
+
+        If start is None, removal begins with minimum key of map.
+        If stop is None, removal continues through the maximum key of map.
+        """
+        first = self._node_ge(start)
+        if first is None or (stop is not None
+                             and not first._element._key < stop):
+            return 0
+        if start is None:
+            low, rest = None, self._root
+        else:
+            low, rest = self._split_nodes(self._root, start)
+        if stop is None:
+            middle, high = rest, None
+        else:
+            middle, high = self._split_nodes(rest, stop)
+        doomed = []
+        node = self._node_first(middle)
+        while node is not None:
+            doomed.append(node)
+            node = self._node_after(node)
+        pivot = doomed.pop()    # rejoins low and high, then is deleted
+        for node in doomed:
+            node._parent = node     # convention for deprecated node
+        self._size -= len(doomed)
+        self._root = self._join_nodes(low, pivot, high)
+        self.delete(self._make_position(pivot))
+        return len(doomed) + 1
+
     def _rebalance_access(self, pos):
         pass
 
@@ -258,6 +623,22 @@ class TreeMap(LinkedBinaryTree, MapBase):
     def _rebalance_delete(self, pos):
         pass
 
+    def _rebalance_build(self, node, depth, size):
+        """Set balance data of node built by _build at given depth of a tree
+        with size nodes."""
+        pass
+
+    def _recompute_augment(self, node):
+        """Recompute augmented data of node from its children."""
+        pass
+
+    def _fix_augment(self, node):
+        """Recompute augmented data of node and all of its ancestors."""
+        if self._augmented:
+            while node is not None:
+                self._recompute_augment(node)
+                node = node._parent
+
     def _relink(self, parent, child, make_left_child):
         """Relink parent node with child node (child could be None)."""
         if make_left_child:
@@ -284,6 +665,9 @@ class TreeMap(LinkedBinaryTree, MapBase):
         else:
             self._relink(y, x._left, False) # x._left becomes right child of y
             self._relink(x, y, True)        # y becomes left child of x
+        if self._augmented:     # y is now below x
+            self._recompute_augment(y)
+            self._recompute_augment(x)
 
     def _restructure(self, x):
         """Perform trinode restructure of Position x with parent / grand-
@@ -360,6 +744,35 @@ class AVLTreeMap(TreeMap):
     def _rebalance_delete(self, pos):
         self._rebalance(pos)
 
+    def _rebalance_build(self, node, depth, size):
+        node._height = 1 + max(node.left_height(), node.right_height())
+
+    # ----  support for split and join  ----
+    def _join_nodes(self, left, mid, right):
+        hl = left._height if left is not None else 0
+        hr = right._height if right is not None else 0
+        if abs(hl - hr) <= 1:
+            mid = super()._join_nodes(left, mid, right)
+            mid._height = 1 + max(hl, hr)
+            return mid
+        # descend the inner spine of the taller tree to a subtree whose
+        # height is within one of the shorter tree, and hang mid there
+        taller_left = hl > hr
+        root = left if taller_left else right
+        above, walk = None, root
+        while walk is not None and walk._height > min(hl, hr) + 1:
+            above, walk = walk, (walk._right if taller_left else walk._left)
+        if taller_left:
+            self._link_middle(mid, walk, right)
+        else:
+            self._link_middle(mid, left, walk)
+        mid._height = 1 + max(mid.left_height(), mid.right_height())
+        self._relink(above, mid, not taller_left)
+        self._root = root
+        self._fix_augment(mid)
+        self._rebalance(self._make_position(above))
+        return self._root
+
 class SplayTreeMap(TreeMap):
     """Sorted map implementation using a splay tree.
 
@@ -397,10 +810,12 @@ class SplayTreeMap(TreeMap):
         self._splay(pos)
 
     def _rebalance_delete(self, pos):
-        self._splay(pos)
+        if pos is not None:     # None if the root was deleted
+            self._splay(pos)
 
     def _rebalance_access(self, pos):
-        self._splay(pos)
+        if pos is not None:
+            self._splay(pos)
 
 class RedBlackTreeMap(TreeMap):
     """Sorted map implementation using a red-black tree."""
@@ -454,9 +869,54 @@ class RedBlackTreeMap(TreeMap):
                     self._set_black(uncle)
                     self._resolve_red(grand)    # recur at red grandparent
 
+    # ----  support for bulk construction  ----
+    def _rebalance_build(self, node, depth, size):
+        # all levels but the deepest are full; the deepest one is red unless
+        # it is full as well (size + 1 is then a power of two)
+        deepest = size.bit_length() - 1
+        node._red = depth == deepest and size & (size + 1) != 0
+
+    # ----  support for split and join  ----
+    def _black_height(self, node):
+        """Return number of black nodes on any path down from node."""
+        height = 0
+        while node is not None:
+            if not node._red:
+                height += 1
+            node = node._left
+        return height
+
+    def _join_nodes(self, left, mid, right):
+        for root in (left, right):
+            if root is not None:
+                root._red = False   # detached subtrees may have a red root
+        hl, hr = self._black_height(left), self._black_height(right)
+        mid._red = hl != hr
+        if hl == hr:
+            return super()._join_nodes(left, mid, right)
+        # descend the inner spine of the taller tree to a black node of the
+        # same black height as the shorter tree, and hang red mid there
+        taller_left = hl > hr
+        root = left if taller_left else right
+        above, walk, height = None, root, max(hl, hr)
+        while walk is not None and (walk._red or height > min(hl, hr)):
+            if not walk._red:
+                height -= 1
+            above, walk = walk, (walk._right if taller_left else walk._left)
+        if taller_left:
+            self._link_middle(mid, walk, right)
+        else:
+            self._link_middle(mid, left, walk)
+        self._relink(above, mid, not taller_left)
+        self._root = root
+        self._fix_augment(mid)
+        self._resolve_red(self._make_position(mid))
+        return self._root
+
     # ----  support for deletions  ----
     def _rebalance_delete(self, pos):
-        if len(self) == 1:
+        root = self._root
+        if root is not None and root._left is None and root._right is None:
             self._set_black(self.root())
         elif pos is not None:
             num = self.num_children(pos)
@@ -502,3 +962,240 @@ class RedBlackTreeMap(TreeMap):
             else:
                 self._fix_deficit(z, self.right(z))
 
+
+class OrderStatisticMixin:
+    """Mixin maintaining subtree sizes for rank and select queries.
+
+    It must precede a balanced TreeMap subclass whose _Node class has a
+    _count slot.
+    """
+    _augmented = True
+
+    def _recompute_augment(self, node):
+        node._count = 1 + (node._left._count if node._left else 0) \
+                        + (node._right._count if node._right else 0)
+
+    def _subtree_size(self, node):
+        return node._count if node is not None else 0
+
+    def rank(self, k):  # O(h)
+        """Return number of keys less than k."""
+        count = 0
+        walk = self._root
+        while walk is not None:
+            if walk._element._key < k:
+                count += 1 + (walk._left._count if walk._left else 0)
+                walk = walk._right
+            else:
+                walk = walk._left
+        return count
+
+    def select(self, i):    # O(h)
+        """Return (k, v) pair with the i-th smallest key (counting from 0).
+
+        Raise IndexError if i is out of range.
+        """
+        if not 0 <= i < len(self):
+            raise IndexError("index out of range")
+        walk = self._root
+        while True:
+            left = walk._left._count if walk._left else 0
+            if i < left:
+                walk = walk._left
+            elif i == left:
+                return (walk._element._key, walk._element._value)
+            else:
+                i -= left + 1
+                walk = walk._right
+
+    def count_range(self, start, stop): # O(h)
+        """Return number of keys k such that start <= k < stop.
+
+        A start or stop of None is unbounded, as for find_range.
+        """
+        low = self.rank(start) if start is not None else 0
+        high = self.rank(stop) if stop is not None else len(self)
+        return max(0, high - low)
+
+    def median(self):   # O(h)
+        """Return (k, v) pair with the lower median key (or None if
+        empty)."""
+        return self.select((len(self) - 1) // 2) if len(self) else None
+
+class OrderStatisticAVLTreeMap(OrderStatisticMixin, AVLTreeMap):
+    """AVL tree map supporting rank and select in O(log n)."""
+
+    class _Node(AVLTreeMap._Node):
+        __slots__ = "_count"    # number of nodes in subtree
+
+        def __init__(self, element, parent=None, left=None, right=None):
+            super().__init__(element, parent, left, right)
+            self._count = 1
+
+class OrderStatisticRedBlackTreeMap(OrderStatisticMixin, RedBlackTreeMap):
+    """Red-black tree map supporting rank and select in O(log n)."""
+
+    class _Node(RedBlackTreeMap._Node):
+        __slots__ = "_count"    # number of nodes in subtree
+
+        def __init__(self, element, parent=None, left=None, right=None):
+            super().__init__(element, parent, left, right)
+            self._count = 1
+
+class IntervalTreeMap(RedBlackTreeMap):
+    """Red-black tree map whose keys are closed intervals (lo, hi).
+
+    Keys are ordered as tuples; each node also records the greatest hi of
+    its subtree, so that subtrees with no overlapping interval are pruned.
+    Every way of adding items, including from_sorted, bulk_update and load,
+    raises ValueError for an interval whose end precedes its start.
+    """
+    _augmented = True
+
+    class _Node(RedBlackTreeMap._Node):
+        __slots__ = "_max"  # greatest interval end within subtree
+
+        def __init__(self, element, parent=None, left=None, right=None):
+            super().__init__(element, parent, left, right)
+            self._max = element._key[1]
+
+    def _recompute_augment(self, node):
+        node._max = node._element._key[1]
+        for child in (node._left, node._right):
+            if child is not None and child._max > node._max:
+                node._max = child._max
+
+    def _subtree_overlapping(self, node, lo, hi):
+        """Generate items of subtree at node whose interval meets [lo, hi]."""
+        if node is None or node._max < lo:
+            return
+        yield from self._subtree_overlapping(node._left, lo, hi)
+        start, end = node._element._key
+        if start <= hi:
+            if lo <= end:
+                yield (node._element._key, node._element._value)
+            # later intervals start no earlier than this one
+            yield from self._subtree_overlapping(node._right, lo, hi)
+
+    def _check_interval(self, k):
+        """Raise ValueError unless k is an interval (lo, hi) with lo <= hi."""
+        lo, hi = k
+        if hi < lo:
+            raise ValueError("interval end precedes its start")
+
+    def _check_items(self, items):
+        super()._check_items(items)
+        for k, v in items:
+            self._check_interval(k)
+
+    def __setitem__(self, k, v):
+        """Assign value v to interval k = (lo, hi), where lo <= hi."""
+        self._check_interval(k)
+        super().__setitem__(k, v)
+
+    def overlapping(self, lo, hi):  # O(min(n, (s+1) log n)) for s results
+        """Generate (interval, v) pairs whose interval meets [lo, hi], in
+        key order."""
+        return self._subtree_overlapping(self._root, lo, hi)
+
+    def stabbing(self, x):
+        """Generate (interval, v) pairs whose interval contains point x."""
+        return self._subtree_overlapping(self._root, x, x)
+
+class AggregateMixin:
+    """Mixin maintaining op-aggregates of the values in each subtree.
+
+    op must be associative with identity element identity (as with
+    operator.add and 0, or max and float("-inf")); it need not be
+    commutative, since values are combined in key order. The mixin must
+    precede a balanced TreeMap subclass whose _Node class has an _agg slot.
+    """
+    _augmented = True
+
+    def __init__(self, op, identity):
+        """Create an empty map aggregating values with op."""
+        super().__init__()
+        self._op = op
+        self._identity = identity
+
+    def _clone_empty(self):
+        return type(self)(self._op, self._identity)
+
+    def _agg(self, node):
+        return node._agg if node is not None else self._identity
+
+    def _recompute_augment(self, node):
+        node._agg = self._op(self._op(self._agg(node._left),
+                                      node._element._value),
+                             self._agg(node._right))
+
+    def _aggregate_from(self, node, start):
+        """Return aggregate of values with key >= start in subtree."""
+        op, result = self._op, self._identity
+        while node is not None:
+            if node._element._key < start:
+                node = node._right
+            else:   # node and its right subtree precede earlier results
+                result = op(op(node._element._value, self._agg(node._right)),
+                            result)
+                node = node._left
+        return result
+
+    def _aggregate_before(self, node, stop):
+        """Return aggregate of values with key < stop in subtree."""
+        op, result = self._op, self._identity
+        while node is not None:
+            if node._element._key < stop:
+                result = op(result, op(self._agg(node._left),
+                                       node._element._value))
+                node = node._right
+            else:
+                node = node._left
+        return result
+
+    def aggregate(self, start, stop):   # O(h)
+        """Return op-aggregate of values with start <= key < stop in key
+        order (identity if there are none).
+
+        A start or stop of None is unbounded, as for find_range.
+        """
+        node = self._root
+        while node is not None:     # find the top node within the range
+            k = node._element._key
+            if start is not None and k < start:
+                node = node._right
+            elif stop is not None and not k < stop:
+                node = node._left
+            else:
+                break
+        if node is None:
+            return self._identity
+        if start is None:
+            low = self._agg(node._left)
+        else:
+            low = self._aggregate_from(node._left, start)
+        if stop is None:
+            high = self._agg(node._right)
+        else:
+            high = self._aggregate_before(node._right, stop)
+        return self._op(self._op(low, node._element._value), high)
+
+class AggregateAVLTreeMap(AggregateMixin, AVLTreeMap):
+    """AVL tree map answering range aggregate queries in O(log n)."""
+
+    class _Node(AVLTreeMap._Node):
+        __slots__ = "_agg"  # aggregate of values in subtree
+
+        def __init__(self, element, parent=None, left=None, right=None):
+            super().__init__(element, parent, left, right)
+            self._agg = None
+
+class AggregateRedBlackTreeMap(AggregateMixin, RedBlackTreeMap):
+    """Red-black tree map answering range aggregate queries in O(log n)."""
+
+    class _Node(RedBlackTreeMap._Node):
+        __slots__ = "_agg"  # aggregate of values in subtree
+
+        def __init__(self, element, parent=None, left=None, right=None):
+            super().__init__(element, parent, left, right)
+            self._agg = None